@@ -21,14 +21,23 @@ def log_llm_event(event_type, prompt, response=None, model=None, agent=None, fun
     with open(LOG_PATH, "a", encoding="utf-8") as f:
         f.write(json.dumps(log_entry, ensure_ascii=False) + "\n")
 
+DEFAULT_MODEL = "mistral"
+OLLAMA_URL = "http://localhost:11434/api/generate"
+
 def run_llm(prompt: str, model_name: str, agent=None, function=None) -> str:
-    """Appelle toujours le modèle Mistral d'Ollama local pour toute génération LLM (hors embeddings)."""
-    model = "mistral"
-    url = "http://localhost:11434/api/generate"
+    """Appelle le modèle demandé sur l'Ollama local ; si ce modèle n'est pas installé, se rabat sur DEFAULT_MODEL."""
+    model = model_name or DEFAULT_MODEL
     payload = {"model": model, "prompt": prompt, "stream": False}
     log_llm_event("llm_request", prompt, model=model, agent=agent, function=function)
     try:
-        response = requests.post(url, json=payload)
+        response = requests.post(OLLAMA_URL, json=payload)
+        if response.status_code == 404 and model != DEFAULT_MODEL:
+            # Modèle absent : on réessaie avec le modèle par défaut
+            log_llm_event("llm_fallback", prompt, model=model, agent=agent, function=function,
+                          extra={"fallback_model": DEFAULT_MODEL})
+            model = DEFAULT_MODEL
+            payload["model"] = model
+            response = requests.post(OLLAMA_URL, json=payload)
         response.raise_for_status()
         result = response.json().get("response", "")
         log_llm_event("llm_response", prompt, response=result, model=model, agent=agent, function=function)
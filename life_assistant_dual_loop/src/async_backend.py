@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+asyncio runtime for the backend.
+
+BackendLoop.run() interleaves every concern in one loop, so each waits for
+the others. Here each concern is its own asyncio task with its own wake-up
+source:
+
+- request intake: the request file or the request spool changing (checked every 0.1s)
+- buffer ingestion: the task buffer file changing
+- system checks: a timer (SYSTEM_CHECK_INTERVAL)
+- sequence steps: an event set when work may have created a sequence, or a timeout
+- queue workers: an event set when tasks are queued, or a timeout
+- thought writer: the thought queue itself
+
+Blocking work (model calls, actions, file and memory I/O) runs in thread
+pools; user requests have a pool of their own. One work lock serialises
+changes to memory, and is released while a model call runs, so a long
+background planning call never blocks a request or the buffer.
+"""
+import os
+import sys
+import asyncio
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from log_pipeline import LogSink
+from request_spool import spool_stamp
+
+REQUEST_POLL_INTERVAL = 0.1
+BUFFER_POLL_INTERVAL = 0.5
+SEQUENCE_IDLE_WAIT = 5.0     # Seconds between checks for due sequence steps (retries back off by 30s+)
+QUEUE_IDLE_WAIT = 30.0       # Seconds between checks for tasks given back to the queue
+SHUTDOWN_TIMEOUT = 10.0      # Seconds to wait for the work in flight before saving memory
+
+# Task model calls made without the work lock
+MODEL_CALLS = ('execute_directives', 'plan_batch')
+
+
+class _UnlockedModelCalls:
+    """Task model proxy that releases the work lock while a model call runs"""
+
+    def __init__(self, model, lock):
+        self._model = model
+        self._lock = lock
+
+    def __getattr__(self, name):
+        attribute = getattr(self._model, name)
+        if name not in MODEL_CALLS:
+            return attribute
+
+        @functools.wraps(attribute)
+        def call(*args, **kwargs):
+            self._lock.release()
+            try:
+                return attribute(*args, **kwargs)
+            finally:
+                self._lock.acquire()
+        return call
+
+
+def _file_stamp(path):
+    try:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return None
+
+
+def _defining_module(instance):
+    """
+    The module an object's class was defined in: backend_loop, or __main__ when it
+    runs as a script (importing it by name would find the empty top-level stub)
+    """
+    return sys.modules[type(instance).__module__]
+
+
+class AsyncBackendRuntime:
+    """Runs a BackendLoop's concerns as concurrent asyncio tasks"""
+
+    def __init__(self, backend, queue_workers=1):
+        """
+        Args:
+            backend: An initialised BackendLoop
+            queue_workers: Concurrent processing queue workers (model calls still
+                           go through the backend's LLM scheduler)
+        """
+        self.backend = backend
+        self.config = _defining_module(backend)  # File paths, intervals and colours of the backend
+        self.queue_workers = max(1, queue_workers)
+        self.work_lock = threading.Lock()
+        self.request_pool = ThreadPoolExecutor(1, thread_name_prefix="backend-request")
+        self.background_pool = ThreadPoolExecutor(self.queue_workers + 3, thread_name_prefix="backend-background")
+        self.loop = None
+        self.queue_ready = None
+        self.sequence_ready = None
+        self.thoughts = None
+
+    async def _locked(self, pool, function, *args):
+        """Run a unit of work in a pool thread, holding the work lock except during model calls"""
+        def unit():
+            with self.work_lock:
+                return function(*args)
+        return await self.loop.run_in_executor(pool, unit)
+
+    async def _publish(self):
+        await self._locked(self.background_pool, self.backend.publish_state)
+
+    def _wake_background(self):
+        self.queue_ready.set()
+        self.sequence_ready.set()
+
+    @staticmethod
+    async def _wait(event, timeout):
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _queue_thought(self, text, record):
+        # Called from pool threads
+        self.loop.call_soon_threadsafe(self.thoughts.put_nowait, (text, record))
+
+    async def request_intake(self):
+        last_stamp = None
+        while not self.backend.should_exit:
+            stamp = (_file_stamp(self.config.REQUEST_FILE), spool_stamp())
+            if stamp != last_stamp:
+                last_stamp = stamp
+                request = await self.loop.run_in_executor(self.request_pool, self.backend.check_for_requests)
+                if request:
+                    print(f"{self.config.Colors.GREEN}User request detected.{self.config.Colors.ENDC}")
+                    await self._locked(self.request_pool, self.backend.process_request, request)
+                    # The request's actions may have queued tasks or created a sequence
+                    self._wake_background()
+                    await self._publish()
+                    # More requests may be spooled behind this one
+                    last_stamp = None
+                    continue
+            await asyncio.sleep(REQUEST_POLL_INTERVAL)
+
+    async def buffer_ingestion(self):
+        last_stamp = None
+        while not self.backend.should_exit:
+            stamp = _file_stamp(self.config.TASK_BUFFER_FILE)
+            if stamp != last_stamp:
+                last_stamp = stamp
+                if await self._locked(self.background_pool, self.backend.ingest_task_buffer):
+                    self.queue_ready.set()
+                    await self._publish()
+            await asyncio.sleep(BUFFER_POLL_INTERVAL)
+
+    async def system_checks(self):
+        while not self.backend.should_exit:
+            await asyncio.sleep(self.config.SYSTEM_CHECK_INTERVAL)
+            await self._locked(self.background_pool, self.backend.run_system_checks)
+            self.queue_ready.set()
+
+    async def sequence_steps(self):
+        while not self.backend.should_exit:
+            self.sequence_ready.clear()
+            if await self._locked(self.background_pool, self.backend.advance_multi_cycle_sequence):
+                await self._publish()
+                continue
+            await self._wait(self.sequence_ready, SEQUENCE_IDLE_WAIT)
+
+    async def queue_worker(self):
+        while not self.backend.should_exit:
+            self.queue_ready.clear()
+            while await self._locked(self.background_pool, self.backend.process_next_queue_task):
+                await self._publish()
+                # Executed actions may have created a sequence
+                self.sequence_ready.set()
+            await self._wait(self.queue_ready, QUEUE_IDLE_WAIT)
+
+    async def thought_writer(self):
+        sink = LogSink(self.config.THOUGHTS_LOG)
+        try:
+            while True:
+                batch = [await self.thoughts.get()]
+                while not self.thoughts.empty():
+                    batch.append(self.thoughts.get_nowait())
+                await self.loop.run_in_executor(self.background_pool, self._write_thoughts, sink, batch)
+        finally:
+            remaining = []
+            while not self.thoughts.empty():
+                remaining.append(self.thoughts.get_nowait())
+            self._write_thoughts(sink, remaining)
+            sink.close()
+
+    @staticmethod
+    def _write_thoughts(sink, batch):
+        if batch:
+            # Flushed right away: the internal window follows this file
+            sink.write([text for text, _ in batch], [record for _, record in batch])
+            sink.flush()
+
+    async def _supervise(self, name, concern):
+        """Keep a concern running after unexpected errors"""
+        while not self.backend.should_exit:
+            try:
+                await concern()
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                colors = self.config.Colors
+                print(f"{colors.RED}Error in {name}, restarting it: {e}{colors.ENDC}")
+                await asyncio.sleep(1)
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue_ready = asyncio.Event()
+        self.sequence_ready = asyncio.Event()
+        self.thoughts = asyncio.Queue()
+        self._wake_background()
+
+        self.backend.thought_writer = self._queue_thought
+        self.backend.task_model = _UnlockedModelCalls(self.backend.task_model, self.work_lock)
+
+        concerns = [
+            ("request intake", self.request_intake),
+            ("buffer ingestion", self.buffer_ingestion),
+            ("system checks", self.system_checks),
+            ("sequence steps", self.sequence_steps),
+            ("thought writer", self.thought_writer)
+        ] + [(f"queue worker {i + 1}", self.queue_worker) for i in range(self.queue_workers)]
+        await asyncio.gather(*(
+            asyncio.create_task(self._supervise(name, concern), name=name) for name, concern in concerns
+        ))
+
+    def close(self):
+        """Stop background model calls, wait briefly for work in flight and release the pools"""
+        self.backend.should_exit = True
+        self.backend.llm_scheduler.hold_background(SHUTDOWN_TIMEOUT)
+        if self.work_lock.acquire(timeout=SHUTDOWN_TIMEOUT):
+            self.work_lock.release()
+        self.backend.thought_writer = None
+        self.request_pool.shutdown(wait=False)
+        self.background_pool.shutdown(wait=False)
+
+
+def run_async(backend, queue_workers=1):
+    """Run a BackendLoop on the asyncio runtime until interrupted"""
+    runtime = AsyncBackendRuntime(backend, queue_workers=queue_workers)
+    Colors = runtime.config.Colors
+    print(f"\n{Colors.HEADER}{Colors.BOLD}Starting Life Assistant Backend (async runtime)...{Colors.ENDC}")
+    print(f"{Colors.CYAN}Press Ctrl+C at any time to exit.{Colors.ENDC}")
+    try:
+        asyncio.run(runtime.run())
+    except KeyboardInterrupt:
+        print(f"\n{Colors.CYAN}Stopping Life Assistant Backend...{Colors.ENDC}")
+    finally:
+        runtime.close()
+        backend.shutdown()
@@ -8,10 +8,7 @@ import datetime
 import http.client  # Built-in HTTP client instead of requests
 import urllib.parse
 import platform  # For platform detection
-import threading
-import re
 import subprocess
-import queue
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, BASE_DIR)
@@ -20,7 +17,19 @@ from task_execution_model import TaskExecutionModel
 from editor import Editor
 from fixed_function_executor import FunctionExecutor
 from memory_manager import MemoryManager
-from utils import log_change, log_perception_action
+from memory_service import connect_memory
+from utils import CHANGE_LOG, log_change, log_perception_action
+from log_pipeline import log_event, get_log_pipeline
+from state_snapshot import SnapshotPublisher, build_state_snapshot
+from interaction_store import get_interaction_store
+from llm_scheduler import LLMScheduler, RequestWatcher, BACKGROUND, LLMCallPreempted
+from batch_planner import BatchSizer, batch_key
+from fact_extraction import FactExtractor, same_amount
+from timeseries_store import get_timeseries_store, series_for_path, migrate_memory_lists
+from retention import RetentionEngine
+from request_spool import REQUEST_SPOOL_DIR, TRANSPORT_SPOOL, next_request, discard_request, complete_request, release_claimed_requests
+from memory_events import BACKEND_EVENTS_PORT, FRONTEND_EVENTS_PORT
+from memory_paths import KEY_ALIASES
 
 # Path definitions
 DATA_USER_DIR = os.path.join(BASE_DIR, 'data-user')
@@ -32,6 +41,7 @@ SRC_DIR = os.path.join(BASE_DIR, 'src')
 HUMAN_INPUT_MD = os.path.join(SRC_DIR, 'human_input.md')
 HUMAN_OUTPUT_MD = os.path.join(SRC_DIR, 'human_output.md')
 REQUEST_FILE = os.path.join(SRC_DIR, 'backend_request.json')
+CLAIMED_REQUEST_FILE = os.path.join(SRC_DIR, 'backend_request.claimed.json')  # The request file while it is read
 RESPONSE_FILE = os.path.join(SRC_DIR, 'backend_response.json')
 TASK_BUFFER_FILE = os.path.join(SRC_DIR, 'task_buffer.json')
 
@@ -42,9 +52,23 @@ BACKEND_MEMORY = os.path.join(DATA_BACKEND_DIR, 'backend_memory.json')
 # Other files (move all backend-modified files to data-backend)
 TASKS = os.path.join(DATA_BACKEND_DIR, 'tasks.md')
 BACKEND_TASKS = os.path.join(DATA_BACKEND_DIR, 'backend_tasks.md')
-CHANGE_LOG = os.path.join(DATA_BACKEND_DIR, 'change_log.md')
 PERCEPTION_ACTION_LOG = os.path.join(DATA_BACKEND_DIR, 'perception_action.log')
 BACKEND_LOG = os.path.join(DATA_BACKEND_DIR, 'backend_log.md')
+THOUGHTS_LOG = os.path.join(DATA_BACKEND_DIR, 'internal_thoughts.log')
+
+# Periodic system checks (task buffer, constant tasks)
+SYSTEM_CHECK_INTERVAL = 300  # seconds
+
+# Multi-cycle sequences: retries of a failing step before it is skipped
+MAX_SEQUENCE_STEP_ATTEMPTS = 3
+SEQUENCE_RETRY_DELAY = 30  # seconds, multiplied by the attempt number
+
+# Queue planning while the planner model is unreachable: first delay, doubled per failure
+PLANNER_RETRY_DELAY = 5  # seconds
+PLANNER_MAX_RETRY_DELAY = 300  # seconds
+
+# How often the loop re-checks for the request while background calls are held
+HOLD_POLL_INTERVAL = 0.2  # seconds
 
 class Colors:
     HEADER = '\033[95m'
@@ -66,25 +90,70 @@ class BackendLoop:
     and returns results to the frontend.
     """
     
-    def __init__(self, debug_mode=False):
-        """Initialize the backend components"""
+    def __init__(self, debug_mode=False, memory_service=False):
+        """Initialize the backend components
+        
+        Args:
+            debug_mode: Show internal model interactions
+            memory_service: Use the memory service process instead of the memory files
+        """
         print(f"{Colors.HEADER}Initializing Life Assistant Backend...{Colors.ENDC}")
         
-        self.task_model = TaskExecutionModel()    # Deepseek Coder for task execution
+        # One Ollama instance: user requests get the model first, background work waits or is aborted
+        self.llm_scheduler = LLMScheduler()
+        self.task_model = TaskExecutionModel(scheduler=self.llm_scheduler)    # Deepseek Coder for task execution
+        self.request_watcher = RequestWatcher(REQUEST_FILE, self.llm_scheduler, spool_dir=REQUEST_SPOOL_DIR).start()
+        # Queued tasks are planned several per model call; the batch size adapts to latency
+        self.batch_sizer = BatchSizer()
+        self.planner_failures = 0
+        self.planner_retry_at = 0.0
+        # Facts the user states about themselves are stored without waiting for the model
+        self.fact_extractor = FactExtractor()
         self.editor = Editor()
         self.executor = FunctionExecutor()
-        self.memory_manager = MemoryManager(USER_MEMORY, BACKEND_MEMORY, is_backend=True)
+        if memory_service:
+            self.memory_manager = connect_memory(USER_MEMORY, BACKEND_MEMORY, is_backend=True)
+        else:
+            self.memory_manager = MemoryManager(USER_MEMORY, BACKEND_MEMORY, is_backend=True)
         self.debug_mode = debug_mode
         
+        # Searchable archive of turns; the frontend records the other half of each one
+        self.interactions = get_interaction_store()
+        
+        # Spooled requests claimed by a previous run that stopped before answering
+        release_claimed_requests()
+        
+        # Histories that grow with every request are trimmed to their retention and archived
+        self.retention = RetentionEngine(self.memory_manager)
+        
+        # Queue entries claimed by a batch that was interrupted (e.g. Ctrl+C) would
+        # never run, and would hold off queue retention for good
+        queue = self.memory_manager.get_backend_memory().get("processing_queue", [])
+        stale = [i for i, entry in enumerate(queue) if entry.get("status") == "in_progress"]
+        if stale:
+            self.memory_manager.set_task_status(stale, "pending")
+        
+        # Append-heavy lists (transactions, mood, activities) are kept out of memory.json
+        try:
+            migrate_memory_lists(self.memory_manager)
+        except Exception as e:
+            print(f"{Colors.RED}Error moving lists to the time-series store: {e}{Colors.ENDC}")
+        
+        # Exchange memory changes with the frontend so neither side works on stale data
+        self.memory_manager.start_event_broadcaster(BACKEND_EVENTS_PORT)
+        self.memory_manager.listen_for_events(FRONTEND_EVENTS_PORT)
+        
         # Flag to indicate whether the system should exit
         self.should_exit = False
         
+        # Writes internal thoughts itself when set (async runtime); otherwise they go to the log pipeline
+        self.thought_writer = None
+        
         # Timer for periodic tasks
         self.last_check_time = time.time()
         
         # Internal thoughts window
         self.internal_window = None
-        self.thoughts_queue = queue.Queue()
         self.start_internal_window()
         
         # Update startup time in system memory
@@ -96,6 +165,15 @@ class BackendLoop:
         })
         
         self.ensure_directories_exist()
+
+        # Shared memory snapshot of queue/sequence state for the monitor windows
+        try:
+            self.snapshot_publisher = SnapshotPublisher()
+        except Exception as e:
+            print(f"{Colors.YELLOW}State snapshots disabled, monitors will read memory files: {e}{Colors.ENDC}")
+            self.snapshot_publisher = None
+        self.publish_state()
+
         print(f"{Colors.GREEN}Backend initialized and ready{Colors.ENDC}")
             
             
@@ -103,10 +181,9 @@ class BackendLoop:
         """Start separate terminal windows for internal thoughts and task tree visualization"""
         try:
             # Create internal_thoughts.log if it doesn't exist
-            thoughts_file = os.path.join(DATA_BACKEND_DIR, 'internal_thoughts.log')
-            if not os.path.exists(thoughts_file):
-                os.makedirs(os.path.dirname(thoughts_file), exist_ok=True)
-                with open(thoughts_file, 'w', encoding='utf-8') as f:
+            if not os.path.exists(THOUGHTS_LOG):
+                os.makedirs(os.path.dirname(THOUGHTS_LOG), exist_ok=True)
+                with open(THOUGHTS_LOG, 'w', encoding='utf-8') as f:
                     f.write("")
             
             # Also make sure task_tree.log exists
@@ -163,50 +240,23 @@ class BackendLoop:
                         break
                     except FileNotFoundError:
                         continue
-            # Start thread to monitor thoughts queue
-            self.thoughts_thread = threading.Thread(target=self._process_thoughts_queue, daemon=True)
-            self.thoughts_thread.start()
-            
             self.log_internal_thought("SUCCESS", "Internal thoughts window started")
             
         except Exception as e:
             print(f"{Colors.YELLOW}Could not start internal window: {e}{Colors.ENDC}")
             self.internal_window = None
 
-    def _process_thoughts_queue(self):
-        """Process thoughts from the queue and display in internal window"""
-        while not self.should_exit:
-            try:
-                if not self.thoughts_queue.empty():
-                    thought = self.thoughts_queue.get_nowait()
-                    # In a real implementation, we would send this to the internal window
-                    # For now, we'll just log it to a file that the window can read
-                    self._write_thought_to_file(thought)
-            except queue.Empty:
-                pass
-            except Exception as e:
-                print(f"{Colors.RED}Error processing thoughts: {e}{Colors.ENDC}")
-            time.sleep(0.1)
-
-    def _write_thought_to_file(self, thought):
-        """Write thought to a file that the internal window can monitor"""
-        thoughts_file = os.path.join(DATA_BACKEND_DIR, 'internal_thoughts.log')
-        try:
-            with open(thoughts_file, 'a', encoding='utf-8') as f:
-                timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-                f.write(f"[{timestamp}] {thought['type']}: {thought['content']}\n")
-        except Exception as e:
-            print(f"{Colors.RED}Error writing thought: {e}{Colors.ENDC}")
-
     def log_internal_thought(self, thought_type, content):
         """Log an internal thought to be displayed in the internal window"""
         if self.debug_mode or thought_type in ['ACTION', 'MEMORY', 'ERROR']:
-            thought = {
-                'type': thought_type,
-                'content': content,
-                'timestamp': datetime.datetime.now().isoformat()
-            }
-            self.thoughts_queue.put(thought)
+            # Written asynchronously by the log pipeline for the internal window to follow
+            now = datetime.datetime.now()
+            text = f"[{now.strftime('%H:%M:%S')}] {thought_type}: {content}\n"
+            record = {'type': thought_type, 'content': content, 'timestamp': now.isoformat()}
+            if self.thought_writer is not None:
+                self.thought_writer(text, record)
+            else:
+                log_event(THOUGHTS_LOG, text, record)
             
             # Also display in main console if debug mode
             if self.debug_mode:
@@ -221,6 +271,28 @@ class BackendLoop:
                 color = color_map.get(thought_type, Colors.ENDC)
                 print(f"{color}🧠 {thought_type}: {content}{Colors.ENDC}")
 
+    def log_backend(self, message):
+        """Append a line to the backend log through the log pipeline"""
+        timestamp = datetime.datetime.now().isoformat()
+        log_event(BACKEND_LOG, f"[{timestamp}] {message}\n", {"timestamp": timestamp, "message": message})
+
+    def publish_state(self):
+        """Publish the current queue and sequence state for the monitor windows"""
+        if self.snapshot_publisher is None:
+            return
+        try:
+            snapshot = build_state_snapshot(
+                self.memory_manager.get_backend_memory(),
+                self.memory_manager.get_system_memory()
+            )
+            snapshot['stats']['llm_lanes'] = self.llm_scheduler.stats()
+            snapshot['stats']['batch_planning'] = self.batch_sizer.stats()
+            snapshot['stats']['fact_extraction'] = self.fact_extractor.stats()
+            snapshot['stats']['retention'] = self.retention.stats()
+            self.snapshot_publisher.publish(snapshot)
+        except Exception as e:
+            print(f"{Colors.RED}Error publishing state snapshot: {e}{Colors.ENDC}")
+
     def ensure_directories_exist(self):
         """Make sure all required directories exist"""
         os.makedirs(DATA_USER_DIR, exist_ok=True)
@@ -236,8 +308,8 @@ class BackendLoop:
             with open(TASKS, 'w') as f:
                 f.write("# Tasks\n\n")
         
-        # Make sure communication files exist
-        for file_path in [REQUEST_FILE, RESPONSE_FILE, TASK_BUFFER_FILE]:
+        # Make sure communication files exist (the request file is the frontend's to create)
+        for file_path in [RESPONSE_FILE, TASK_BUFFER_FILE]:
             directory = os.path.dirname(file_path)
             os.makedirs(directory, exist_ok=True)
             if not os.path.exists(file_path):
@@ -286,10 +358,18 @@ class BackendLoop:
         print(f"{color}{'='*40}{Colors.ENDC}")
 
     def check_for_requests(self):
-        """Check if there are any new requests from the frontend"""
-        if os.path.exists(REQUEST_FILE):
+        """Check if there are any new requests from the frontend: the request file first, then the request spool"""
+        # The request file is claimed (moved away) as it is read: left in place, it would run again
+        # as soon as a spooled request changes the last processed id
+        try:
+            os.replace(REQUEST_FILE, CLAIMED_REQUEST_FILE)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"{Colors.RED}Error claiming request file: {e}{Colors.ENDC}")
+        if os.path.exists(CLAIMED_REQUEST_FILE):
             try:
-                with open(REQUEST_FILE, 'r') as f:
+                with open(CLAIMED_REQUEST_FILE, 'r') as f:
                     request_data = json.load(f)
                     
                 # Check if this is a new request we haven't processed
@@ -303,8 +383,37 @@ class BackendLoop:
                 print(f"{Colors.RED}Error reading request file. Invalid JSON.{Colors.ENDC}")
             except Exception as e:
                 print(f"{Colors.RED}Error checking for requests: {e}{Colors.ENDC}")
+            finally:
+                try:
+                    os.remove(CLAIMED_REQUEST_FILE)
+                except OSError:
+                    pass
 
-        return None
+        return self.check_request_spool()
+    
+    def check_request_spool(self):
+        """The oldest request queued in the spool by a concurrent frontend, or None"""
+        try:
+            request = next_request()
+            last_processed = self.memory_manager.get_system_memory().get("internal_state", {}).get("last_processed_request_id")
+            if request is not None and request.get("id") == last_processed:
+                # Handled before a restart but not removed: drop it
+                discard_request(request["id"])
+                request = next_request()
+            if request is not None:
+                self.display_debug_info("New Spooled Request Detected", request)
+            return request
+        except Exception as e:
+            print(f"{Colors.RED}Error checking request spool: {e}{Colors.ENDC}")
+            return None
+    
+    def write_response(self, request, response):
+        """Answer a request the way it came in: the response file, or the response spool"""
+        if request.get("transport") == TRANSPORT_SPOOL:
+            complete_request(request, response)
+        else:
+            with open(RESPONSE_FILE, 'w') as f:
+                json.dump(response, f, indent=2)
     
     def process_request(self, request):
         """Process a request from the frontend, extract and store user info if found"""
@@ -321,60 +430,16 @@ class BackendLoop:
                 }
             })
             
-            # Check for active multi-cycle task sequences
-            backend_mem = self.memory_manager.get_system_memory()
-            multi_cycle = backend_mem.get('multi_cycle_tasks', {})
-            current_sequence_id = multi_cycle.get('current_sequence_id')
-            
-            # If there's an active sequence, process it first
-            if current_sequence_id and current_sequence_id in multi_cycle.get('active_sequences', {}):
-                self.log_internal_thought("TASK", f"Continuing multi-cycle sequence: {current_sequence_id}")
-                sequence_result = self._process_multi_cycle_sequence(current_sequence_id)
-                if sequence_result:
-                    # If sequence is complete or failed, process the new request normally
-                    self.log_internal_thought("TASK", f"Multi-cycle sequence completed/failed, processing new request")
-                else:
-                    # Sequence is still active, return status update
-                    response = {
-                        "id": request.get("id"),
-                        "status": "success",
-                        "content": "Multi-cycle task sequence in progress. Next task will be processed automatically.",
-                        "multi_cycle_status": "active",
-                        "timestamp": datetime.datetime.now().isoformat()
-                    }
-                    with open(RESPONSE_FILE, 'w') as f:
-                        json.dump(response, f, indent=2)
-                    return response
-            
             directives = request.get("content", {})
-            tasks = ""
-            if os.path.exists(TASKS):
-                with open(TASKS, 'r') as f:
-                    tasks = f.read()
+            # Stated facts are stored whatever the planner makes of the request
+            _, recorded = self.capture_stated_facts(request)
+            tasks = self.editor.get_task_store(TASKS).render_markdown()
             
             self.log_internal_thought("THINKING", "Analyzing request with Deepseek Coder R1")
-              # Check for multi-cycle tasks in progress
             system_memory = self.memory_manager.get_system_memory()
-            multi_cycle = system_memory.get('multi_cycle_tasks', {})
-            current_seq_id = multi_cycle.get('current_sequence_id')
-            
-            # If there's an active multi-cycle task sequence, get the current task
-            current_task = None
-            if current_seq_id:
-                active_sequences = multi_cycle.get('active_sequences', {})
-                if current_seq_id in active_sequences:
-                    sequence = active_sequences[current_seq_id]
-                    tasks_list = sequence.get('tasks', [])
-                    current_idx = sequence.get('current_task_index', 0)
-                    
-                    if current_idx < len(tasks_list):
-                        current_task = tasks_list[current_idx]
-                        directives['current_multi_cycle_task'] = current_task
-                        
-                        self.log_internal_thought("TASK", f"Processing multi-cycle task: {current_task}")
-                        self.log_internal_thought("TASK", f"Sequence: {sequence['name']} ({current_idx+1}/{len(tasks_list)})")
-            
+
             # Execute directives with task execution model
+            planning_started = time.perf_counter()
             task_thoughts, actions, execution_results = self.task_model.execute_directives(
                 directives,
                 "",
@@ -383,59 +448,21 @@ class BackendLoop:
                 system_memory
             )
             
+            planning_ms = (time.perf_counter() - planning_started) * 1000
             self.log_internal_thought("THINKING", f"Generated {len(actions)} actions to execute")
-            # --- New: Extract and store user info (e.g., height) ---
-            user_info = {}
-            # Example: extract height from thoughts or directives
-            height_match = re.search(r'(?:height|tall|stature)[^\d]*(\d+(?:\.\d+)?\s*(?:cm|m|meters|feet|ft|inches|in))', str(directives) + ' ' + str(task_thoughts), re.IGNORECASE)
-            if height_match:
-                user_info['height'] = height_match.group(1).strip()
-            # Store in user memory if found
-            if user_info:
-                user_mem = self.memory_manager.get_user_memory()
-                if 'personal' not in user_mem:
-                    user_mem['personal'] = {}
-                user_mem['personal'].update(user_info)
-                self.memory_manager.update_user_memory({'personal': user_mem['personal']})
-            # --- End new ---            # Display debug info for Deepseek Coder R1's processing
+            # Display debug info for Deepseek Coder R1's processing
             self.display_debug_info("Deepseek Coder R1 Thoughts", task_thoughts, Colors.YELLOW)
             self.display_debug_info("Deepseek Coder R1 Actions", actions, Colors.YELLOW)
+            actions = self._skip_recorded(actions, recorded)
             
             # Execute actions
             print(f"{Colors.YELLOW}Executing actions...{Colors.ENDC}")
-            executed_actions = []
-            
-            for i, action in enumerate(actions):
-                try:
-                    action_type = action.get('type')
-                    self.log_internal_thought("ACTION", f"Executing {action_type}: {action.get('args', {})}")
-                    print(f"  {Colors.BLUE}▶ Action {i+1}/{len(actions)}: {action_type}{Colors.ENDC}")
-                    
-                    result = self.executor.execute(action, self.editor, self.memory_manager)
-                    log_change(CHANGE_LOG, action, result)
-                    
-                    self.log_internal_thought("SUCCESS", f"Result: {result}")
-                    
-                    executed_actions.append({
-                        "type": action_type,
-                        "args": action.get("args", {}),
-                        "result": result,
-                        "success": True
-                    })
-                    
-                    # Display debug info for action execution
-                    self.display_debug_info(f"Action Result: {action.get('type')}", result, Colors.CYAN)
-                    
-                except Exception as e:
-                    error_msg = f"Error in action {action.get('type')}: {e}"
-                    print(f"{Colors.RED}❌ {error_msg}{Colors.ENDC}")
-                    log_change(CHANGE_LOG, action, error_msg)
-                    executed_actions.append({
-                        "type": action.get("type"),
-                        "args": action.get("args", {}),
-                        "error": str(e),
-                        "success": False
-                    })
+            execution_started = time.perf_counter()
+            executed_actions = self._execute_actions(actions)
+            self._record_interaction(request.get("id"), executed_actions, execution_results, {
+                "planning_ms": round(planning_ms, 1),
+                "execution_ms": round((time.perf_counter() - execution_started) * 1000, 1)
+            })
             
             # Create the response
             response = {
@@ -447,8 +474,7 @@ class BackendLoop:
             }
             
             # Save the response
-            with open(RESPONSE_FILE, 'w') as f:
-                json.dump(response, f, indent=2)
+            self.write_response(request, response)
                   # Update cycle count
             self.memory_manager.update_system_memory({
                 "system": {
@@ -456,45 +482,6 @@ class BackendLoop:
                 }
             })
             
-            # Handle multi-cycle task progression if applicable
-            if current_seq_id:
-                system_memory = self.memory_manager.get_system_memory()
-                multi_cycle = system_memory.get('multi_cycle_tasks', {})
-                active_sequences = multi_cycle.get('active_sequences', {})
-                
-                if current_seq_id in active_sequences:
-                    sequence = active_sequences[current_seq_id]
-                    current_idx = sequence.get('current_task_index', 0)
-                    
-                    # Mark current task as completed
-                    sequence['completed_tasks'].append({
-                        'task': sequence['tasks'][current_idx],
-                        'completed_at': datetime.datetime.now().isoformat(),
-                        'result': execution_results
-                    })
-                    
-                    # Move to next task
-                    current_idx += 1
-                    sequence['current_task_index'] = current_idx
-                    
-                    # Check if sequence is complete
-                    if current_idx >= len(sequence['tasks']):
-                        sequence['status'] = 'completed'
-                        self.log_internal_thought("TASK", f"Multi-cycle task sequence '{sequence['name']}' completed!")
-                        
-                        # Move to completed sequences
-                        completed = multi_cycle.setdefault('completed_sequences', {})
-                        completed[current_seq_id] = sequence
-                        del active_sequences[current_seq_id]
-                        
-                        # Clear current sequence ID
-                        multi_cycle['current_sequence_id'] = None
-                    else:
-                        self.log_internal_thought("TASK", f"Moving to next task in sequence: {sequence['tasks'][current_idx]}")
-                        
-                    # Save updated memory
-                    self.memory_manager.update_system_memory(system_memory)
-            
             self.display_debug_info("Response Created", response)
             self.log_internal_thought("SUCCESS", "Request processing complete")
             return response
@@ -503,6 +490,8 @@ class BackendLoop:
             error_msg = f"Error during request processing: {e}"
             print(f"{Colors.RED}❌ {error_msg}{Colors.ENDC}")
             
+            self._record_interaction(request.get("id"), None, error_msg, {}, status="error")
+            
             # Create error response
             response = {
                 "id": request.get("id"),
@@ -512,59 +501,162 @@ class BackendLoop:
             }
             
             # Save the error response
-            with open(RESPONSE_FILE, 'w') as f:
-                json.dump(response, f, indent=2)
+            self.write_response(request, response)
                 
             return response
     
+    def capture_stated_facts(self, request):
+        """
+        Store facts the user stated about themselves (height, birthday, email, ...)
+        with one user memory update
+        
+        The user's own words are scanned when the frontend sent them, otherwise the directives.
+        
+        Returns:
+            (number of facts that changed memory, [(series, record)] added to the time-series store)
+        """
+        try:
+            if request.get("user_input"):
+                facts = self.fact_extractor.extract(request["user_input"])
+            else:
+                facts = self.fact_extractor.extract(json.dumps(request.get("content", {}), default=str), source='directives')
+            if not facts:
+                return 0, []
+            # Records for time-series paths (spending) go to their store, the rest to memory
+            recorded = []
+            for _, path, _, value in facts:
+                if series_for_path(path) and get_timeseries_store(series_for_path(path)).append(value):
+                    recorded.append((series_for_path(path), value))
+            facts = [fact for fact in facts if not series_for_path(fact[1])]
+            update = self.fact_extractor.build_update(facts, self.memory_manager.get_user_memory())
+            if update:
+                self.memory_manager.update_user_memory(update)
+            captured = (len(facts) if update else 0) + len(recorded)
+            if captured:
+                self.log_internal_thought("SUCCESS", f"Captured {captured} stated facts")
+            return captured, recorded
+        except Exception as e:
+            print(f"{Colors.RED}Error capturing facts: {e}{Colors.ENDC}")
+            return 0, []
+    
+    def _skip_recorded(self, actions, recorded):
+        """
+        Drop planned appends of records the fact extractor already stored for this request
+        
+        "I spent $4.50 on coffee" is captured as a transaction and usually planned as an
+        append_to_list too; the time-series store keeps both (a purchase stated twice is
+        two purchases), so the planner's copy of the same amount is skipped here.
+        """
+        remaining = list(recorded)
+        kept = []
+        for action in actions:
+            args = action.get('args') if isinstance(action, dict) else None
+            if remaining and isinstance(args, dict) and action.get('type') == 'append_to_list':
+                series = series_for_path(KEY_ALIASES.get(args.get('key'), args.get('key')))
+                match = next((item for item in remaining if item[0] == series and same_amount(item[1], args.get('value'))), None)
+                if match is not None:
+                    remaining.remove(match)
+                    self.log_internal_thought("ACTION", f"Skipping append_to_list already captured from the request: {args.get('value')}")
+                    continue
+            kept.append(action)
+        return kept
+    
+    def _record_interaction(self, request_id, executed_actions, results, timings, status="executed"):
+        """Add the actions, results and timings of a request to the interaction archive"""
+        if not request_id:
+            return
+        try:
+            self.interactions.record(
+                request_id,
+                actions=executed_actions,
+                results=results,
+                timings=timings,
+                status=status
+            )
+        except Exception as e:
+            print(f"{Colors.RED}Error recording interaction: {e}{Colors.ENDC}")
+    
+    def _execute_actions(self, actions):
+        """Execute a list of planned actions and collect per-action results"""
+        executed_actions = []
+        
+        # List changes of all the actions are saved once, after the last one
+        with self.executor.batch(self.memory_manager):
+            for i, action in enumerate(actions):
+                try:
+                    action_type = action.get('type')
+                    self.log_internal_thought("ACTION", f"Executing {action_type}: {action.get('args', {})}")
+                    print(f"  {Colors.BLUE}▶ Action {i+1}/{len(actions)}: {action_type}{Colors.ENDC}")
+                
+                    action_started = time.perf_counter()
+                    result = self.executor.execute(action, self.editor, self.memory_manager)
+                    duration_ms = round((time.perf_counter() - action_started) * 1000, 1)
+                    log_change(CHANGE_LOG, action, result)
+                
+                    self.log_internal_thought("SUCCESS", f"Result: {result}")
+                
+                    executed_actions.append({
+                        "type": action_type,
+                        "args": action.get("args", {}),
+                        "result": result,
+                        "success": True,
+                        "duration_ms": duration_ms
+                    })
+                
+                    # Display debug info for action execution
+                    self.display_debug_info(f"Action Result: {action.get('type')}", result, Colors.CYAN)
+                
+                except Exception as e:
+                    error_msg = f"Error in action {action.get('type')}: {e}"
+                    print(f"{Colors.RED}❌ {error_msg}{Colors.ENDC}")
+                    log_change(CHANGE_LOG, action, error_msg)
+                    executed_actions.append({
+                        "type": action.get("type"),
+                        "args": action.get("args", {}),
+                        "error": str(e),
+                        "success": False
+                    })
+        
+        return executed_actions
+    
     def check_for_system_tasks(self):
         """Check and execute periodic system tasks"""
         current_time = time.time()
         
         # If 5 minutes have passed since the last check
-        if current_time - self.last_check_time > 300:
+        if current_time - self.last_check_time > SYSTEM_CHECK_INTERVAL:
             self.last_check_time = current_time
-            print(f"{Colors.CYAN}Performing periodic system checks...{Colors.ENDC}")
-            
-            # Check for tasks in the task buffer
-            self.check_task_buffer()
-            
-            # Check for constant tasks that need to be executed
-            self.check_constant_tasks()
-            
-            # Update last_check timestamp
-            self.memory_manager.update_system_memory({
-                "internal_state": {
-                    "last_system_check": datetime.datetime.now().isoformat()
-                }
-            })
+            self.run_system_checks()
+    
+    def run_system_checks(self):
+        """Run the periodic system checks now"""
+        print(f"{Colors.CYAN}Performing periodic system checks...{Colors.ENDC}")
+        
+        # Check for tasks in the task buffer
+        self.ingest_task_buffer()
+        
+        # Check for constant tasks that need to be executed
+        self.check_constant_tasks()
+        
+        # Archive history entries past their retention
+        self.apply_retention()
+        
+        # Update last_check timestamp
+        self.memory_manager.update_system_memory({
+            "internal_state": {
+                "last_system_check": datetime.datetime.now().isoformat()
+            }
+        })
+
+    def apply_retention(self):
+        """Evict and archive entries of unbounded histories past their retention rules"""
+        try:
+            evicted = self.retention.apply()
+            if evicted:
+                self.log_internal_thought("TASK", "Archived " + ", ".join(f"{count} from {path}" for path, count in evicted.items()))
+        except Exception as e:
+            print(f"{Colors.RED}Error applying retention: {e}{Colors.ENDC}")
 
-    def check_task_buffer(self):
-        """Check for tasks in the buffer and process them"""
-        if os.path.exists(TASK_BUFFER_FILE):
-            try:
-                with open(TASK_BUFFER_FILE, 'r') as f:
-                    tasks = json.load(f)
-                
-                if tasks:
-                    print(f"{Colors.YELLOW}Found {len(tasks)} tasks in buffer{Colors.ENDC}")
-                    for task in tasks:
-                        self.display_debug_info("Processing Task from Buffer", task)
-                        
-                        # Add task to backend processing queue
-                        self.memory_manager.add_to_processing_queue(task)
-                        
-                        # Append execution to log
-                        with open(BACKEND_LOG, 'a') as log_file:
-                            log_file.write(f"[{datetime.datetime.now().isoformat()}] Received task: {task.get('description', 'No description')}\n")
-                    
-                    # Clear the buffer after processing
-                    with open(TASK_BUFFER_FILE, 'w') as f:
-                        json.dump([], f)
-            except Exception as e:
-                print(f"{Colors.RED}Error processing task buffer: {e}{Colors.ENDC}")
-                  
-                  
     def check_constant_tasks(self):
         """Check and process constant tasks that are due for execution"""
         due_tasks = self.memory_manager.get_due_constant_tasks()
@@ -586,130 +678,308 @@ class BackendLoop:
                 task["last_executed"] = datetime.datetime.now().isoformat()
                 
                 # Append execution to log
-                with open(BACKEND_LOG, 'a') as log_file:
-                    log_file.write(f"[{datetime.datetime.now().isoformat()}] Executing constant task: {task.get('description')}\n")
+                self.log_backend(f"Executing constant task: {task.get('description')}")
                 
             # Save memory to update task execution times
             self.memory_manager.save_memory()
     
-    def _process_multi_cycle_sequence(self, sequence_id):
-        """Process a specific task in a multi-cycle sequence
+    def _get_multi_cycle_state(self):
+        """Get the persisted multi-cycle state from backend memory"""
+        backend_mem = self.memory_manager.get_backend_memory()
+        multi_cycle = backend_mem.setdefault('multi_cycle_tasks', {})
+        multi_cycle.setdefault('active_sequences', {})
+        multi_cycle.setdefault('completed_sequences', {})
+        multi_cycle.setdefault('current_sequence_id', None)
+        return multi_cycle
+    
+    def _select_current_sequence(self, multi_cycle):
+        """Return the id of the sequence to advance next, picking a new one if needed"""
+        active_sequences = multi_cycle['active_sequences']
+        current_id = multi_cycle.get('current_sequence_id')
+        if current_id in active_sequences:
+            return current_id
+        
+        if not active_sequences:
+            multi_cycle['current_sequence_id'] = None
+            return None
+        
+        # Highest priority first, then oldest
+        priority_rank = {'high': 0, 'medium': 1, 'low': 2}
+        next_id = min(
+            active_sequences,
+            key=lambda seq_id: (
+                priority_rank.get(str(active_sequences[seq_id].get('priority', 'medium')).lower(), 1),
+                active_sequences[seq_id].get('created_at', '')
+            )
+        )
+        multi_cycle['current_sequence_id'] = next_id
+        return next_id
+    
+    def _finish_sequence(self, multi_cycle, sequence_id, status='completed'):
+        """Move a sequence from active to completed sequences"""
+        sequence = multi_cycle['active_sequences'].pop(sequence_id)
+        sequence['status'] = status
+        sequence['finished_at'] = datetime.datetime.now().isoformat()
+        sequence.pop('current_step', None)
+        multi_cycle['completed_sequences'][sequence_id] = sequence
+        
+        if multi_cycle.get('current_sequence_id') == sequence_id:
+            multi_cycle['current_sequence_id'] = None
+        
+        self.log_internal_thought("SEQUENCE", f"Multi-cycle task sequence '{sequence.get('name')}' {status}!")
+    
+    def advance_multi_cycle_sequence(self):
+        """Run exactly one step of the current multi-cycle sequence.
+        
+        Called from idle slots of the backend loop, so user requests always run first.
+        Progress is checkpointed to backend memory before and after the step, so a
+        restarted backend resumes from the step that was in flight.
         
         Returns:
-            bool: True if sequence is complete/failed, False if still active
+            bool: True if a step was attempted, False if there was nothing to do
         """
-        system_memory = self.memory_manager.get_system_memory()
-        multi_cycle = system_memory.get('multi_cycle_tasks', {})
-        active_sequences = multi_cycle.get('active_sequences', {})
+        multi_cycle = self._get_multi_cycle_state()
+        sequence_id = self._select_current_sequence(multi_cycle)
+        if not sequence_id:
+            return False
+        
+        sequence = multi_cycle['active_sequences'][sequence_id]
+        retry_at = sequence.get('current_step', {}).get('retry_at')
+        if retry_at and datetime.datetime.fromisoformat(retry_at) > datetime.datetime.now():
+            return False
         
-        if sequence_id not in active_sequences:
-            self.log_internal_thought("ERROR", f"Cannot process sequence {sequence_id}: not found in active sequences")
-            return True
-            
-        sequence = active_sequences[sequence_id]
-        current_idx = sequence.get('current_task_index', 0)
         tasks = sequence.get('tasks', [])
+        current_idx = sequence.get('current_task_index', 0)
         
         if current_idx >= len(tasks):
-            # Sequence is already complete
-            sequence['status'] = 'completed'
-            self.log_internal_thought("TASK", f"Multi-cycle task sequence '{sequence['name']}' already completed!")
-            
-            # Move to completed sequences
-            completed = multi_cycle.setdefault('completed_sequences', {})
-            completed[sequence_id] = sequence
-            del active_sequences[sequence_id]
-            
-            # Clear current sequence ID if this was the active one
-            if multi_cycle.get('current_sequence_id') == sequence_id:
-                multi_cycle['current_sequence_id'] = None
-                
-            # Save updated memory
-            self.memory_manager.update_system_memory(system_memory)
+            self._finish_sequence(multi_cycle, sequence_id)
+            self.memory_manager.save_memory()
             return True
-            
-        # Get the current task and update status
+        
         current_task = tasks[current_idx]
-        self.log_internal_thought("TASK", f"Processing multi-cycle task: {current_task}")
-        self.log_internal_thought("TASK", f"Sequence: {sequence['name']} ({current_idx+1}/{len(tasks)})")
+        attempt = sequence.get('current_step', {}).get('attempts', 0) + 1
         
-        # For now, we just update status - actual processing happens in process_request
-        # The task execution is handled when the user makes their next request
+        # Checkpoint: the step is in flight
         sequence['status'] = 'in_progress'
-        self.memory_manager.update_system_memory(system_memory)
+        sequence['current_step'] = {
+            'index': current_idx,
+            'attempts': attempt,
+            'started_at': datetime.datetime.now().isoformat()
+        }
+        self.memory_manager.save_memory()
         
-        return False
-      
-    def _process_multi_cycle_sequence(self, sequence_id):
-        """Process a specific task in a multi-cycle sequence
+        self.log_internal_thought("MULTI_TASK", f"Processing multi-cycle task: {current_task}")
+        self.log_internal_thought("SEQUENCE", f"Sequence: {sequence.get('name')} ({current_idx+1}/{len(tasks)})")
         
-        Returns:
-            bool: True if sequence is complete/failed, False if still active
-        """
-        system_memory = self.memory_manager.get_system_memory()
-        multi_cycle = system_memory.get('multi_cycle_tasks', {})
-        active_sequences = multi_cycle.get('active_sequences', {})
+        previous_results = [
+            {'task': entry.get('task'), 'result': entry.get('result')}
+            for entry in sequence.get('completed_tasks', [])[-3:]
+        ]
+        directives = {
+            'current_multi_cycle_task': current_task,
+            'sequence': {
+                'name': sequence.get('name'),
+                'description': sequence.get('description', ''),
+                'step': current_idx + 1,
+                'total_steps': len(tasks),
+                'previous_results': previous_results
+            }
+        }
+        
+        tasks_md = self.editor.get_task_store(TASKS).render_markdown()
         
-        if sequence_id not in active_sequences:
-            self.log_internal_thought("ERROR", f"Cannot process sequence {sequence_id}: not found in active sequences")
+        try:
+            task_thoughts, actions, execution_results = self.task_model.execute_directives(
+                directives,
+                "",
+                tasks_md,
+                "",
+                self.memory_manager.get_system_memory(),
+                lane=BACKGROUND
+            )
+            self.display_debug_info("Sequence Step Thoughts", task_thoughts, Colors.YELLOW)
+            executed_actions = self._execute_actions(actions)
+            # A step that planned nothing, or whose actions all failed, did not happen
+            step_failed = not any(a.get('success') for a in executed_actions)
+            error = None if actions else task_thoughts
+        except LLMCallPreempted:
+            # A user request arrived: give the step back, it runs again in the next idle slot
+            sequence = self._get_multi_cycle_state()['active_sequences'].get(sequence_id)
+            if sequence is not None:
+                sequence['current_step'] = {'index': current_idx, 'attempts': attempt - 1}
+            self.log_internal_thought("SEQUENCE", f"Step preempted by a user request: {current_task}")
+            self.memory_manager.save_memory()
             return True
-            
-        sequence = active_sequences[sequence_id]
-        current_idx = sequence.get('current_task_index', 0)
-        tasks = sequence.get('tasks', [])
+        except Exception as e:
+            executed_actions = []
+            execution_results = f"Error running sequence step: {e}"
+            step_failed = True
+            error = str(e)
         
-        if current_idx >= len(tasks):
-            # Sequence is already complete
-            sequence['status'] = 'completed'
-            self.log_internal_thought("SEQUENCE", f"Multi-cycle task sequence '{sequence['name']}' already completed!")
-            
-            # Move to completed sequences
-            completed = multi_cycle.setdefault('completed_sequences', {})
-            completed[sequence_id] = sequence
-            del active_sequences[sequence_id]
-            
-            # Clear current sequence ID if this was the active one
-            if multi_cycle.get('current_sequence_id') == sequence_id:
-                multi_cycle['current_sequence_id'] = None
-                
-            # Save updated memory
-            self.memory_manager.update_system_memory(system_memory)
+        # The sequence may have been modified by the executed actions; re-read it
+        multi_cycle = self._get_multi_cycle_state()
+        sequence = multi_cycle['active_sequences'].get(sequence_id)
+        if sequence is None:
+            self.memory_manager.save_memory()
             return True
-            
-        # Get the current task and update status
-        current_task = tasks[current_idx]
-        self.log_internal_thought("MULTI_TASK", f"Processing multi-cycle task: {current_task}")
-        self.log_internal_thought("SEQUENCE", f"Sequence: {sequence['name']} ({current_idx+1}/{len(tasks)})")
         
-        # For now, we just update status - actual processing happens in process_request
-        # The task execution is handled when the user makes their next request
-        sequence['status'] = 'in_progress'
-        self.memory_manager.update_system_memory(system_memory)
+        record = {
+            'task': current_task,
+            'index': current_idx,
+            'completed_at': datetime.datetime.now().isoformat(),
+            'result': execution_results,
+            'actions': executed_actions
+        }
         
-        return False
+        if step_failed:
+            record['error'] = error or "All actions failed"
+            if attempt < MAX_SEQUENCE_STEP_ATTEMPTS:
+                # Leave the index in place and back off before retrying this step
+                retry_at = datetime.datetime.now() + datetime.timedelta(seconds=SEQUENCE_RETRY_DELAY * attempt)
+                sequence.setdefault('current_step', {})['retry_at'] = retry_at.isoformat()
+                self.log_internal_thought("ERROR", f"Sequence step failed (attempt {attempt}/{MAX_SEQUENCE_STEP_ATTEMPTS}): {current_task}")
+                self.memory_manager.save_memory()
+                return True
+            sequence.setdefault('failed_tasks', []).append(record)
+            self.log_internal_thought("ERROR", f"Giving up on sequence step after {attempt} attempts: {current_task}")
+        else:
+            sequence.setdefault('completed_tasks', []).append(record)
+        
+        # Checkpoint: advance to the next step
+        sequence['current_task_index'] = current_idx + 1
+        sequence.pop('current_step', None)
+        
+        if sequence['current_task_index'] >= len(tasks):
+            status = 'failed' if sequence.get('failed_tasks') and not sequence.get('completed_tasks') else 'completed'
+            self._finish_sequence(multi_cycle, sequence_id, status)
+        else:
+            self.log_internal_thought("TASK", f"Moving to next task in sequence: {tasks[current_idx + 1]}")
+        
+        self.memory_manager.save_memory()
+        return True
+    
+    def run_queue_task(self, task):
+        """Run a queued task; tasks carrying an already planned action (single-pass frontend) execute it"""
+        action = task.get("action") if isinstance(task, dict) else None
+        if isinstance(action, dict) and action.get("type"):
+            executed = self._execute_actions([action])[0]
+            return f"Executed {action['type']}: {executed.get('result', executed.get('error'))}"
+        return f"Executed task: {task.get('description', 'No description')}"
     
     def process_next_queue_task(self):
-        """Process the next task in the processing queue"""
-        task = self.memory_manager.get_next_task_from_queue()
+        """
+        Process the next work item of the processing queue: a task with a planned
+        action on its own, otherwise a batch of compatible tasks planned together
         
-        if task:
-            self.display_debug_info("Processing Queue Task", task)
-            
-            # Execute the task
-            # In a more sophisticated implementation, you would use the task_model to execute the task
-            # For now, just log it and mark as completed
-            result = f"Executed task: {task.get('description', 'No description')}"
-            
-            # Log execution
-            with open(BACKEND_LOG, 'a') as log_file:
-                log_file.write(f"[{datetime.datetime.now().isoformat()}] {result}\n")
-                
-            # Mark task as complete
-            self.memory_manager.mark_task_complete(0, result)
+        Returns:
+            bool: True if queue work was attempted, False if the queue is empty (or only
+            holds tasks to plan while the planner backs off)
+        """
+        pending = self.memory_manager.get_pending_tasks()
+        # While the planner backs off after failures, tasks that need no planning still run
+        backing_off = time.time() < self.planner_retry_at
+        for index, task in pending:
+            key = batch_key(task)
+            if key is None:
+                self.memory_manager.set_task_status([index], "in_progress")
+                self.display_debug_info("Processing Queue Task", task)
+                result = self.run_queue_task(task)
+                self.log_backend(result)
+                self.memory_manager.mark_task_complete(index, result)
+                return True
+            if not backing_off:
+                return self.process_queue_batch([entry for entry in pending if batch_key(entry[1]) == key])
+        return False
+    
+    def process_queue_batch(self, candidates):
+        """
+        Plan a batch of compatible queued tasks with one model call and execute each task's actions
+        
+        Args:
+            candidates: (queue index, task) of compatible pending tasks, oldest first
             
+        Returns:
+            bool: True (a preempted batch is back in the queue and counts as attempted)
+        """
+        tasks_md = self.editor.get_task_store(TASKS).render_markdown()
+        system_memory = self.memory_manager.get_system_memory()
+        batch = self.batch_sizer.select(
+            candidates,
+            lambda entries: self.task_model.build_batch_prompt([task for _, task in entries], tasks_md, system_memory)
+        )
+        indexes = [index for index, _ in batch]
+        self.memory_manager.set_task_status(indexes, "in_progress")
+        self.log_internal_thought("TASK", f"Planning {len(batch)} queued task(s) in one call")
+        
+        started = time.perf_counter()
+        try:
+            thoughts, planned = self.task_model.plan_batch(
+                [task for _, task in batch], tasks_md, system_memory, lane=BACKGROUND
+            )
+        except LLMCallPreempted:
+            # A user request arrived: the tasks go back to the queue untouched
+            self.memory_manager.set_task_status(indexes, "pending")
+            self.log_internal_thought("TASK", f"Batch of {len(batch)} task(s) preempted by a user request")
+            return True
+        except Exception as e:
+            # No answer (e.g. Ollama down): the tasks stay queued until the planner is back
+            self.memory_manager.set_task_status(indexes, "pending")
+            self.planner_failures += 1
+            delay = min(PLANNER_RETRY_DELAY * 2 ** (self.planner_failures - 1), PLANNER_MAX_RETRY_DELAY)
+            self.planner_retry_at = time.time() + delay
+            self.log_internal_thought("ERROR", f"Planning {len(batch)} queued task(s) failed: {e}; retrying in {delay}s")
             return True
+        self.planner_failures = 0
+        latency = time.perf_counter() - started
+        self.batch_sizer.record(len(batch), latency, len(planned))
+        self.display_debug_info("Batch Planning Thoughts", thoughts, Colors.YELLOW)
         
-        return False
+        for position, (index, task) in enumerate(batch):
+            description = task.get('description', 'No description')
+            if position not in planned and len(batch) > 1:
+                # Left out of the response: planned again in a smaller batch
+                self.memory_manager.set_task_status([index], "pending")
+                continue
+            actions = planned.get(position, [])
+            executed = self._execute_actions(actions)
+            succeeded = sum(1 for action in executed if action.get('success'))
+            if position not in planned:
+                # The planner answered without this task, even on its own
+                result = f"Could not plan task: {description}"
+            else:
+                result = f"Executed task: {description} ({succeeded}/{len(executed)} actions succeeded)"
+            self.log_backend(result)
+            self.memory_manager.mark_task_complete(index, result)
+        
+        return True
+    
+    def ingest_task_buffer(self):
+        """
+        Move all tasks from the task buffer file to the processing queue
+        
+        Returns:
+            bool: True if any task was moved
+        """
+        if not os.path.exists(TASK_BUFFER_FILE):
+            return False
+        try:
+            with open(TASK_BUFFER_FILE, 'r') as f:
+                buffer_tasks = json.load(f)
+            if not buffer_tasks:
+                return False
+            print(f"{Colors.YELLOW}Found {len(buffer_tasks)} tasks in buffer{Colors.ENDC}")
+            for task in buffer_tasks:
+                self.display_debug_info("Processing Task from Buffer", task)
+                self.memory_manager.add_to_processing_queue(task)
+                self.log_backend(f"Received task: {task.get('description', 'No description')}")
+            # Clear the buffer
+            with open(TASK_BUFFER_FILE, 'w') as f:
+                json.dump([], f)
+            self.memory_manager.save_memory()  # Persist after moving tasks
+            return True
+        except Exception as e:
+            print(f"{Colors.RED}Error processing task buffer: {e}{Colors.ENDC}")
+            return False
     
     def run(self):
         """Run the backend loop continuously, prioritizing user requests over background tasks"""
@@ -724,55 +994,64 @@ class BackendLoop:
                     print(f"{Colors.GREEN}User request detected. Halting background tasks for this cycle.{Colors.ENDC}")
                     # Focus only on the user request for this cycle
                     self.process_request(request)
+                    self.publish_state()
                     # After handling, continue to next loop iteration (skip background/queue processing)
                     continue
-                any_work = False
-                # 2. Move all tasks from buffer to processing queue
-                if os.path.exists(TASK_BUFFER_FILE):
-                    try:
-                        with open(TASK_BUFFER_FILE, 'r') as f:
-                            buffer_tasks = json.load(f)
-                        if buffer_tasks:
-                            for task in buffer_tasks:
-                                self.memory_manager.add_to_processing_queue(task)
-                                with open(BACKEND_LOG, 'a') as log_file:
-                                    log_file.write(f"[{datetime.datetime.now().isoformat()}] Received task: {task.get('description', 'No description')}\n")
-                            # Clear the buffer
-                            with open(TASK_BUFFER_FILE, 'w') as f:
-                                json.dump([], f)
-                            self.memory_manager.save_memory()  # Persist after moving tasks
-                            any_work = True
-                    except Exception as e:
-                        print(f"{Colors.RED}Error processing task buffer: {e}{Colors.ENDC}")
-                # 3. Process all tasks in the processing queue
-                while True:
-                    task = self.memory_manager.get_next_task_from_queue()
-                    if not task:
-                        break
-                    self.display_debug_info("Processing Queue Task", task)
-                    result = f"Executed task: {task.get('description', 'No description')}"
-                    with open(BACKEND_LOG, 'a') as log_file:
-                        log_file.write(f"[{datetime.datetime.now().isoformat()}] {result}\n")
-                    self.memory_manager.mark_task_complete(0, result)
-                    any_work = True
-                # 4. If no work was done, sleep briefly
-                if not any_work:
+                # A request is on its way (or the frontend is calling the model): a background
+                # call started now would only wait for the hold and then delay the request
+                if self.llm_scheduler.background_held():
+                    time.sleep(HOLD_POLL_INTERVAL)
+                    continue
+                # 2. Advance active multi-cycle sequences by one step per idle slot
+                if self.advance_multi_cycle_sequence():
+                    self.publish_state()
+                    # Re-check for user requests before doing any more background work
+                    continue
+                # 3. Move all tasks from buffer to processing queue
+                any_work = self.ingest_task_buffer()
+                # 4. Process one batch of the processing queue, then re-check for user requests
+                if self.process_next_queue_task():
+                    self.publish_state()
+                    continue
+                # 5. Periodic system checks (constant tasks, retention) when they are due
+                self.check_for_system_tasks()
+                # 6. If no work was done, sleep briefly
+                if any_work:
+                    self.publish_state()
+                else:
                     time.sleep(1)
         except KeyboardInterrupt:
             print(f"\n{Colors.CYAN}Stopping Life Assistant Backend...{Colors.ENDC}")
             self.should_exit = True
         finally:
-            try:
-                self.memory_manager.save_memory()
-                print(f"{Colors.CYAN}Memory saved. Backend stopped.{Colors.ENDC}")
-            except Exception as e:
-                print(f"{Colors.RED}Error saving memory on exit: {e}{Colors.ENDC}")
+            self.shutdown()
+    
+    def shutdown(self):
+        """Save memory and close the log pipeline, snapshot publisher, event channels and request watcher"""
+        try:
+            self.memory_manager.save_memory()
+            get_log_pipeline().close()
+            if self.snapshot_publisher is not None:
+                self.snapshot_publisher.close()
+            self.memory_manager.close_events()
+            self.request_watcher.close()
+            print(f"{Colors.CYAN}Memory saved. Backend stopped.{Colors.ENDC}")
+        except Exception as e:
+            print(f"{Colors.RED}Error saving memory on exit: {e}{Colors.ENDC}")
 
-def start_backend(debug_mode=False):
-    """Start the backend loop"""
-    backend = BackendLoop(debug_mode=debug_mode)
-    backend.run()
+def start_backend(debug_mode=False, memory_service=False, use_async=False):
+    """Start the backend loop
+    
+    Args:
+        use_async: Run the concerns of the loop as concurrent asyncio tasks (async_backend.py)
+    """
+    backend = BackendLoop(debug_mode=debug_mode, memory_service=memory_service)
+    if use_async:
+        from async_backend import run_async
+        run_async(backend)
+    else:
+        backend.run()
 
 if __name__ == "__main__":
     debug_flag = "--debug" in sys.argv
-    start_backend(debug_mode=debug_flag)
+    start_backend(debug_mode=debug_flag, memory_service="--memory-service" in sys.argv, use_async="--async" in sys.argv)
@@ -0,0 +1,95 @@
+import threading
+
+CHARS_PER_TOKEN = 4              # Rough average for English prompts and JSON
+DEFAULT_MAX_BATCH = 8            # Tasks planned by one call at most
+DEFAULT_TOKEN_BUDGET = 6000      # Prompt tokens per call, instructions included
+TARGET_BATCH_SECONDS = 120.0     # A batch slower than this shrinks (CPU inference)
+LATENCY_EWMA_ALPHA = 0.3
+SLOWDOWN_TOLERANCE = 1.15        # Per-task latency may grow this much while the batch grows
+
+
+def estimate_tokens(text):
+    """Approximate token count of a prompt"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def batch_key(task):
+    """
+    Tasks with the same key can be planned in one prompt: plain task descriptions
+    of the same type. Tasks with a pre-planned action, or nothing to plan, have no key.
+    """
+    if not isinstance(task, dict) or isinstance(task.get('action'), dict) or not task.get('description'):
+        return None
+    return task.get('type', 'background')
+
+
+class BatchSizer:
+    """
+    Decides how many queued tasks go into one planning prompt.
+
+    The batch size grows by one after a full batch that parsed completely,
+    stayed within the target latency and did not make the per-task latency
+    worse; it is halved after a slow batch or one whose response left tasks
+    out. Whatever the size, a batch is cut to fit the prompt token budget.
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_BATCH, token_budget=DEFAULT_TOKEN_BUDGET,
+                 target_seconds=TARGET_BATCH_SECONDS, initial_size=2):
+        self._lock = threading.Lock()
+        self.max_size = max_size
+        self.token_budget = token_budget
+        self.target_seconds = target_seconds
+        self.size = max(1, min(initial_size, max_size))
+        self.per_task_latency = None
+        self.batches = 0
+        self.tasks = 0
+
+    def select(self, candidates, build_prompt):
+        """
+        Take the batch from the front of the candidates
+
+        Args:
+            candidates: Compatible tasks in queue order (any items build_prompt accepts)
+            build_prompt: Function (list of candidates) -> prompt text
+
+        Returns:
+            The candidates to plan together; always at least the first one
+        """
+        with self._lock:
+            size = self.size
+        batch = list(candidates[:size])
+        while len(batch) > 1 and estimate_tokens(build_prompt(batch)) > self.token_budget:
+            batch.pop()
+        return batch
+
+    def record(self, batch_size, latency, planned):
+        """
+        Adapt the batch size to the outcome of a batch call
+
+        Args:
+            batch_size: Tasks in the batch
+            latency: Seconds the call took
+            planned: Tasks the response held an action list for
+        """
+        with self._lock:
+            self.batches += 1
+            self.tasks += batch_size
+            per_task = latency / batch_size
+            previous = self.per_task_latency
+
+            if planned < batch_size or latency > self.target_seconds:
+                self.size = max(1, self.size // 2)
+            elif batch_size >= self.size and (previous is None or per_task <= previous * SLOWDOWN_TOLERANCE):
+                self.size = min(self.max_size, self.size + 1)
+
+            if planned:
+                self.per_task_latency = per_task if previous is None else previous + LATENCY_EWMA_ALPHA * (per_task - previous)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'batch_size': self.size,
+                'batches': self.batches,
+                'avg_batch': round(self.tasks / self.batches, 2) if self.batches else 0.0,
+                'per_task_latency_s': round(self.per_task_latency, 2) if self.per_task_latency is not None else None
+            }
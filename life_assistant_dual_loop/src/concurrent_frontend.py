@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Concurrent terminal mode for the frontend (frontend_assistant.py --concurrent).
+
+Input is read on the main thread and never waits for the backend. Each
+request gets a tag (#1, #2, ...) and moves through two worker threads: the
+interpreter turns it into directives and queues it in the request spool,
+and the responder collects the backend's responses as they complete and
+displays the replies, labelled with their tag. Follow-ups can be entered
+while earlier requests are still running.
+
+Commands besides requests:
+    status            In-flight requests and what each is waiting for
+    cancel [N|all]    Cancel request #N (default: the latest one) or all of them
+    exit              Quit; requests still in flight are dropped
+"""
+import sys
+import time
+import queue
+import datetime
+import threading
+
+from request_spool import take_response, cancel_request
+
+QUEUED = 'queued'
+INTERPRETING = 'interpreting'
+WAITING = 'waiting for backend'
+REPLYING = 'writing reply'
+DONE = 'done'
+CANCELLED = 'cancelled'
+FAILED = 'failed'
+FINISHED = (DONE, CANCELLED, FAILED)
+
+RESPONSE_POLL_INTERVAL = 0.2
+
+
+class PendingRequest:
+    """A request entered by the user and its progress"""
+
+    def __init__(self, tag, text):
+        self.tag = tag
+        self.text = text
+        self.state = QUEUED
+        self.request_id = None
+        self.started = time.perf_counter()
+        self.started_at = datetime.datetime.now()
+        self.submitted = None
+
+    @property
+    def label(self):
+        return f"#{self.tag}"
+
+
+class ConcurrentFrontend:
+    """Runs a FrontendAssistant with input, interpretation and replies on separate threads"""
+
+    def __init__(self, assistant):
+        self.assistant = assistant
+        # The frontend module: frontend_assistant, or __main__ when it runs as a script
+        # (importing it by name would find the empty top-level stub)
+        self.config = sys.modules[type(assistant).__module__]
+        self.colors = self.config.Colors
+        self.inbox = queue.Queue()
+        self.requests = {}
+        self.lock = threading.Lock()
+        self.next_tag = 1
+        self.stopped = threading.Event()
+        self.workers = [
+            threading.Thread(target=self._interpret_loop, name="frontend-interpreter", daemon=True),
+            threading.Thread(target=self._respond_loop, name="frontend-responder", daemon=True)
+        ]
+
+    def _set_state(self, pending, state):
+        """Move a request on, unless it was cancelled; returns False if it was"""
+        with self.lock:
+            if pending.state == CANCELLED:
+                return False
+            pending.state = state
+        self._update_busy()
+        return True
+
+    def _update_busy(self):
+        with self.lock:
+            busy = any(entry.state not in FINISHED for entry in self.requests.values())
+        # No summarizing of the conversation while requests are in flight
+        self.assistant.user_model.history.set_busy(busy)
+
+    def _prompt(self):
+        with self.assistant.output_lock:
+            print(f"{self.colors.BOLD}{self.colors.BLUE}You:{self.colors.ENDC} ", end="", flush=True)
+
+    def submit(self, text):
+        with self.lock:
+            pending = PendingRequest(self.next_tag, text)
+            self.next_tag += 1
+            self.requests[pending.tag] = pending
+        self.assistant.user_model.history.set_busy(True)
+        self.inbox.put(pending)
+        print(f"{self.colors.GRAY}Queued as {pending.label}{self.colors.ENDC}")
+        return pending
+
+    def _interpret_loop(self):
+        while not self.stopped.is_set():
+            try:
+                pending = self.inbox.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if not self._set_state(pending, INTERPRETING):
+                continue
+            try:
+                with self.assistant.tagged_output(pending.label):
+                    if self.assistant.pipeline == self.config.PIPELINE_SINGLE:
+                        # Nothing goes to the backend: the whole request runs here
+                        self.assistant.process_request_single_pass(pending.text)
+                        self._set_state(pending, DONE)
+                        self._prompt()
+                        continue
+                    self._submit_to_backend(pending)
+            except Exception as e:
+                print(f"{self.colors.RED}❌ Error processing {pending.label}: {e}{self.colors.ENDC}")
+                self._set_state(pending, FAILED)
+
+    def _submit_to_backend(self, pending):
+        request_id = self.assistant.answer_from_cache(pending.text, pending.started, pending.started_at)
+        if request_id is not None:
+            pending.request_id = request_id
+            self._set_state(pending, DONE)
+            self._prompt()
+            return
+        directives = self.assistant.interpret_request(pending.text)
+        interpretation_ms = (time.perf_counter() - pending.started) * 1000
+        read_actions = self.config.memory_read_actions(directives)
+        if read_actions is not None:
+            # A memory lookup: answered here, without the backend
+            if not self._set_state(pending, REPLYING):
+                return
+            pending.request_id = self.assistant.answer_from_memory(
+                pending.text, directives, read_actions, pending.started, pending.started_at, interpretation_ms
+            )
+            self._set_state(pending, DONE)
+            self._prompt()
+            return
+        with self.lock:
+            if pending.state == CANCELLED:
+                return
+            pending.request_id = self.assistant.send_request_to_backend(directives, spool=True, original_input=pending.text)
+            pending.submitted = time.perf_counter()
+            pending.state = WAITING
+        self.assistant.record_interaction(
+            pending.request_id,
+            started_at=pending.started_at,
+            user_input=pending.text,
+            directives=directives,
+            timings={"interpretation_ms": round(interpretation_ms, 1)}
+        )
+
+    def _respond_loop(self):
+        while not self.stopped.wait(RESPONSE_POLL_INTERVAL):
+            with self.lock:
+                waiting = [entry for entry in self.requests.values() if entry.state == WAITING]
+            for pending in waiting:
+                response = take_response(pending.request_id)
+                if response is None:
+                    if time.perf_counter() - pending.submitted > self.config.BACKEND_TIMEOUT:
+                        self._time_out(pending)
+                    continue
+                if not self._set_state(pending, REPLYING):
+                    continue  # Cancelled while the backend worked on it: the reply is dropped
+                backend_ms = (time.perf_counter() - pending.submitted) * 1000
+                try:
+                    with self.assistant.tagged_output(pending.label):
+                        self.assistant.handle_backend_response(pending.request_id, response, pending.started, backend_ms)
+                    self._set_state(pending, DONE)
+                except Exception as e:
+                    print(f"{self.colors.RED}❌ Error replying to {pending.label}: {e}{self.colors.ENDC}")
+                    self._set_state(pending, FAILED)
+                self._prompt()
+
+    def _time_out(self, pending):
+        cancel_request(pending.request_id)
+        if not self._set_state(pending, FAILED):
+            return
+        timeout_msg = "I'm sorry, the backend is taking too long to respond. Please try again later."
+        self.assistant.record_interaction(pending.request_id, response=timeout_msg, status="timeout", timings={
+            "total_ms": round((time.perf_counter() - pending.started) * 1000, 1)
+        })
+        with self.assistant.tagged_output(pending.label):
+            self.assistant.display_assistant_response(timeout_msg)
+        self._prompt()
+
+    def cancel(self, argument):
+        """Cancel one request (by tag, default the latest in flight) or all of them"""
+        with self.lock:
+            # A reply that is already being written is shown anyway
+            in_flight = [entry for entry in self.requests.values() if entry.state in (QUEUED, INTERPRETING, WAITING)]
+            if argument == 'all':
+                targets = in_flight
+            elif argument:
+                tag = argument.lstrip('#')
+                targets = [entry for entry in in_flight if str(entry.tag) == tag]
+            else:
+                targets = in_flight[-1:]
+            for entry in targets:
+                entry.state = CANCELLED
+        if not targets:
+            print(f"{self.colors.YELLOW}Nothing to cancel.{self.colors.ENDC}")
+            return
+        for entry in targets:
+            if entry.request_id and not cancel_request(entry.request_id):
+                note = "the backend already started on it, its reply will be dropped"
+            else:
+                note = "withdrawn"
+            if entry.request_id:
+                self.assistant.record_interaction(entry.request_id, status="cancelled")
+            print(f"{self.colors.YELLOW}Cancelled {entry.label} ({note}).{self.colors.ENDC}")
+        self._update_busy()
+
+    def status(self):
+        with self.lock:
+            in_flight = [entry for entry in self.requests.values() if entry.state not in FINISHED]
+        if not in_flight:
+            print(f"{self.colors.CYAN}No requests in flight.{self.colors.ENDC}")
+            return
+        now = time.perf_counter()
+        for entry in in_flight:
+            text = entry.text if len(entry.text) <= 50 else entry.text[:47] + "..."
+            print(f"{self.colors.CYAN}{entry.label:>4}  {entry.state:<20} {now - entry.started:6.1f}s  {text}{self.colors.ENDC}")
+
+    def run(self):
+        """Read input until the user exits, handling requests in the background"""
+        print(f"\n{self.colors.HEADER}{self.colors.BOLD}Starting Life Assistant in Concurrent Terminal Mode...{self.colors.ENDC}")
+        print(f"{self.colors.CYAN}Keep typing while requests run; replies are labelled with their request number.{self.colors.ENDC}")
+        print(f"{self.colors.CYAN}Type 'status' to see requests in flight, 'cancel [N|all]' to cancel, 'exit' to quit.{self.colors.ENDC}")
+        self.assistant.display_assistant_response("I'm your Life Assistant powered by Llama3.2. How can I help you today?")
+        for worker in self.workers:
+            worker.start()
+
+        try:
+            while not self.assistant.should_exit:
+                user_input = self.assistant.get_user_input().strip()
+                command = user_input.lower()
+                if command in ['exit', 'quit', 'bye']:
+                    print(f"\n{self.colors.CYAN}Exiting Life Assistant. Goodbye!{self.colors.ENDC}")
+                    break
+                if command == 'status':
+                    self.status()
+                elif command == 'cancel' or command.startswith('cancel '):
+                    self.cancel(command[len('cancel'):].strip())
+                elif user_input:
+                    self.submit(user_input)
+        except (KeyboardInterrupt, EOFError):
+            print(f"\n{self.colors.CYAN}Stopping Life Assistant...{self.colors.ENDC}")
+        finally:
+            self.stopped.set()
+            for worker in self.workers:
+                worker.join(timeout=1.0)
@@ -0,0 +1,236 @@
+import re
+import json
+import math
+import time
+import hashlib
+
+DEFAULT_TOKEN_BUDGET = 300      # Tokens of memory context per prompt
+MAX_FACT_CHARS = 200            # Longer values are truncated
+MAX_LIST_ITEMS = 50             # Only the most recent entries of long lists are indexed
+RECENCY_HALF_LIFE = 3600.0      # Seconds for the recency boost of a changed fact to halve
+RECENCY_WEIGHT = 2.0
+PATH_MATCH_WEIGHT = 1.5         # Query words found in the path count more than words in the value
+MAX_RECENT_PATHS = 1000
+
+# Sections that are not facts about the user (conversation history is added separately)
+SKIP_PATHS = ('system_state', 'assistant_memory.conversation_history')
+
+# Always worth including when present, whatever the request
+CORE_PATHS = ('personal_info.profile.preferred_name', 'personal_info.profile.full_name')
+
+STOPWORDS = {
+    'a', 'an', 'the', 'and', 'or', 'of', 'to', 'in', 'on', 'for', 'is', 'are', 'was', 'be', 'it',
+    'my', 'me', 'i', 'you', 'your', 'what', 'whats', 'how', 'do', 'does', 'did', 'can', 'could',
+    'please', 'tell', 'about', 'with', 'at', 'this', 'that', 'have', 'has', 'add', 'set', 'show'
+}
+
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token)"""
+    return (len(text) + 3) // 4
+
+
+def tokenize(text):
+    """Lowercase words without stopwords, with a plural 's' stripped"""
+    words = set()
+    for word in WORD_PATTERN.findall(str(text).lower()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        words.add(word)
+    return words
+
+
+def _is_empty(value):
+    return value is None or value == '' or value == [] or value == {}
+
+
+def _render_value(value):
+    if isinstance(value, list):
+        text = ', '.join(str(item) for item in value)
+    elif isinstance(value, dict):
+        text = ', '.join(f"{key}: {_render_value(item)}" for key, item in value.items() if not _is_empty(item))
+    else:
+        text = str(value)
+    if len(text) > MAX_FACT_CHARS:
+        text = text[:MAX_FACT_CHARS - 3] + '...'
+    return text
+
+
+def flatten_memory(memory, path=()):
+    """
+    Split memory into facts: scalar values, lists of scalars, and the items of
+    lists of records (only the most recent MAX_LIST_ITEMS items)
+
+    Yields:
+        (path, value) pairs, path being a tuple of keys and indexes
+    """
+    if '.'.join(str(key) for key in path) in SKIP_PATHS:
+        return
+    if isinstance(memory, dict):
+        for key, value in memory.items():
+            yield from flatten_memory(value, path + (key,))
+    elif isinstance(memory, list):
+        if all(not isinstance(item, (dict, list)) for item in memory):
+            if memory:
+                yield path, memory
+            return
+        start = max(0, len(memory) - MAX_LIST_ITEMS)
+        for index in range(start, len(memory)):
+            item = memory[index]
+            if isinstance(item, dict) and not any(isinstance(value, dict) for value in item.values()):
+                # A flat record (transaction, event, contact...) is one fact
+                if any(not _is_empty(value) for value in item.values()):
+                    yield path + (index,), item
+            else:
+                yield from flatten_memory(item, path + (index,))
+    elif not _is_empty(memory):
+        yield path, memory
+
+
+class _Fact:
+    __slots__ = ('path', 'text', 'tokens', 'path_tokens', 'cost')
+
+    def __init__(self, path, value):
+        self.path = '.'.join(str(key) for key in path)
+        self.text = f"- {self.path}: {_render_value(value)}\n"
+        self.path_tokens = tokenize(' '.join(str(key).replace('_', ' ') for key in path))
+        self.tokens = tokenize(self.text) | self.path_tokens
+        self.cost = estimate_tokens(self.text)
+
+
+class ContextAssembler:
+    """
+    Selects the memory facts most relevant to a request and renders them
+    within a fixed token budget, so prompt size does not grow with memory.
+
+    Facts are scored by how many (rare) request words they contain and by
+    how recently they changed. The fact index is rebuilt only when memory
+    changes; attached to a MemoryManager, that is known from its change
+    events, otherwise from a fingerprint of the memory.
+    """
+
+    def __init__(self, token_budget=DEFAULT_TOKEN_BUDGET):
+        self.token_budget = token_budget
+        self.version = 0
+        self._facts = []
+        self._document_frequency = {}
+        self._indexed_version = None
+        self._indexed_fingerprint = None
+        self._recent_changes = {}
+        self._attached = False
+        self._last_result = None
+
+    def attach(self, memory_manager):
+        """Follow a MemoryManager's user memory changes instead of fingerprinting memory"""
+        memory_manager.subscribe(self._on_memory_change, stores='user')
+        self._attached = True
+
+    def _on_memory_change(self, event):
+        self.version += 1
+        now = time.time()
+        paths = [event.path]
+        indexes = [i for i, key in enumerate(event.path) if isinstance(key, int)]
+        if indexes:
+            # Inside a list the fact is the record, or the list itself for a list of values
+            paths.append(event.path[:indexes[-1] + 1])
+            if indexes[-1] == len(event.path) - 1:
+                paths.append(event.path[:-1])
+        for path in paths:
+            self._recent_changes['.'.join(str(key) for key in path)] = now
+        if len(self._recent_changes) > MAX_RECENT_PATHS:
+            oldest = sorted(self._recent_changes, key=self._recent_changes.get)[:len(self._recent_changes) - MAX_RECENT_PATHS]
+            for key in oldest:
+                del self._recent_changes[key]
+
+    def _ensure_index(self, memory):
+        if self._attached:
+            if self._indexed_version == self.version and self._facts:
+                return
+        else:
+            fingerprint = hashlib.sha1(json.dumps(memory, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+            if fingerprint == self._indexed_fingerprint:
+                return
+            self._indexed_fingerprint = fingerprint
+            self.version += 1
+
+        self._facts = [_Fact(path, value) for path, value in flatten_memory(memory)]
+        self._document_frequency = {}
+        for fact in self._facts:
+            for token in fact.tokens:
+                self._document_frequency[token] = self._document_frequency.get(token, 0) + 1
+        self._indexed_version = self.version
+        self._last_result = None
+
+    def _recency(self, fact, now):
+        path = fact.path
+        changed_at = None
+        while path:
+            if path in self._recent_changes:
+                changed_at = max(changed_at or 0, self._recent_changes[path])
+            path = path.rpartition('.')[0]
+        if changed_at is None:
+            return 0.0
+        return math.pow(0.5, (now - changed_at) / RECENCY_HALF_LIFE)
+
+    def score_facts(self, query):
+        """
+        Score indexed facts against a request
+
+        Returns:
+            List of (score, fact) for facts with a positive score, best first
+        """
+        query_tokens = tokenize(query)
+        total = len(self._facts) or 1
+        now = time.time()
+        scored = []
+        for position, fact in enumerate(self._facts):
+            relevance = 0.0
+            for token in query_tokens & fact.tokens:
+                idf = math.log(1 + total / self._document_frequency.get(token, 1))
+                relevance += idf * (PATH_MATCH_WEIGHT if token in fact.path_tokens else 1.0)
+            score = relevance + RECENCY_WEIGHT * self._recency(fact, now)
+            if fact.path in CORE_PATHS:
+                score += 1.0
+            if score > 0:
+                scored.append((score, position, fact))
+        # Ties go to facts further down, which for list items are the most recent ones
+        scored.sort(key=lambda item: (item[0], item[1]), reverse=True)
+        return [(score, fact) for score, position, fact in scored]
+
+    def assemble(self, query, memory, token_budget=None):
+        """
+        Render the facts most relevant to a request within the token budget
+
+        Args:
+            query: The user's request
+            memory: User memory dictionary
+            token_budget: Override the default budget
+
+        Returns:
+            Memory context text (one "- path: value" line per fact), possibly empty
+        """
+        if not memory:
+            return ""
+        self._ensure_index(memory)
+        budget = token_budget or self.token_budget
+
+        key = (query, budget, self._indexed_version)
+        if self._last_result and self._last_result[0] == key:
+            return self._last_result[1]
+
+        lines = []
+        used = 0
+        for score, fact in self.score_facts(query):
+            if used + fact.cost > budget:
+                continue  # A shorter fact further down may still fit
+            lines.append(fact.text)
+            used += fact.cost
+            if budget - used < 8:
+                break
+        context = ''.join(lines)
+        self._last_result = (key, context)
+        return context
@@ -0,0 +1,199 @@
+import re
+import time
+import datetime
+import threading
+
+RECENT_TURNS = 6           # Turns passed verbatim to prompts
+SUMMARY_BATCH = 4          # Older turns collected before the summary is updated
+MAX_STORED_TURNS = 40      # Unsummarized turns kept in memory.json at most
+MAX_SUMMARY_CHARS = 1500
+SUMMARY_WORD_LIMIT = 150
+IDLE_DELAY = 3.0           # Seconds without activity before summarizing
+MAX_TURN_CHARS = 600       # Turns are cut to this length when shown to the summarizer
+
+
+def extractive_summary(previous_summary, turns):
+    """
+    Summarize turns without a model: the first sentence of each turn appended
+    to the previous summary, keeping the most recent MAX_SUMMARY_CHARS
+    """
+    lines = [previous_summary] if previous_summary else []
+    for turn in turns:
+        content = ' '.join(str(turn.get('content', '')).split())
+        first_sentence = re.split(r'(?<=[.!?])\s', content, maxsplit=1)[0][:160]
+        if first_sentence:
+            lines.append(f"{turn.get('role', 'user').capitalize()}: {first_sentence}")
+    summary = '\n'.join(lines)
+    if len(summary) > MAX_SUMMARY_CHARS:
+        summary = summary[-MAX_SUMMARY_CHARS:]
+        summary = summary[summary.find('\n') + 1:] if '\n' in summary else summary
+    return summary
+
+
+class ConversationHistory:
+    """
+    Conversation turns with a rolling summary of older turns.
+
+    Prompts get the summary plus the last few turns verbatim, so their size
+    stays bounded however long the session runs. Folding older turns into
+    the summary happens on a background thread once the user has been idle
+    for a moment, never while a request is being handled. The summary and
+    the unsummarized turns are kept in assistant_memory, so they survive
+    restarts; they are saved by the same thread in idle time (and on
+    close), one memory save for all turns since the last one.
+    """
+
+    def __init__(self, summarizer=None, recent_turns=RECENT_TURNS):
+        """
+        Args:
+            summarizer: Function (previous_summary, turns) -> new summary, e.g. an LLM call.
+                        Falls back to extractive_summary if missing or failing.
+            recent_turns: Number of turns kept verbatim for prompts
+        """
+        self.summarizer = summarizer
+        self.recent_turns = recent_turns
+        self.summary = ""
+        self.summarized_turns = 0
+        self.turns = []
+        self.memory_manager = None
+
+        self._lock = threading.RLock()
+        self._unsaved = False
+        self._busy = False
+        self._last_activity = time.monotonic()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._summarize_loop, name="conversation-summary", daemon=True)
+        self._thread.start()
+
+    def attach(self, memory_manager):
+        """Load the summary and recent turns from assistant_memory and keep them there"""
+        self.memory_manager = memory_manager
+        assistant_memory = memory_manager.get_user_memory().get('assistant_memory', {})
+        summary = assistant_memory.get('conversation_summary') or {}
+        with self._lock:
+            self.summary = summary.get('text', '')
+            self.summarized_turns = summary.get('turns_covered', 0)
+            self.turns = [turn for turn in assistant_memory.get('conversation_history', []) if isinstance(turn, dict)]
+        self._wakeup.set()
+
+    def add_turn(self, role, content, **extra):
+        """Record a turn; it is saved with the next flush"""
+        turn = dict(extra, role=role, content=content, timestamp=datetime.datetime.now().isoformat())
+        with self._lock:
+            self.turns.append(turn)
+            self._last_activity = time.monotonic()
+            self._unsaved = True
+        self._wakeup.set()
+        return turn
+
+    def set_busy(self, busy):
+        """Mark a request as in progress; summarizing and saving wait until it is done"""
+        with self._lock:
+            self._busy = busy
+            self._last_activity = time.monotonic()
+        if not busy:
+            self._wakeup.set()
+
+    def get_recent(self, count=None):
+        """The last turns, verbatim"""
+        with self._lock:
+            return list(self.turns[-(count or self.recent_turns):])
+
+    def get_summary(self):
+        return self.summary
+
+    def last_user_turn(self):
+        with self._lock:
+            for turn in reversed(self.turns):
+                if turn.get('role') == 'user':
+                    return turn
+        return None
+
+    def format_for_prompt(self, count=None):
+        """
+        Render the summary and recent turns for a prompt
+
+        Returns:
+            (summary_text, recent_text): Either may be empty
+        """
+        recent = ''.join(
+            f"{'User' if turn.get('role') == 'user' else 'Assistant'}: {turn.get('content', '')}\n"
+            for turn in self.get_recent(count)
+        )
+        return self.summary, recent
+
+    def _pending(self):
+        """Turns older than the verbatim window that are not in the summary yet"""
+        return self.turns[:max(0, len(self.turns) - self.recent_turns)]
+
+    def flush(self):
+        """Save the summary and turns to assistant_memory if they changed since the last save"""
+        with self._lock:
+            if self._unsaved:
+                self._persist()
+
+    def _persist(self):
+        if self.memory_manager is None:
+            return
+        self._unsaved = False
+        turns = self.turns[-MAX_STORED_TURNS:]
+        self.memory_manager.update_user_memory({
+            'assistant_memory': {
+                'conversation_history': turns,
+                'conversation_summary': {
+                    'text': self.summary,
+                    'turns_covered': self.summarized_turns,
+                    'updated_at': datetime.datetime.now().isoformat()
+                }
+            }
+        })
+
+    def _summarize_loop(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(IDLE_DELAY)
+            self._wakeup.clear()
+            if self._stop.is_set():
+                break
+            with self._lock:
+                if self._busy or time.monotonic() - self._last_activity < IDLE_DELAY:
+                    continue
+                pending = self._pending()
+            if len(pending) >= SUMMARY_BATCH:
+                self.summarize(pending)
+            self.flush()
+
+    def summarize(self, turns=None):
+        """Fold turns (default: all pending ones) into the rolling summary"""
+        with self._lock:
+            turns = turns if turns is not None else self._pending()
+            previous = self.summary
+        if not turns:
+            return self.summary
+
+        clipped = [dict(turn, content=str(turn.get('content', ''))[:MAX_TURN_CHARS]) for turn in turns]
+        summary = None
+        if self.summarizer is not None:
+            try:
+                summary = self.summarizer(previous, clipped)
+            except Exception as e:
+                print(f"Error summarizing conversation, using extractive summary: {e}")
+        if not summary or not summary.strip():
+            summary = extractive_summary(previous, clipped)
+        summary = summary.strip()[:MAX_SUMMARY_CHARS]
+
+        with self._lock:
+            # New turns may have arrived meanwhile: drop only the ones summarized
+            for turn in turns:
+                if turn in self.turns:
+                    self.turns.remove(turn)
+            self.summary = summary
+            self.summarized_turns += len(turns)
+            self._persist()
+        return summary
+
+    def close(self):
+        """Stop the summary thread and save what is not saved yet"""
+        self._stop.set()
+        self._wakeup.set()
+        self.flush()
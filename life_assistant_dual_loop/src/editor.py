@@ -1,12 +1,22 @@
 import os
 from .utils import read_file, write_file
+from .task_store import TaskStore, task_store_path
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DEFAULT_TASKS_FILE = os.path.join(BASE_DIR, 'data-backend', 'tasks.md')
 
 class Editor:
     def __init__(self):
-        pass
+        self._task_stores = {}
+
+    def get_task_store(self, file_path=None):
+        """Get the task store behind a markdown task file (one store per file)"""
+        if file_path is None:
+            file_path = DEFAULT_TASKS_FILE
+        file_path = os.path.abspath(file_path)
+        if file_path not in self._task_stores:
+            self._task_stores[file_path] = TaskStore(task_store_path(file_path), file_path)
+        return self._task_stores[file_path]
 
     def apply_edit(self, file_path, new_content):
         # Ensure directory exists before writing file
@@ -29,31 +39,12 @@ class Editor:
         
     def add_task(self, file_path=None, task=None):
         """Add a task to the tasks file"""
-        if file_path is None:
-            file_path = DEFAULT_TASKS_FILE
-        tasks = self.read_markdown(file_path)
-        if not tasks.strip():
-            tasks = "# Tasks\n\n"
-        # Add the task if it doesn't already exist
-        if f"- [ ] {task}" not in tasks:
-            if not tasks.endswith("\n\n"):
-                if tasks.endswith("\n"):
-                    tasks += "\n"
-                else:
-                    tasks += "\n\n"
-            tasks += f"- [ ] {task}\n"
-            write_file(file_path, tasks)
+        _, created = self.get_task_store(file_path).add(task)
+        return created
             
     def complete_task(self, file_path=None, task=None):
         """Mark a task as completed"""
-        if file_path is None:
-            file_path = DEFAULT_TASKS_FILE
-        tasks = self.read_markdown(file_path)
-        if f"- [ ] {task}" in tasks:
-            tasks = tasks.replace(f"- [ ] {task}", f"- [x] {task}")
-            write_file(file_path, tasks)
-            return True
-        return False
+        return self.get_task_store(file_path).complete(task) is not None
 
     def add_cron_job(self, file_path, schedule, task):
         """Add a scheduled job to the cron file"""
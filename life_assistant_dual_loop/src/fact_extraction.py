@@ -0,0 +1,297 @@
+import re
+import time
+import uuid
+import datetime
+import threading
+
+from memory_paths import KEY_ALIASES
+
+MONTHS = ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec')
+_MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?"
+DATE = (
+    r"(?:\d{4}-\d{1,2}-\d{1,2}"
+    r"|\d{1,2}/\d{1,2}/\d{2,4}"
+    rf"|{_MONTH}\s+\d{{1,2}}(?:st|nd|rd|th)?(?:,?\s+\d{{4}})?"
+    rf"|\d{{1,2}}(?:st|nd|rd|th)?\s+(?:of\s+)?{_MONTH}(?:,?\s+\d{{4}})?)"
+)
+_I_AM = r"i\s*(?:am|'m)\s+"
+_NAME = r"(?-i:[A-Z][a-z'-]+(?:\s+[A-Z][a-z'-]+){0,3})"
+# Capitalized words after "call me" that are not names ("Call me Monday about the report")
+_NOT_A_NAME = (r"(?!(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday|today|tomorrow|tonight"
+               r"|january|february|march|april|may|june|july|august|september|october|november|december)\b)")
+_SENTENCE_START = r"(?:^|(?<=[.!?\n]))\s*"
+_AMOUNT = r"(?:[$€£]\s?\d+(?:[.,]\d{1,2})?|\d+(?:[.,]\d{1,2})?\s*(?:dollars|usd|euros?|eur|gbp)\b)"
+_HEIGHT = (r"\d+(?:\.\d+)?\s*(?:cm|centimet(?:er|re)s?|m|met(?:er|re)s?|ft|feet|foot|in|inch|inches)\b"
+           r"(?:\s*\d+(?:\.\d+)?\s*(?:in|inch|inches)\b)?")
+# "I am <height>" without "tall": only numbers in an adult's range, so "I am 1 m behind" is no height
+_PLAUSIBLE_HEIGHT = (r"(?:1[2-9]\d|2[0-2]\d)\s*(?:cm|centimet)|[12][.,]\d{1,2}\s*(?:m\b|met)"
+                     r"|[4-7]\s*(?:ft\b|feet|foot)")
+_WEIGHT = r"\d+(?:\.\d+)?\s*(?:kg|kgs|kilos?|kilograms?|lbs?|pounds|stone|st)\b"
+_PHONE = r"(?:\+\d{1,3}[\s.-]?)?(?:\(\d{2,4}\)[\s.-]?)?\d{2,4}[\s.-]?\d{3,4}[\s.-]?\d{3,4}\b"
+_EMAIL = r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+"
+
+
+def _update_memory_value(*keys):
+    """The value of an update_memory directive on one of keys, as it appears in the directives' JSON"""
+    return (r"['\"]key['\"]\s*:\s*['\"](?:" + '|'.join(re.escape(key) for key in keys) + r")['\"]\s*,\s*"
+            r"['\"]value['\"]\s*:\s*\[?\s*['\"]?")
+
+
+# (name, pattern, memory path, kind); the pattern's value is the group named <name>_v.
+# Free text only counts what the user says about themselves ("my email is",
+# "I am 180 cm tall"), so details of other people ("my brother's email") are
+# left to the planner.
+DEFAULT_PATTERNS = [
+    ('height',
+     r"(?:my\s+height\s+is\s*(?:about\s+|around\s+)?"
+     r"|" + _I_AM + r"(?=[^.\n]{0,25}\btall\b|" + _PLAUSIBLE_HEIGHT + r"))"
+     r"(?P<height_v>" + _HEIGHT + r")",
+     KEY_ALIASES['height'], 'text'),
+    ('weight',
+     r"(?:my\s+weight\s+is\s*|i\s+weigh\s+(?:about\s+|around\s+)?"
+     r"|" + _I_AM + r"(?=\d+(?:\.\d+)?\s*(?:kg|kgs|kilos?|kilograms?|lbs?|pounds)\b))"
+     r"(?P<weight_v>" + _WEIGHT + r")",
+     KEY_ALIASES['weight'], 'text'),
+    ('age',
+     r"(?:" + _I_AM + r"(?P<age_v>\d{1,3})\s*(?:years?|yrs?)\s+old)",
+     KEY_ALIASES['age'], 'int'),
+    ('birthday',
+     r"(?:my\s+(?:birthday|date\s+of\s+birth)\s*(?:is|:)|i\s+was\s+born)"
+     r"\s*(?:on\s+)?(?P<birthday_v>" + DATE + r")",
+     KEY_ALIASES['birthday'], 'date'),
+    ('phone',
+     r"(?:my\s+(?:phone|mobile|cell)(?:\s+number)?\s+is|call\s+me\s+(?:at|on))"
+     r"\s*(?P<phone_v>" + _PHONE + r")",
+     KEY_ALIASES['phone'], 'list'),
+    ('email',
+     r"(?:my\s+e-?mail(?:\s+address)?\s+is|reach\s+me\s+at)"
+     r"\s*(?P<email_v>" + _EMAIL + r")",
+     KEY_ALIASES['email'], 'list'),
+    ('name',
+     r"(?:my\s+name\s+is|" + _SENTENCE_START + r"call\s+me|" + _I_AM + r"called)"
+     r"\s*" + _NOT_A_NAME + r"(?P<name_v>" + _NAME + r")",
+     KEY_ALIASES['name'], 'text'),
+    ('amount',
+     r"i\s+(?:spent|paid|bought\s+[^.\n]{1,40}?\s+for)\s+(?P<amount_v>" + _AMOUNT + r")"
+     r"(?:\s+(?:on|for)\s+(?P<amount_note>[^.,;!?\n]{1,40}))?",
+     'finance_and_banking.transactions', 'transaction'),
+    ('date',
+     r"my\s+(?P<date_title>[a-z][a-z' ]{1,30}?)\s+is\s+(?:on\s+)?(?P<date_v>" + DATE + r")",
+     'calendar_and_events.events', 'event'),
+]
+
+# Used on the directives when the user's words were not sent: only update_memory
+# directives on the user's own profile keys, never values inside other actions
+# (a contact's name or phone number)
+DIRECTIVE_PATTERNS = [
+    ('height', _update_memory_value('height', KEY_ALIASES['height']) + r"(?P<height_v>" + _HEIGHT + r")",
+     KEY_ALIASES['height'], 'text'),
+    ('weight', _update_memory_value('weight', KEY_ALIASES['weight']) + r"(?P<weight_v>" + _WEIGHT + r")",
+     KEY_ALIASES['weight'], 'text'),
+    ('birthday', _update_memory_value('birthday', KEY_ALIASES['birthday']) + r"(?P<birthday_v>" + DATE + r")",
+     KEY_ALIASES['birthday'], 'date'),
+    ('phone', _update_memory_value('phone', KEY_ALIASES['phone']) + r"(?P<phone_v>" + _PHONE + r")",
+     KEY_ALIASES['phone'], 'list'),
+    ('email', _update_memory_value('email', KEY_ALIASES['email']) + r"(?P<email_v>" + _EMAIL + r")",
+     KEY_ALIASES['email'], 'list'),
+    ('name', _update_memory_value('name', 'full_name', KEY_ALIASES['name']) + r"(?P<name_v>" + _NAME + r")",
+     KEY_ALIASES['name'], 'text'),
+]
+
+
+def normalize_date(text):
+    """
+    An ISO date (YYYY-MM-DD), or MM-DD for a date without a year
+
+    Returns:
+        The normalized date, or the text as it was if it cannot be read
+    """
+    value = re.sub(r"(\d)(?:st|nd|rd|th)\b", r"\1", text.strip().lower()).replace(',', ' ').replace('.', ' ')
+    value = re.sub(r"\bof\b", ' ', value)
+    parts = value.split()
+    for fmt in ('%Y-%m-%d', '%m/%d/%Y', '%m/%d/%y'):
+        try:
+            return datetime.datetime.strptime(value.strip(), fmt).date().isoformat()
+        except ValueError:
+            pass
+    month = day = year = None
+    for part in parts:
+        if part[:3] in MONTHS and month is None:
+            month = MONTHS.index(part[:3]) + 1
+        elif part.isdigit() and len(part) == 4:
+            year = int(part)
+        elif part.isdigit() and day is None:
+            day = int(part)
+    try:
+        if month and day and year:
+            return datetime.date(year, month, day).isoformat()
+        if month and day:
+            datetime.date(2000, month, day)  # Valid in a leap year
+            return f"{month:02d}-{day:02d}"
+    except ValueError:
+        pass
+    return text.strip()
+
+
+def parse_amount(text):
+    """(amount, currency) of a money amount such as '$12.50' or '30 euros'"""
+    currency = 'USD'
+    lowered = text.lower()
+    if '€' in text or 'eur' in lowered:
+        currency = 'EUR'
+    elif '£' in text or 'gbp' in lowered:
+        currency = 'GBP'
+    number = re.search(r"\d+(?:[.,]\d{1,2})?", text).group(0).replace(',', '.')
+    return float(number), currency
+
+
+def same_amount(record, value):
+    """True if a list item (e.g. a planned append_to_list value) has the amount of a captured record"""
+    amount = value.get('amount') if isinstance(value, dict) else None
+    if isinstance(amount, str):
+        try:
+            amount, _ = parse_amount(amount)
+        except AttributeError:
+            return False
+    if isinstance(amount, bool) or not isinstance(amount, (int, float)):
+        return False
+    return abs(float(amount) - record.get('amount', 0)) < 0.005
+
+
+class FactExtractor:
+    """
+    Captures facts the user states about themselves without a model call.
+
+    The registered extractors are compiled into one alternation of named
+    groups per source (the user's words, or the directives' JSON), so a text
+    is scanned once whatever the number of extractors; each match is mapped
+    to its canonical memory path and turned into one user memory update.
+    """
+
+    def __init__(self, patterns=None, directive_patterns=None):
+        self._lock = threading.Lock()
+        self.extractors = {}
+        self._patterns = {'text': {}, 'directives': {}}
+        self.patterns = {}
+        self.runs = 0
+        self.total_ms = 0.0
+        self.matches = {}
+        for name, pattern, path, kind in (patterns or DEFAULT_PATTERNS):
+            self.register(name, pattern, path, kind)
+        for name, pattern, path, kind in (directive_patterns or DIRECTIVE_PATTERNS):
+            self.register(name, pattern, path, kind, source='directives')
+
+    def register(self, name, pattern, path, kind='text', source='text'):
+        """
+        Add an extractor and recompile the combined pattern of its source
+
+        Args:
+            name: Extractor name; the pattern captures its value in the group <name>_v
+            pattern: Regular expression (matched case-insensitively)
+            path: Memory path the value is stored at
+            kind: 'text', 'int', 'date', 'list' (value added to a list), or
+                  'transaction'/'event' (a record added to a list)
+            source: 'text' (the user's words) or 'directives' (their JSON)
+        """
+        with self._lock:
+            self.extractors[name] = (path, kind)
+            self.matches.setdefault(name, 0)
+            self._patterns[source][name] = pattern
+            combined = '|'.join(f"(?P<{key}>{value})" for key, value in self._patterns[source].items())
+            self.patterns[source] = re.compile(combined, re.IGNORECASE)
+
+    def _value(self, name, kind, match):
+        raw = match.group(f"{name}_v").strip()
+        if kind == 'int':
+            return int(raw)
+        if kind == 'date':
+            return normalize_date(raw)
+        if kind == 'transaction':
+            amount, currency = parse_amount(raw)
+            note = match.group(f"{name}_note")
+            # Its own id: the same purchase stated twice is two transactions
+            return {
+                "id": uuid.uuid4().hex[:12],
+                "amount": amount,
+                "currency": currency,
+                "description": note.strip() if note else "",
+                "date": datetime.date.today().isoformat(),
+                "timestamp": datetime.datetime.now().isoformat(timespec='seconds'),
+                "source": "statement"
+            }
+        if kind == 'event':
+            return {"title": match.group(f"{name}_title").strip(), "date": normalize_date(raw)}
+        return re.sub(r"\s+", " ", raw)
+
+    def extract(self, text, source='text'):
+        """
+        Facts stated in a text
+
+        Args:
+            source: 'text' for the user's words, 'directives' for directives' JSON
+
+        Returns:
+            List of (extractor name, memory path, kind, value) in text order
+        """
+        started = time.perf_counter()
+        facts = []
+        pattern = self.patterns.get(source)
+        for match in pattern.finditer(str(text)) if pattern else ():
+            name = match.lastgroup
+            path, kind = self.extractors[name]
+            try:
+                facts.append((name, path, kind, self._value(name, kind, match)))
+            except (ValueError, AttributeError):
+                continue
+        with self._lock:
+            self.runs += 1
+            self.total_ms += (time.perf_counter() - started) * 1000
+            for name, _, _, _ in facts:
+                self.matches[name] += 1
+        return facts
+
+    @staticmethod
+    def build_update(facts, user_mem):
+        """
+        One user memory update holding all facts
+
+        Values for list paths are added to the list in memory unless already there;
+        for other paths the last value stated wins.
+
+        Returns:
+            Nested dict for update_user_memory, empty if nothing changes
+        """
+        update = {}
+        lists = {}
+        for _, path, kind, value in facts:
+            parts = path.split('.')
+            if kind in ('list', 'transaction', 'event'):
+                if path not in lists:
+                    current = user_mem
+                    for part in parts:
+                        current = current.get(part) if isinstance(current, dict) else None
+                    lists[path] = list(current) if isinstance(current, list) else (
+                        [current] if current not in (None, '', {}) else [])
+                if value in lists[path]:
+                    continue
+                lists[path].append(value)
+                value = lists[path]
+            else:
+                current = user_mem
+                for part in parts:
+                    current = current.get(part) if isinstance(current, dict) else None
+                if current == value:
+                    continue
+            target = update
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = value
+        return update
+
+    def stats(self):
+        with self._lock:
+            return {
+                'runs': self.runs,
+                'avg_ms': round(self.total_ms / self.runs, 3) if self.runs else 0.0,
+                'matches': {name: count for name, count in self.matches.items() if count}
+            }
@@ -0,0 +1,239 @@
+import datetime
+import threading
+
+from timeseries_store import get_timeseries_store, to_epoch
+
+# Transaction types counted as money coming in; everything else is spending
+INCOME_TYPES = {'income', 'credit', 'deposit', 'refund', 'salary'}
+UNCATEGORIZED = 'uncategorized'
+DEFAULT_CURRENCY = 'USD'
+MAX_GROUPS = 366
+
+_rollups = None
+_rollups_lock = threading.Lock()
+
+
+def _category(record):
+    category = record.get('category')
+    return ' '.join(category.casefold().split()) if isinstance(category, str) and category.strip() else UNCATEGORIZED
+
+
+def _next_month(day):
+    return (day.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+
+
+def _as_day(value, default):
+    """The calendar day of a range bound; a bound after midnight counts its whole day"""
+    if value is None:
+        return default
+    if isinstance(value, datetime.datetime):
+        day = value.date()
+        return day + datetime.timedelta(days=1) if value.time() != datetime.time() else day
+    if isinstance(value, datetime.date):
+        return value
+    epoch = to_epoch(value)
+    return datetime.date.fromtimestamp(epoch) if epoch is not None else default
+
+
+class FinanceRollups:
+    """
+    Spending and income totals of the transactions series by day, month and
+    category, kept up to date as transactions are added or removed.
+
+    Every transaction updates a fixed set of buckets (its day, its month and
+    all time, each in total and for its category), so a query sums at most
+    the days at the edges of a range plus its whole months, whatever the
+    number of transactions, and never reads a transaction.
+    """
+
+    def __init__(self, store=None):
+        self._lock = threading.Lock()
+        # (granularity, period, category or None) -> {currency: [spent, income, count]}
+        self.buckets = {}
+        self.categories = set()
+        self.first_day = None
+        self.last_day = None
+        self.store = store or get_timeseries_store('transactions')
+        self.store.add_listener(self._on_change)
+
+    def _on_change(self, change, epoch, record):
+        if not isinstance(record, dict):
+            return
+        amount = record.get('amount')
+        if isinstance(amount, bool) or not isinstance(amount, (int, float)):
+            return
+        sign = 1 if change == 'add' else -1
+        day = datetime.date.fromtimestamp(epoch)
+        category = _category(record)
+        currency = str(record.get('currency') or DEFAULT_CURRENCY).upper()
+        income = str(record.get('type', '')).casefold() in INCOME_TYPES
+        with self._lock:
+            if change == 'add':
+                self.categories.add(category)
+                self.first_day = min(self.first_day or day, day)
+                self.last_day = max(self.last_day or day, day)
+            for key in (('day', day.isoformat()), ('month', day.isoformat()[:7]), ('all', '')):
+                for bucket_category in (None, category):
+                    bucket = self.buckets.setdefault(key + (bucket_category,), {})
+                    totals = bucket.setdefault(currency, [0.0, 0.0, 0])
+                    totals[1 if income else 0] += sign * amount
+                    totals[2] += sign
+                    if totals[2] <= 0:
+                        del bucket[currency]
+                        if not bucket:
+                            del self.buckets[key + (bucket_category,)]
+
+    def _keys(self, start, end):
+        """Bucket keys covering the days start <= day < end: whole months as month buckets"""
+        if start is None and end is None:
+            return [('all', '')]
+        if self.first_day is None:
+            return []
+        day = max(_as_day(start, self.first_day), self.first_day)
+        end = min(_as_day(end, self.last_day + datetime.timedelta(days=1)), self.last_day + datetime.timedelta(days=1))
+        keys = []
+        while day < end:
+            if day.day == 1 and _next_month(day) <= end:
+                keys.append(('month', day.isoformat()[:7]))
+                day = _next_month(day)
+            else:
+                keys.append(('day', day.isoformat()))
+                day += datetime.timedelta(days=1)
+        return keys
+
+    def _sum(self, keys, category):
+        result = {}
+        for key in keys:
+            for currency, (spent, income, count) in self.buckets.get(key + (category,), {}).items():
+                totals = result.setdefault(currency, {"spent": 0.0, "income": 0.0, "count": 0})
+                totals["spent"] += spent
+                totals["income"] += income
+                totals["count"] += count
+        for totals in result.values():
+            totals["spent"] = round(totals["spent"], 2)
+            totals["income"] = round(totals["income"], 2)
+        return result
+
+    def totals(self, start=None, end=None, category=None):
+        """
+        Spending and income between start and end (all time if neither is given)
+
+        Args:
+            category: Only transactions of this category
+
+        Returns:
+            {currency: {"spent", "income", "count"}}
+        """
+        self.store.refresh()
+        category = _category({'category': category}) if category else None
+        with self._lock:
+            return self._sum(self._keys(start, end), category)
+
+    def breakdown(self, group_by, start=None, end=None, category=None):
+        """
+        Totals between start and end per category, month or day
+
+        Returns:
+            {category: totals} for 'category', else [{"period", "totals"}] in time order
+        """
+        self.store.refresh()
+        category = _category({'category': category}) if category else None
+        with self._lock:
+            keys = self._keys(start, end)
+            if group_by == 'category':
+                result = {name: self._sum(keys, name) for name in sorted(self.categories)}
+                return {name: totals for name, totals in result.items() if totals}
+            if group_by not in ('month', 'day'):
+                raise ValueError(f"Cannot group by {group_by}")
+            if self.first_day is None:
+                return []
+            day = max(_as_day(start, self.first_day), self.first_day)
+            end = min(_as_day(end, self.last_day + datetime.timedelta(days=1)), self.last_day + datetime.timedelta(days=1))
+            groups = []
+            while day < end and len(groups) < MAX_GROUPS:
+                period_end = min(_next_month(day), end) if group_by == 'month' else day + datetime.timedelta(days=1)
+                totals = self._sum(self._keys(day, period_end), category)
+                if totals:
+                    groups.append({"period": day.isoformat()[:7] if group_by == 'month' else day.isoformat(), "totals": totals})
+                day = period_end
+            return groups
+
+    def stats(self):
+        with self._lock:
+            return {
+                'buckets': len(self.buckets),
+                'categories': len(self.categories),
+                'first_day': self.first_day.isoformat() if self.first_day else None,
+                'last_day': self.last_day.isoformat() if self.last_day else None
+            }
+
+
+def budget_limits(budgets):
+    """
+    Budgets from user memory (finance_and_banking.budgets)
+
+    Accepts {category: limit} or {category: {"limit"/"amount"/"monthly": limit,
+    "period": "monthly"|"weekly"|"yearly", "currency": ...}}.
+
+    Returns:
+        {category: (limit, period, currency)}
+    """
+    limits = {}
+    for category, budget in (budgets or {}).items():
+        period, currency = 'monthly', None
+        if isinstance(budget, dict):
+            limit = next((budget[field] for field in ('limit', 'amount', 'monthly', 'budget') if field in budget), None)
+            period = str(budget.get('period', period)).casefold()
+            currency = budget.get('currency')
+        else:
+            limit = budget
+        try:
+            limit = float(str(limit).replace('$', '').replace(',', ''))
+        except (TypeError, ValueError):
+            continue
+        limits[_category({'category': category})] = (limit, period, currency)
+    return limits
+
+
+def budget_status(rollups, budgets, category=None, today=None):
+    """
+    Spending against each budget in its current period
+
+    Returns:
+        List of {"category", "period", "limit", "currency", "spent", "remaining"}
+    """
+    today = today or datetime.date.today()
+    starts = {
+        'weekly': today - datetime.timedelta(days=today.weekday()),
+        'monthly': today.replace(day=1),
+        'yearly': today.replace(month=1, day=1)
+    }
+    wanted = _category({'category': category}) if category else None
+    status = []
+    for name, (limit, period, currency) in budget_limits(budgets).items():
+        if wanted and name != wanted:
+            continue
+        start = starts.get(period, starts['monthly'])
+        totals = rollups.totals(start, today + datetime.timedelta(days=1), name)
+        if currency is None:
+            # The currency spent in, if there is only one
+            currency = next(iter(totals)) if len(totals) == 1 else DEFAULT_CURRENCY
+        spent = totals.get(str(currency).upper(), {}).get("spent", 0.0)
+        status.append({
+            "category": name,
+            "period": period if period in starts else 'monthly',
+            "limit": limit,
+            "currency": currency,
+            "spent": spent,
+            "remaining": round(limit - spent, 2)
+        })
+    return status
+
+
+def get_finance_rollups():
+    """Shared FinanceRollups over the transactions series, built on first use"""
+    global _rollups
+    with _rollups_lock:
+        if _rollups is None:
+            _rollups = FinanceRollups()
+        return _rollups
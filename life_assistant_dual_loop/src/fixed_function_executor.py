@@ -3,10 +3,26 @@ import json
 import datetime
 import time
 from .functions import FUNCTIONS
+from .interaction_store import get_interaction_store, parse_period
+from .memory_paths import KEY_ALIASES, retrieval_section, read_memory
+from .memory_collections import MemoryCollections
+from .timeseries_store import SERIES, get_timeseries_store, series_for_path
+from .finance_rollups import get_finance_rollups, budget_status
+from .retention import RETENTION_RULES, search_archive
 
 class FunctionExecutor:
     def __init__(self):
-        pass
+        self.collections = None
+    
+    def _collections(self, memory_manager):
+        """Indexes of the list paths in user memory, built once per memory manager"""
+        if self.collections is None or self.collections.memory_manager is not memory_manager:
+            self.collections = MemoryCollections(memory_manager)
+        return self.collections
+    
+    def batch(self, memory_manager):
+        """Context in which list changes of several actions are saved once, at its end"""
+        return self._collections(memory_manager).batch()
         
     def execute(self, action, editor, memory_manager):
         """Execute a user action with appropriate function"""
@@ -28,34 +44,36 @@ class FunctionExecutor:
             task = args['task']
             file_path = self._resolve_path(args.get('file', 'src/tasks.md'))
             
-            # Read current tasks
-            tasks = editor.read_markdown(file_path)
-            if '# Tasks' not in tasks:
-                tasks = "# Tasks\n\n"
-                
-            # Add task if it doesn't exist
-            if f"- [ ] {task}" not in tasks:
-                tasks += f"- [ ] {task}\n"
-                editor.apply_edit(file_path, tasks)
-                
+            # Add task unless an equivalent one already exists; a completed one is reopened
+            task_store = editor.get_task_store(file_path)
+            existing = task_store.find(task)
+            entry, created = task_store.add(task, priority=args.get('priority', 'medium'))
+            reopened = existing is not None and existing['status'] == 'completed'
+            if created or reopened:
                 # Update memory with new structure
                 user_mem = memory_manager.get_user_memory()
-                work_tasks = user_mem.get('work_and_projects', {}).get('tasks', [])
-                if task not in work_tasks:
-                    work_tasks.append(task)
-                    user_mem.setdefault('work_and_projects', {})['tasks'] = work_tasks
-                    memory_manager.update_user_memory(user_mem)
-                
-            return f"Added task: {task}"
+                work = user_mem.setdefault('work_and_projects', {})
+                work_tasks = work.get('tasks', [])
+                if entry['text'] not in work_tasks:
+                    work_tasks.append(entry['text'])
+                    work['tasks'] = work_tasks
+                if entry['text'] in work.get('completed_tasks', []):
+                    work['completed_tasks'].remove(entry['text'])
+                memory_manager.update_user_memory(user_mem)
+            
+            if created:
+                return f"Added task: {task}"
+            if reopened:
+                return f"Reopened completed task: {entry['text']}"
+            return f"Task already pending: {entry['text']}"
         
         elif action_type == 'complete_task':
             task = args['task']
             file_path = self._resolve_path(args.get('file', 'src/tasks.md'))
             
-            tasks = editor.read_markdown(file_path)
-            if f"- [ ] {task}" in tasks:
-                tasks = tasks.replace(f"- [ ] {task}", f"- [x] {task}")
-                editor.apply_edit(file_path, tasks)
+            completed = editor.get_task_store(file_path).complete(task)
+            if completed:
+                task = completed['text']
                 
                 # Update user memory with new structure
                 user_mem = memory_manager.get_user_memory()
@@ -71,7 +89,7 @@ class FunctionExecutor:
             
         elif action_type == 'list_tasks':
             file_path = self._resolve_path(args.get('file', 'src/tasks.md'))
-            tasks = editor.read_markdown(file_path)
+            tasks = editor.get_task_store(file_path).render_markdown()
             return {"tasks": tasks}
             
         elif action_type == 'remember':
@@ -106,20 +124,9 @@ class FunctionExecutor:
                     print(f"DEBUG: Updated memory path {key} to {value}")
                 else:
                     # Map simple keys to new memory structure
-                    key_mappings = {
-                        'name': 'personal_info.profile.full_name',
-                        'full_name': 'personal_info.profile.full_name',
-                        'age': 'personal_info.profile.age',
-                        'height': 'personal_info.appearance.height',
-                        'weight': 'personal_info.appearance.weight',
-                        'phone': 'personal_info.contact.phone_numbers',
-                        'email': 'personal_info.contact.email_addresses',
-                        'address': 'personal_info.contact.mailing_address',
-                        'birthday': 'personal_info.profile.date_of_birth'
-                    }
-                    if key in key_mappings:
+                    if key in KEY_ALIASES:
                         # Use the mapped path
-                        mapped_path = key_mappings[key]
+                        mapped_path = KEY_ALIASES[key]
                         print(f"DEBUG: Mapped '{key}' to '{mapped_path}'")
                         parts = mapped_path.split('.')
                         curr = user_mem
@@ -154,19 +161,25 @@ class FunctionExecutor:
             key = args.get('key')
             value = args.get('value')
             if key and value is not None:
-                user_mem = memory_manager.get_user_memory()
-                # Support nested keys like 'personal.friends'
-                parts = key.split('.')
-                curr = user_mem
-                for p in parts[:-1]:
-                    curr = curr.setdefault(p, {})
-                lst = curr.setdefault(parts[-1], [])
-                if value not in lst:
-                    lst.append(value)
-                    memory_manager.update_user_memory(user_mem)
+                series = series_for_path(KEY_ALIASES.get(key, key))
+                if series:
+                    # Append-heavy lists (transactions, mood, activities) live in the time-series store
+                    if not get_timeseries_store(series).append(value):
+                        return f"Value {value} already in {key}"
                     return f"Appended {value} to {key}"
-                else:
+                # Supports nested keys like 'personal.friends'; an item with the key of
+                # an existing one (e.g. a contact's name) updates it
+                collections = self._collections(memory_manager)
+                collection = collections.get(key, create=True)
+                if collection is None:
+                    return f"Error: {key} is not a list"
+                outcome = collection.add(value)
+                if outcome == 'exists':
                     return f"Value {value} already in {key}"
+                collections.save()
+                if outcome == 'updated':
+                    return f"Updated {value} in {key}"
+                return f"Appended {value} to {key}"
             return "Error: key and value required for append_to_list"
 
         elif action_type == 'remove_from_list':
@@ -174,15 +187,17 @@ class FunctionExecutor:
             key = args.get('key')
             value = args.get('value')
             if key and value is not None:
-                user_mem = memory_manager.get_user_memory()
-                parts = key.split('.')
-                curr = user_mem
-                for p in parts[:-1]:
-                    curr = curr.setdefault(p, {})
-                lst = curr.setdefault(parts[-1], [])
-                if value in lst:
-                    lst.remove(value)
-                    memory_manager.update_user_memory(user_mem)
+                series = series_for_path(KEY_ALIASES.get(key, key))
+                if series:
+                    if get_timeseries_store(series).remove(value):
+                        return f"Removed {value} from {key}"
+                    return f"Value {value} not found in {key}"
+                # The value, or the item with its key ("John" removes the contact named John)
+                collections = self._collections(memory_manager)
+                collection = collections.get(key)
+                removed = collection.remove(value) if collection is not None else None
+                if removed is not None:
+                    collections.save()
                     return f"Removed {value} from {key}"
                 else:
                     return f"Value {value} not found in {key}"
@@ -206,183 +221,121 @@ class FunctionExecutor:
         elif action_type == 'retrieve_data':
             # Retrieve specific data from memory or tasks
             data_type = args.get('data_type', 'memory')
-            section = args.get('section')
-            key = args.get('key')   # Also allow 'key' parameter for backward compatibility
-            path = args.get('path') # New parameter for direct path access
             query = args.get('query')
             
-            # If path is provided, use it (direct dot notation access)
-            if path and not section:
-                section = path
-            
-            # If key is provided but not section, use key as section
-            if key and not section:
-                section = key
-            
-            # Special case handling for common fields that might be requested without full path
-            common_fields = {
-                "name": "personal_info.profile.full_name", 
-                "full_name": "personal_info.profile.full_name",
-                "age": "personal_info.profile.age",
-                "height": "personal_info.appearance.height",
-                "weight": "personal_info.appearance.weight",
-                "phone": "personal_info.contact.phone_numbers",
-                "email": "personal_info.contact.email_addresses",
-                "address": "personal_info.contact.mailing_address",
-                "friends": "social_and_relationships.contacts",
-                "family": "social_and_relationships.family_members",
-                "tasks": "work_and_projects.tasks",
-                "health": "health_and_wellness",
-                "medical": "health_and_wellness.medical_conditions"
-            }
-            
-            if section in common_fields:
-                section = common_fields[section]
-                print(f"DEBUG: Mapped section '{key}' to '{section}'")
-            
             if data_type == 'memory':
-                user_mem = memory_manager.get_user_memory()
-                
-                # Handle direct field access first (no section or with dot notation)
+                section = retrieval_section(args)
                 if section:
                     print(f"DEBUG: Retrieving section '{section}'")
-                    # If section contains dots, it's a nested path
-                    if '.' in section:
-                        parts = section.split('.')
-                        curr = user_mem
-                        found = True
-                        
-                        for p in parts:
-                            if isinstance(curr, dict) and p in curr:
-                                curr = curr[p]
-                            else:
-                                found = False
-                                break
-                        
-                        if found:
-                            return {
-                                "type": "memory_data",
-                                "path": section,
-                                "data": curr
-                            }
-                        else:
-                            print(f"DEBUG: Path '{section}' not found in memory")
-                            return {
-                                "type": "error",
-                                "message": f"Path {section} not found in memory"
-                            }
-                    # Otherwise check top-level sections first
-                    elif section in user_mem:
-                        if key and isinstance(user_mem[section], dict) and key in user_mem[section]:
-                            return {
-                                "type": "memory_data",
-                                "section": section,
-                                "key": key,
-                                "data": user_mem[section][key]
-                            }
-                        else:
-                            return {
-                                "type": "memory_data",
-                                "section": section,
-                                "data": user_mem[section]
-                            }
-                        
-                    else:
-                        # Search through all sections for the key
-                        found_data = []
-                        for sect_name, sect_data in user_mem.items():
-                            if isinstance(sect_data, dict):
-                                # Search recursively in nested structures
-                                def search_nested(data, path=""):
-                                    results = []
-                                    if isinstance(data, dict):
-                                        for k, v in data.items():
-                                            current_path = f"{path}.{k}" if path else k
-                                            if k == section or section.lower() in k.lower():
-                                                results.append((current_path, v))
-                                            if isinstance(v, dict):
-                                                results.extend(search_nested(v, current_path))
-                                    return results
-                                
-                                nested_results = search_nested(sect_data, sect_name)
-                                found_data.extend(nested_results)
-                        
-                        if found_data:
-                            return {
-                                "type": "memory_data",
-                                "section": section,
-                                "data": dict(found_data) if len(found_data) > 1 else found_data[0][1]
-                            }
-                        else:
-                            return {
-                                "type": "error",
-                                "message": f"Section '{section}' not found in memory"
-                            }
-                
-                # Search by query across all sections
-                elif query:
-                    results = {}
-                    query_lower = query.lower()
-                    
-                    def search_recursive(data, path=""):
-                        matches = {}
-                        if isinstance(data, dict):
-                            for key_name, value in data.items():
-                                current_path = f"{path}.{key_name}" if path else key_name
-                                if (query_lower in key_name.lower() or 
-                                    (isinstance(value, str) and query_lower in value.lower())):
-                                    matches[current_path] = value
-                                elif isinstance(value, dict):
-                                    nested_matches = search_recursive(value, current_path)
-                                    matches.update(nested_matches)
-                                elif isinstance(value, list):
-                                    for i, item in enumerate(value):
-                                        if isinstance(item, str) and query_lower in item.lower():
-                                            matches[f"{current_path}[{i}]"] = item
-                        return matches
+                if series_for_path(section) == 'transactions':
+                    # Totals rather than the transactions themselves
+                    return self._read_finance(args, memory_manager)
+                if series_for_path(section):
+                    # The list was moved to the time-series store: its latest entries
+                    return self._read_timeseries(dict(args, series=series_for_path(section)))
+                where = args.get('where')
+                collection = self._collections(memory_manager).get(section) if section and isinstance(where, dict) and len(where) == 1 else None
+                if collection is not None:
+                    # Items of a list by field value, through the list's index
+                    (field, value), = where.items()
+                    return {
+                        "type": "memory_data",
+                        "path": section,
+                        "where": where,
+                        "data": collection.find(field, value)
+                    }
+                result = read_memory(memory_manager.get_user_memory(), args)
+                if result["type"] == "error":
+                    print(f"DEBUG: {result['message']}")
+                return result
                     
-                    all_matches = search_recursive(user_mem)
-                                        
+            elif data_type == 'tasks':
+                # Handle tasks retrieval from the task store
+                file_path = self._resolve_path(args.get('file', 'data-backend/tasks.md'))
+                task_store = editor.get_task_store(file_path)
+                status = args.get('status')
+                
+                # Filter by query if provided
+                if query:
                     return {
-                        "type": "memory_data", 
+                        "type": "tasks_data",
                         "query": query,
-                        "data": all_matches
+                        "data": task_store.render_markdown(task_store.search(query, status=status))
+                    }
+                elif status:
+                    return {
+                        "type": "tasks_data",
+                        "status": status,
+                        "data": task_store.render_markdown(task_store.list(status))
                     }
-                # Return entire memory if no specific section/query
                 else:
                     return {
-                        "type": "memory_data",
-                        "data": user_mem
+                        "type": "tasks_data",
+                        "data": task_store.render_markdown()
                     }
                     
-            elif data_type == 'tasks':
-                # Handle tasks retrieval
-                file_path = self._resolve_path(args.get('file', 'data-backend/tasks.md'))
-                if os.path.exists(file_path):
-                    with open(file_path, 'r') as f:
-                        tasks_content = f.read()
-                    
-                    # Filter by query if provided
-                    if query:
-                        filtered_lines = []
-                        for line in tasks_content.split('\n'):
-                            if query.lower() in line.lower():
-                                filtered_lines.append(line)
+            elif data_type == 'interactions':
+                # Past conversation turns, from the interaction archive's time and text indexes
+                start, end = args.get('start'), args.get('end')
+                period = args.get('period')
+                if period:
+                    period_range = parse_period(period)
+                    if period_range is None:
                         return {
-                            "type": "tasks_data",
-                            "query": query,
-                            "data": '\n'.join(filtered_lines)
+                            "type": "error",
+                            "message": f"Unknown period: {period}"
                         }
-                    else:
+                    start, end = period_range
+                
+                interactions = get_interaction_store().search(query, start=start, end=end, limit=args.get('limit', 20))
+                return {
+                    "type": "interactions_data",
+                    "query": query,
+                    "period": period,
+                    "data": [
+                        {
+                            "time": interaction['started_at'],
+                            "user_input": interaction['user_input'],
+                            "response": (interaction['response'] or '')[:300],
+                            "actions": [action.get('type') for action in interaction['actions'] or [] if isinstance(action, dict)]
+                        }
+                        for interaction in interactions
+                    ]
+                }
+
+            elif data_type == 'timeseries':
+                return self._read_timeseries(args)
+
+            elif data_type == 'finance':
+                return self._read_finance(args, memory_manager)
+
+            elif data_type == 'archive':
+                # History entries moved out of memory by the retention rules
+                path = args.get('path') or args.get('section') or 'execution_history'
+                start, end = args.get('start'), args.get('end')
+                period = args.get('period')
+                if period:
+                    period_range = parse_period(period)
+                    if period_range is None:
                         return {
-                            "type": "tasks_data",
-                            "data": tasks_content
+                            "type": "error",
+                            "message": f"Unknown period: {period}"
                         }
-                else:
+                    start, end = period_range
+                try:
+                    entries = search_archive(path, query, start, end, limit=min(int(args.get('limit', 20)), 50))
+                except ValueError:
                     return {
                         "type": "error",
-                        "message": f"Task file {file_path} not found"
+                        "message": f"No archive for {path}. Archived: {', '.join(rule['path'] for rule in RETENTION_RULES)}"
                     }
+                return {
+                    "type": "archive_data",
+                    "path": path,
+                    "query": query,
+                    "period": period,
+                    "data": entries
+                }
                     
             else:
                 return {
@@ -489,6 +442,111 @@ class FunctionExecutor:
         else:
             return f"Unknown action: {action_type}"
     
+    def _read_timeseries(self, args):
+        """
+        Answer a retrieve_data on a time series
+
+        Args:
+            args: 'series' (or the memory 'path' it replaced); 'start'/'end' or 'period';
+                  'where' ({field: value}); 'field' with 'op' (sum, mean, min, max, count)
+                  for an aggregate, plus 'window' (days) for a rolling aggregate per day;
+                  without a field, the latest 'limit' entries
+
+        Returns:
+            A "timeseries_data" result, or an "error" result
+        """
+        series = args.get('series') or series_for_path(retrieval_section(args) or '')
+        if series not in SERIES:
+            return {
+                "type": "error",
+                "message": f"Unknown time series: {series}. Available: {', '.join(SERIES)}"
+            }
+        start, end = args.get('start'), args.get('end')
+        period = args.get('period')
+        if period:
+            period_range = parse_period(period)
+            if period_range is None:
+                return {
+                    "type": "error",
+                    "message": f"Unknown period: {period}"
+                }
+            start, end = period_range
+        where = args.get('where') if isinstance(args.get('where'), dict) else None
+        field = args.get('field')
+        op = args.get('op', 'sum')
+        store = get_timeseries_store(series)
+        result = {
+            "type": "timeseries_data",
+            "series": series,
+            "period": period,
+            "start": str(start) if start else None,
+            "end": str(end) if end else None,
+            "where": where
+        }
+        try:
+            if field and args.get('window'):
+                result.update(field=field, op=op, window=int(args['window']),
+                              data=store.rolling(field, int(args['window']), op, start, end, where))
+            elif field:
+                result.update(field=field, op=op, count=store.count(start, end, where),
+                              data=store.aggregate(field, op, start, end, where))
+            else:
+                # Latest entries only; totals are read with a field and op (or data_type 'finance')
+                limit = min(int(args.get('limit', 20)), 50)
+                result.update(count=store.count(start, end, where), data=store.entries(start, end, where, limit))
+        except (ValueError, TypeError) as e:
+            return {
+                "type": "error",
+                "message": f"Cannot read {series}: {e}"
+            }
+        return result
+
+    def _read_finance(self, args, memory_manager):
+        """
+        Answer a retrieve_data on spending from the finance rollups
+
+        Args:
+            args: 'period' (default 'this month') or 'start'/'end'; 'category';
+                  'group_by' ('category', 'month' or 'day') for a breakdown
+
+        Returns:
+            A "finance_data" result with totals per currency and the state of the
+            budgets in finance_and_banking.budgets, or an "error" result
+        """
+        start, end = args.get('start'), args.get('end')
+        period = args.get('period') or (None if start or end else 'this month')
+        if period and period != 'all time':
+            period_range = parse_period(period)
+            if period_range is None:
+                return {
+                    "type": "error",
+                    "message": f"Unknown period: {period}"
+                }
+            start, end = period_range
+        category = args.get('category')
+        rollups = get_finance_rollups()
+        result = {
+            "type": "finance_data",
+            "period": period,
+            "start": str(start) if start else None,
+            "end": str(end) if end else None,
+            "category": category
+        }
+        try:
+            result["totals"] = rollups.totals(start, end, category)
+            if args.get('group_by'):
+                result["group_by"] = args['group_by']
+                result["breakdown"] = rollups.breakdown(args['group_by'], start, end, category)
+        except ValueError as e:
+            return {
+                "type": "error",
+                "message": str(e)
+            }
+        budgets = memory_manager.get_user_memory().get('finance_and_banking', {}).get('budgets')
+        if isinstance(budgets, dict) and budgets:
+            result["budgets"] = budget_status(rollups, budgets, category)
+        return result
+
     def _resolve_path(self, file_path):
         """Convert relative paths to absolute paths"""
         if not os.path.isabs(file_path):
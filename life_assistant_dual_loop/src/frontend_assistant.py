@@ -9,6 +9,7 @@ import http.client  # Built-in HTTP client instead of requests
 import urllib.parse
 import platform  # For platform detection
 import threading
+import contextlib
 import uuid
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -23,7 +24,15 @@ if platform.system() != 'Windows':
 
 from user_interaction_model import UserInteractionModel
 from memory_manager import MemoryManager
-from utils import log_change
+from memory_service import connect_memory
+from utils import CHANGE_LOG, log_change
+from log_pipeline import log_event, get_log_pipeline
+from memory_events import BACKEND_EVENTS_PORT, FRONTEND_EVENTS_PORT
+from interaction_store import get_interaction_store
+from request_spool import submit_request
+from memory_paths import KEY_ALIASES, read_memory, retrieval_section
+from response_cache import ResponseCache
+from timeseries_store import series_for_path
 
 # Path definitions
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -43,6 +52,45 @@ TASK_BUFFER_FILE = os.path.join(SRC_DIR, 'task_buffer.json')
 USER_MEMORY = os.path.join(DATA_USER_DIR, 'memory.json')
 INTERACTION_LOG = os.path.join(LOGS_DIR, 'interaction.log')
 
+# Seconds the frontend waits for the backend's response to a request
+BACKEND_TIMEOUT = 60
+
+# Pipeline modes: three model calls (directives, backend planning, reply) or one call for actions and reply
+PIPELINE_STAGED = 'staged'
+PIPELINE_SINGLE = 'single'
+
+# Actions the single-pass pipeline runs in the frontend; others are handed to the backend's queue
+LOCAL_ACTIONS = (
+    'update_memory', 'append_to_list', 'remove_from_list', 'update_nested',
+    'retrieve_data', 'add_task', 'complete_task', 'list_tasks', 'remember'
+)
+
+def memory_read_actions(directives):
+    """
+    The actions of directives that only read user memory
+    
+    Returns:
+        The retrieve_data actions, or None if the directives do anything else
+        (other keys of a directives dict may only hold text, such as an intent)
+    """
+    if isinstance(directives, dict):
+        if any(key != 'actions' and not isinstance(value, str) for key, value in directives.items()):
+            return None
+        actions = directives.get('actions')
+    else:
+        actions = directives
+    if not isinstance(actions, list) or not actions:
+        return None
+    for action in actions:
+        if not isinstance(action, dict) or action.get('type') != 'retrieve_data':
+            return None
+        args = action.get('args', {})
+        if not isinstance(args, dict) or args.get('data_type', 'memory') != 'memory':
+            return None
+        if series_for_path(retrieval_section(args)):
+            return None  # Kept in the backend's time-series store
+    return actions
+
 class Colors:
     HEADER = '\033[95m'
     BLUE = '\033[94m'
@@ -85,8 +133,14 @@ class FrontendAssistant:
     Handles direct user interactions and communicates with backend for task execution.
     """
     
-    def __init__(self):
-        """Initialize the assistant components"""
+    def __init__(self, memory_service=False, pipeline=PIPELINE_STAGED):
+        """Initialize the assistant components
+        
+        Args:
+            memory_service: Use the memory service process instead of the memory file
+            pipeline: PIPELINE_STAGED (frontend, backend and reply models) or
+                      PIPELINE_SINGLE (one model call, actions executed here)
+        """
         print(f"{Colors.HEADER}Initializing Life Assistant Frontend...{Colors.ENDC}")
         
         # Check if Ollama is available
@@ -97,7 +151,20 @@ class FrontendAssistant:
             print(f"{Colors.RED}Warning: Could not connect to Ollama. Make sure it's running: {e}{Colors.ENDC}")
         
         self.user_model = UserInteractionModel()  # Llama3.2 for user interaction
-        self.memory_manager = MemoryManager(USER_MEMORY)  # Only initialize with user memory
+        if memory_service:
+            self.memory_manager = connect_memory(USER_MEMORY)
+        else:
+            self.memory_manager = MemoryManager(USER_MEMORY)  # Only initialize with user memory
+        # Rebuild the prompt context index only when user memory actually changes
+        self.user_model.context_assembler.attach(self.memory_manager)
+        # Restore the conversation summary and recent turns from assistant memory
+        self.user_model.history.attach(self.memory_manager)
+        # Replies to memory lookups, dropped when the memory they were read from changes
+        self.response_cache = ResponseCache()
+        self.response_cache.attach(self.memory_manager)
+        # Pick up the backend's memory changes as they happen instead of serving stale data
+        self.memory_manager.listen_for_events(BACKEND_EVENTS_PORT)
+        self.memory_manager.start_event_broadcaster(FRONTEND_EVENTS_PORT)
         
         # Flag to indicate whether the system is processing a request
         self.processing = False
@@ -107,11 +174,18 @@ class FrontendAssistant:
         # Debug mode flag
         self.debug_mode = False
         
+        # Replies can be displayed from several threads (concurrent mode)
+        self.output_lock = threading.RLock()
+        self._output = threading.local()
+        
         # Request tracking
         self.current_request_id = None
         self.last_response_id = None
         self.waiting_for_response = False
         
+        # Searchable archive of turns; the backend records the actions and results of each one
+        self.interactions = get_interaction_store()
+        
         # Update startup time in system memory
         self.memory_manager.update_system_memory({
             "system": {
@@ -119,8 +193,16 @@ class FrontendAssistant:
             }
         })
         
+        # Single-pass pipeline executes actions itself, with the backend's executor
+        self.pipeline = pipeline
+        if pipeline == PIPELINE_SINGLE:
+            from editor import Editor
+            from fixed_function_executor import FunctionExecutor
+            self.editor = Editor()
+            self.executor = FunctionExecutor()
+        
         self.ensure_directories_exist()
-        print(f"{Colors.GREEN}Frontend initialized and ready{Colors.ENDC}")
+        print(f"{Colors.GREEN}Frontend initialized and ready ({pipeline} pipeline){Colors.ENDC}")
         
     def ensure_directories_exist(self):
         """Make sure all required directories exist"""
@@ -168,9 +250,24 @@ class FrontendAssistant:
             self.should_exit = True
             return "exit"
             
+    @contextlib.contextmanager
+    def tagged_output(self, tag):
+        """Label the replies this thread displays with the request they answer"""
+        self._output.tag = tag
+        try:
+            yield
+        finally:
+            self._output.tag = None
+    
     def display_assistant_response(self, response):
         """Display the assistant's response in the terminal"""
-        print(f"\n{Colors.BOLD}{Colors.GREEN}Assistant:{Colors.ENDC}")
+        with self.output_lock:
+            self._display_assistant_response(response)
+    
+    def _display_assistant_response(self, response):
+        tag = getattr(self._output, 'tag', None)
+        label = f"Assistant [{tag}]:" if tag else "Assistant:"
+        print(f"\n{Colors.BOLD}{Colors.GREEN}{label}{Colors.ENDC}")
         
         # Display the response with nice line wrapping
         lines = response.split('\n')
@@ -221,8 +318,15 @@ class FrontendAssistant:
                 
         print(f"{color}{'='*40}{Colors.ENDC}")
     
-    def send_request_to_backend(self, user_input, request_type="command"):
-        """Send a request to the backend"""
+    def send_request_to_backend(self, user_input, request_type="command", spool=False, original_input=None):
+        """Send a request to the backend
+        
+        Args:
+            user_input: The directives for the backend
+            spool: Queue the request in the request spool (several requests in flight)
+                   instead of overwriting the request file
+            original_input: What the user typed, for the backend's fact extraction
+        """
         self.display_debug_info("Sending Request to Backend", user_input, Colors.PURPLE)
         request_id = str(uuid.uuid4())
         self.current_request_id = request_id
@@ -235,10 +339,18 @@ class FrontendAssistant:
             "timestamp": datetime.datetime.now().isoformat(),
             "response_required": True
         }
+        if original_input:
+            request["user_input"] = original_input
         
         # Save the request to the file
-        with open(REQUEST_FILE, 'w') as f:
-            json.dump(request, f, indent=2)
+        if spool:
+            submit_request(request)
+        else:
+            # Replaced in one step: the backend claims the file by moving it
+            temp_path = REQUEST_FILE + '.tmp'
+            with open(temp_path, 'w') as f:
+                json.dump(request, f, indent=2)
+            os.replace(temp_path, REQUEST_FILE)
             
         return request_id
     
@@ -389,136 +501,465 @@ class FrontendAssistant:
         
         return confirmations
 
-    def process_request(self, user_input):
-        """Process a user request by coordinating with backend"""
-        self.processing = True
-        
+    def record_interaction(self, request_id, **fields):
+        """Add the frontend's part of a turn to the interaction archive"""
+        if not request_id:
+            return
         try:
-            # Update last interaction time
-            self.memory_manager.update_user_memory({
-                "last_interaction": datetime.datetime.now().isoformat()
-            })
-            
-            # Process with user model (frontend)
-            print(f"{Colors.YELLOW}Processing your request...{Colors.ENDC}")
-            user_thoughts, directives = self.user_model.process_input(
-                user_input, 
-                self.memory_manager.get_user_memory()
-            )
-
-            # --- NEW: Handle memory update actions for lists (e.g., friends) ---
-            if isinstance(directives, dict) and "actions" in directives:
-                for action in directives["actions"]:
-                    if action.get("type") == "update_memory":
-                        args = action.get("args", {})
-                        memory_type = args.get("memory_type")
-                        key = args.get("key")
-                        value = args.get("value")
-                        if memory_type == "user" and key:
-                            # Support appending to lists (e.g., friends)
-                            if key.startswith("personal.friends") and isinstance(value, str):
-                                user_mem = self.memory_manager.get_user_memory()
-                                friends = user_mem.get("personal", {}).get("friends", [])
-                                if value not in friends:
-                                    update = {"personal": {"friends": friends + [value]}}
-                                    self.memory_manager.update_user_memory(update)
-                            # Support nested keys like "personal.full_name"
-                            elif "." in key:
-                                parts = key.split(".")
-                                update = curr = {}
-                                for p in parts[:-1]:
-                                    curr[p] = {}
-                                    curr = curr[p]
-                                curr[parts[-1]] = value
-                                self.memory_manager.update_user_memory(update)
-                            else:
-                                self.memory_manager.update_user_memory({key: value})
-            # --- END NEW ---
+            self.interactions.record(request_id, **fields)
+        except Exception as e:
+            print(f"{Colors.RED}Error recording interaction: {e}{Colors.ENDC}")
 
-            # Check if any background tasks should be scheduled
-            if "background_tasks" in user_thoughts:
-                for task in user_thoughts["background_tasks"]:
-                    self.add_task_to_buffer({
-                        "description": task,
-                        "priority": "medium",
+    def execute_local_actions(self, actions):
+        """
+        Execute planned actions in the frontend (single-pass pipeline)
+        
+        Actions outside LOCAL_ACTIONS need backend state and are queued for
+        the backend through the task buffer.
+        
+        Returns:
+            List of executed actions in the backend's response format
+        """
+        executed_actions = []
+        # List changes of all the actions are saved once, after the last one
+        with self.executor.batch(self.memory_manager):
+            for action in actions:
+                action_type = action.get("type")
+                args = action.get("args", {})
+                # The backend is the only writer of the time-series store
+                writes_series = action_type in ("append_to_list", "remove_from_list") and \
+                    series_for_path(KEY_ALIASES.get(args.get("key"), args.get("key")))
+                if action_type not in LOCAL_ACTIONS or writes_series:
+                    queued = self.add_task_to_buffer({
+                        "description": f"{action_type}: {json.dumps(args)}",
+                        "action": action,
+                        "priority": args.get("priority", "medium"),
                         "type": "background",
                         "added_at": datetime.datetime.now().isoformat(),
                         "status": "pending"
                     })
+                    executed_actions.append({
+                        "type": action_type,
+                        "args": args,
+                        "result": "Queued for the backend",
+                        "success": queued
+                    })
+                    continue
+            
+                action_started = time.perf_counter()
+                try:
+                    result = self.executor.execute(action, self.editor, self.memory_manager)
+                    executed_actions.append({
+                        "type": action_type,
+                        "args": args,
+                        "result": result,
+                        "success": not (isinstance(result, dict) and result.get("type") == "error"),
+                        "duration_ms": round((time.perf_counter() - action_started) * 1000, 1)
+                    })
+                except Exception as e:
+                    print(f"{Colors.RED}❌ Error in action {action_type}: {e}{Colors.ENDC}")
+                    executed_actions.append({
+                        "type": action_type,
+                        "args": args,
+                        "error": str(e),
+                        "success": False
+                    })
+        return executed_actions
+    
+    def process_request_single_pass(self, user_input):
+        """Process a user request with one model call, executing its actions here"""
+        started_at = datetime.datetime.now()
+        started = time.perf_counter()
+        request_id = str(uuid.uuid4())
+        
+        print(f"{Colors.YELLOW}Processing your request...{Colors.ENDC}")
+        thoughts, actions, draft_reply = self.user_model.plan_and_reply(
+            user_input,
+            self.memory_manager.get_user_memory()
+        )
+        planning_ms = (time.perf_counter() - started) * 1000
+        self.display_debug_info("Single-Pass Thoughts", thoughts, Colors.PURPLE)
+        self.display_debug_info("Single-Pass Actions", actions, Colors.PURPLE)
+        
+        timestamp = started_at.isoformat()
+        log_event(
+            INTERACTION_LOG,
+            f"\n[{timestamp}] USER: {user_input}\nACTIONS: {json.dumps(actions, indent=2)}\n",
+            {"timestamp": timestamp, "role": "user", "content": user_input, "actions": actions}
+        )
+        self.record_interaction(
+            request_id,
+            started_at=started_at,
+            user_input=user_input,
+            directives={"pipeline": PIPELINE_SINGLE, "actions": actions},
+            timings={"planning_ms": round(planning_ms, 1)}
+        )
+        
+        execution_started = time.perf_counter()
+        executed_actions = self.execute_local_actions(actions)
+        execution_ms = (time.perf_counter() - execution_started) * 1000
+        for executed in executed_actions:
+            log_change(CHANGE_LOG, {"type": executed["type"], "args": executed["args"]}, executed.get("result", executed.get("error")))
+        
+        response = self.process_retrieved_data({"id": request_id, "status": "success", "actions": executed_actions})
+        response["confirmations"] = self.generate_memory_confirmations(executed_actions)
+        if response["confirmations"]:
+            print(f"\n{Colors.GREEN}{'='*40}{Colors.ENDC}")
+            print(f"{Colors.GREEN}✓ Actions Completed:{Colors.ENDC}")
+            for confirmation in response["confirmations"]:
+                print(f"  {Colors.GREEN}{confirmation}{Colors.ENDC}")
+            print(f"{Colors.GREEN}{'='*40}{Colors.ENDC}")
+        
+        # The draft was written before the actions ran: it cannot contain retrieved
+        # values or report failures, so those replies come from templates or the model
+        response_started = time.perf_counter()
+        needs_results = any(
+            action.get("type") == "retrieve_data" or not action.get("success") for action in executed_actions
+        )
+        if draft_reply and not needs_results:
+            human_friendly_output = draft_reply
+            self.user_model.history.add_turn("assistant", human_friendly_output)
+        else:
+            human_friendly_output = self.user_model.generate_output(
+                f"Executed {len(executed_actions)} actions.",
+                self.memory_manager.get_user_memory(),
+                response
+            )
+        response_ms = (time.perf_counter() - response_started) * 1000
+        
+        log_event(
+            INTERACTION_LOG,
+            f"ASSISTANT: {human_friendly_output}\n" + "-"*50 + "\n",
+            {"role": "assistant", "content": human_friendly_output, "request_id": request_id}
+        )
+        self.record_interaction(
+            request_id,
+            actions=executed_actions,
+            results=[action.get("result", action.get("error")) for action in executed_actions],
+            response=human_friendly_output,
+            status="completed",
+            timings={
+                "execution_ms": round(execution_ms, 1),
+                "response_ms": round(response_ms, 1),
+                "total_ms": round((time.perf_counter() - started) * 1000, 1)
+            }
+        )
+        self.display_assistant_response(human_friendly_output)
+    
+    def interpret_request(self, user_input):
+        """
+        Turn a user request into directives for the backend with the frontend model
+        
+        Returns:
+            Directives for the backend
+        """
+        # Update last interaction time
+        self.memory_manager.update_user_memory({
+            "last_interaction": datetime.datetime.now().isoformat()
+        })
+        
+        # Process with user model (frontend)
+        print(f"{Colors.YELLOW}Processing your request...{Colors.ENDC}")
+        user_thoughts, directives = self.user_model.process_input(
+            user_input, 
+            self.memory_manager.get_user_memory()
+        )
+
+        # --- NEW: Handle memory update actions for lists (e.g., friends) ---
+        if isinstance(directives, dict) and "actions" in directives:
+            for action in directives["actions"]:
+                if action.get("type") == "update_memory":
+                    args = action.get("args", {})
+                    memory_type = args.get("memory_type")
+                    key = args.get("key")
+                    value = args.get("value")
+                    if memory_type == "user" and key:
+                        # Support appending to lists (e.g., friends)
+                        if key.startswith("personal.friends") and isinstance(value, str):
+                            user_mem = self.memory_manager.get_user_memory()
+                            friends = user_mem.get("personal", {}).get("friends", [])
+                            if value not in friends:
+                                update = {"personal": {"friends": friends + [value]}}
+                                self.memory_manager.update_user_memory(update)
+                        # Support nested keys like "personal.full_name"
+                        elif "." in key:
+                            parts = key.split(".")
+                            update = curr = {}
+                            for p in parts[:-1]:
+                                curr[p] = {}
+                                curr = curr[p]
+                            curr[parts[-1]] = value
+                            self.memory_manager.update_user_memory(update)
+                        else:
+                            self.memory_manager.update_user_memory({key: value})
+        # --- END NEW ---
+
+        # Check if any background tasks should be scheduled
+        if "background_tasks" in user_thoughts:
+            for task in user_thoughts["background_tasks"]:
+                self.add_task_to_buffer({
+                    "description": task,
+                    "priority": "medium",
+                    "type": "background",
+                    "added_at": datetime.datetime.now().isoformat(),
+                    "status": "pending"
+                })
+        
+        # Display debug info for processing
+        self.display_debug_info("Frontend Model Thoughts", user_thoughts, Colors.PURPLE)
+        self.display_debug_info("Frontend Model Directives", directives, Colors.PURPLE)
+        
+        # Log user interaction
+        timestamp = datetime.datetime.now().isoformat()
+        log_event(
+            INTERACTION_LOG,
+            f"\n[{timestamp}] USER: {user_input}\nDIRECTIVES: {json.dumps(directives, indent=2)}\n",
+            {"timestamp": timestamp, "role": "user", "content": user_input, "directives": directives}
+        )
+        
+        return directives
+    
+    def answer_from_memory(self, user_input, directives, actions, started, started_at, interpretation_ms):
+        """
+        Answer a request whose directives only read user memory, without the backend
+        
+        The lookups run against a snapshot of user memory taken after checking
+        that the local copy is at the latest version, with the same path
+        resolution as the backend's executor, and the reply is rendered from
+        a response in the backend's format.
+        
+        Args:
+            actions: The directives' retrieve_data actions (see memory_read_actions)
+            started: perf_counter() when the request was entered
+            started_at: datetime when the request was entered
+            interpretation_ms: Time the frontend model took
+            
+        Returns:
+            The request id the turn was recorded under
+        """
+        request_id = str(uuid.uuid4())
+        self.record_interaction(
+            request_id,
+            started_at=started_at,
+            user_input=user_input,
+            directives=directives,
+            timings={"interpretation_ms": round(interpretation_ms, 1)}
+        )
+        
+        read_started = time.perf_counter()
+        version, user_mem = self.memory_manager.snapshot('user')
+        executed_actions = []
+        for action in actions:
+            args = action.get("args", {})
+            result = read_memory(user_mem, args)
+            executed_actions.append({
+                "type": "retrieve_data",
+                "args": args,
+                "result": result,
+                "success": result.get("type") != "error"
+            })
+        read_ms = (time.perf_counter() - read_started) * 1000
+        self.display_debug_info("Answered From Memory", {"memory_version": version, "actions": executed_actions}, Colors.PURPLE)
+        
+        self.record_interaction(
+            request_id,
+            actions=executed_actions,
+            results=[action["result"] for action in executed_actions],
+            timings={"memory_read_ms": round(read_ms, 1)}
+        )
+        response = {
+            "id": request_id,
+            "status": "success",
+            "content": f"Read {len(executed_actions)} item(s) from user memory (version {version})",
+            "actions": executed_actions
+        }
+        reply = self.handle_backend_response(request_id, response, started)
+        self.response_cache.store(user_input, reply, [action["result"] for action in executed_actions], version)
+        return request_id
+    
+    def answer_from_cache(self, user_input, started, started_at):
+        """
+        Answer a request with the cached reply to the same memory lookup, if nothing
+        it was read from has changed since
+        
+        Returns:
+            The request id the turn was recorded under, or None on a cache miss
+        """
+        # Changes whose events have not arrived yet still invalidate entries
+        self.memory_manager.refresh(['user'])
+        entry = self.response_cache.lookup(user_input)
+        if entry is None:
+            return None
+        
+        request_id = str(uuid.uuid4())
+        reply = entry.reply
+        # Saved with the next real change: a cached reply should not cost a memory save
+        self.memory_manager.get_user_memory()["last_interaction"] = datetime.datetime.now().isoformat()
+        self.user_model.history.add_turn("user", user_input)
+        self.user_model.history.add_turn("assistant", reply)
+        self.display_debug_info("Answered From Response Cache", {"terms": entry.terms, "paths": entry.paths, "hits": entry.hits, "cache": self.response_cache.stats()}, Colors.PURPLE)
+        
+        timestamp = started_at.isoformat()
+        log_event(
+            INTERACTION_LOG,
+            f"\n[{timestamp}] USER: {user_input}\nASSISTANT (cached): {reply}\n" + "-"*50 + "\n",
+            {"timestamp": timestamp, "role": "assistant", "content": reply, "request_id": request_id, "cached": True}
+        )
+        self.record_interaction(
+            request_id,
+            started_at=started_at,
+            user_input=user_input,
+            directives={"cached": True, "paths": [".".join(map(str, path)) for path in entry.paths]},
+            response=reply,
+            status="completed",
+            timings={"total_ms": round((time.perf_counter() - started) * 1000, 1)}
+        )
+        self.display_assistant_response(reply)
+        return request_id
+    
+    def handle_backend_response(self, request_id, response, started, backend_ms=None):
+        """
+        Write and display the reply to a request from the backend's response
+        
+        Args:
+            request_id: The request the response answers
+            response: The backend's response
+            started: perf_counter() when the request was entered
+            backend_ms: Time the backend took (None if the frontend answered it)
+            
+        Returns:
+            The reply shown to the user
+        """
+        if response.get("status") == "error":
+            print(f"{Colors.RED}Backend error: {response.get('content')}{Colors.ENDC}")
+            error_msg = f"I'm sorry, there was a problem processing your request: {response.get('content')}"
+            self.record_interaction(request_id, response=error_msg, status="error", timings=self._reply_timings(started, backend_ms))
+            self.display_assistant_response(error_msg)
+            return error_msg
+        
+        # Get execution results from the backend
+        execution_results = response.get("content", "")
+        actions = response.get("actions", [])
+        
+        # NEW: Process retrieved data for better display
+        response = self.process_retrieved_data(response)
+        
+        # NEW: Generate confirmation messages for memory updates
+        confirmations = self.generate_memory_confirmations(actions)
+        
+        # Display confirmations immediately for better UX
+        if confirmations:
+            print(f"\n{Colors.GREEN}{'='*40}{Colors.ENDC}")
+            print(f"{Colors.GREEN}✓ Actions Completed:{Colors.ENDC}")
+            for confirmation in confirmations:
+                print(f"  {Colors.GREEN}{confirmation}{Colors.ENDC}")
+            print(f"{Colors.GREEN}{'='*40}{Colors.ENDC}")
+        
+        # Generate user-friendly output based on backend results
+        print(f"{Colors.YELLOW}Generating response...{Colors.ENDC}")
+        
+        # Include confirmations in the response generation
+        response_with_confirmations = response.copy()
+        response_with_confirmations['confirmations'] = confirmations
+        
+        response_started = time.perf_counter()
+        human_friendly_output = self.user_model.generate_output(
+            execution_results,
+            self.memory_manager.get_user_memory(),
+            response_with_confirmations  # Pass the enhanced response
+        )
+        response_ms = (time.perf_counter() - response_started) * 1000
+        
+        rendering = self.user_model.response_renderer.counts()
+        
+        # Display debug info for final output generation
+        self.display_debug_info("Final Response Generation", 
+                               f"Based on execution results: {execution_results}\nReply rendering: {rendering}", 
+                               Colors.PURPLE)
+        
+        # Log the output, with the session's templated vs. model-written reply counts
+        log_event(
+            INTERACTION_LOG,
+            f"ASSISTANT: {human_friendly_output}\n" + "-"*50 + "\n",
+            {"role": "assistant", "content": human_friendly_output, "request_id": request_id, "rendering": rendering}
+        )
+        
+        self.record_interaction(request_id, response=human_friendly_output, status="completed",
+                                timings=self._reply_timings(started, backend_ms, response_ms))
+        
+        # Display response to user
+        self.display_assistant_response(human_friendly_output)
+        return human_friendly_output
+
+    @staticmethod
+    def _reply_timings(started, backend_ms, response_ms=None):
+        timings = {"total_ms": round((time.perf_counter() - started) * 1000, 1)}
+        if backend_ms is not None:
+            timings["backend_ms"] = round(backend_ms, 1)
+        if response_ms is not None:
+            timings["response_ms"] = round(response_ms, 1)
+        return timings
+
+    def process_request(self, user_input):
+        """Process a user request by coordinating with backend"""
+        if self.pipeline == PIPELINE_SINGLE:
+            self.processing = True
+            self.user_model.history.set_busy(True)
+            try:
+                self.process_request_single_pass(user_input)
+            except Exception as e:
+                print(f"{Colors.RED}❌ Error during processing: {e}{Colors.ENDC}")
+                self.display_assistant_response("I encountered an issue while processing your request. Please try again or rephrase.")
+            self.processing = False
+            self.user_model.history.set_busy(False)
+            return
+        
+        self.processing = True
+        self.user_model.history.set_busy(True)  # No summarizing while a request is handled
+        started_at = datetime.datetime.now()
+        started = time.perf_counter()
+        request_id = None
+        
+        try:
+            # The same question as before, with nothing it read changed since
+            request_id = self.answer_from_cache(user_input, started, started_at)
+            if request_id is not None:
+                return
             
-            # Display debug info for processing
-            self.display_debug_info("Frontend Model Thoughts", user_thoughts, Colors.PURPLE)
-            self.display_debug_info("Frontend Model Directives", directives, Colors.PURPLE)
+            directives = self.interpret_request(user_input)
+            interpretation_ms = (time.perf_counter() - started) * 1000
             
-            # Log user interaction
-            with open(INTERACTION_LOG, 'a') as f:
-                f.write(f"\n[{datetime.datetime.now().isoformat()}] USER: {user_input}\n")
-                f.write(f"DIRECTIVES: {json.dumps(directives, indent=2)}\n")
+            # Memory lookups need neither the backend's poll nor its planner
+            read_actions = memory_read_actions(directives)
+            if read_actions is not None:
+                request_id = self.answer_from_memory(user_input, directives, read_actions, started, started_at, interpretation_ms)
+                return
             
             # Send request to backend
             print(f"{Colors.YELLOW}Sending request to backend...{Colors.ENDC}")
-            request_id = self.send_request_to_backend(directives)
+            request_id = self.send_request_to_backend(directives, original_input=user_input)
             self.waiting_for_response = True
+            self.record_interaction(
+                request_id,
+                started_at=started_at,
+                user_input=user_input,
+                directives=directives,
+                timings={"interpretation_ms": round(interpretation_ms, 1)}
+            )
             
             # Wait for backend response
             print(f"{Colors.YELLOW}Waiting for backend to process request...{Colors.ENDC}")
-            max_wait_time = 60  # Maximum wait time in seconds
+            max_wait_time = BACKEND_TIMEOUT
             start_time = time.time()
+            wait_started = time.perf_counter()
             
             while self.waiting_for_response and (time.time() - start_time) < max_wait_time:
                 response = self.check_backend_response(request_id)
                 
                 if response:
                     self.waiting_for_response = False
-                    
-                    if response.get("status") == "error":
-                        print(f"{Colors.RED}Backend error: {response.get('content')}{Colors.ENDC}")
-                        error_msg = f"I'm sorry, there was a problem processing your request: {response.get('content')}"
-                        self.display_assistant_response(error_msg)
-                        break
-                          # Get execution results from the backend
-                    execution_results = response.get("content", "")
-                    actions = response.get("actions", [])
-                    
-                    # NEW: Process retrieved data for better display
-                    response = self.process_retrieved_data(response)
-                    
-                    # NEW: Generate confirmation messages for memory updates
-                    confirmations = self.generate_memory_confirmations(actions)
-                    
-                    # Display confirmations immediately for better UX
-                    if confirmations:
-                        print(f"\n{Colors.GREEN}{'='*40}{Colors.ENDC}")
-                        print(f"{Colors.GREEN}✓ Actions Completed:{Colors.ENDC}")
-                        for confirmation in confirmations:
-                            print(f"  {Colors.GREEN}{confirmation}{Colors.ENDC}")
-                        print(f"{Colors.GREEN}{'='*40}{Colors.ENDC}")
-                    
-                    # Generate user-friendly output based on backend results
-                    print(f"{Colors.YELLOW}Generating response...{Colors.ENDC}")
-                    
-                    # Include confirmations in the response generation
-                    response_with_confirmations = response.copy()
-                    response_with_confirmations['confirmations'] = confirmations
-                    
-                    human_friendly_output = self.user_model.generate_output(
-                        execution_results,
-                        self.memory_manager.get_user_memory(),
-                        response_with_confirmations  # Pass the enhanced response
-                    )
-                    
-                    # Display debug info for final output generation
-                    self.display_debug_info("Final Response Generation", 
-                                           f"Based on execution results: {execution_results}", 
-                                           Colors.PURPLE)
-                    
-                    # Log the output
-                    with open(INTERACTION_LOG, 'a') as f:
-                        f.write(f"ASSISTANT: {human_friendly_output}\n")
-                        f.write("-"*50 + "\n")
-                    
-                    # Display response to user
-                    self.display_assistant_response(human_friendly_output)
+                    backend_ms = (time.perf_counter() - wait_started) * 1000
+                    self.handle_backend_response(request_id, response, started, backend_ms)
                     break
                 
                 time.sleep(0.5)  # Check every half second
@@ -527,6 +968,9 @@ class FrontendAssistant:
                 # Timeout occurred
                 print(f"{Colors.RED}Timeout waiting for backend response.{Colors.ENDC}")
                 timeout_msg = "I'm sorry, the backend is taking too long to respond. Please try again later."
+                self.record_interaction(request_id, response=timeout_msg, status="timeout", timings={
+                    "total_ms": round((time.perf_counter() - started) * 1000, 1)
+                })
                 self.display_assistant_response(timeout_msg)
                 self.waiting_for_response = False
                 
@@ -534,10 +978,11 @@ class FrontendAssistant:
             error_msg = f"Error during processing: {e}"
             print(f"{Colors.RED}❌ {error_msg}{Colors.ENDC}")
             human_friendly_output = "I encountered an issue while processing your request. Please try again or rephrase."
+            self.record_interaction(request_id, response=error_msg, status="error")
             self.display_assistant_response(human_friendly_output)
-        
-        self.processing = False
-        return
+        finally:
+            self.processing = False
+            self.user_model.history.set_busy(False)
 
     def run(self):
         """Run the assistant in interactive terminal mode"""
@@ -572,15 +1017,25 @@ class FrontendAssistant:
 
 if __name__ == '__main__':
     try:
-        assistant = FrontendAssistant()
-        assistant.run()
+        assistant = FrontendAssistant(
+            memory_service="--memory-service" in sys.argv,
+            pipeline=PIPELINE_SINGLE if "--single-pass" in sys.argv else PIPELINE_STAGED
+        )
+        if "--concurrent" in sys.argv:
+            from concurrent_frontend import ConcurrentFrontend
+            ConcurrentFrontend(assistant).run()
+        else:
+            assistant.run()
     except KeyboardInterrupt:
         print("\nExiting due to keyboard interrupt.")
     finally:
         # Make sure memory is saved on exit
         try:
             if 'assistant' in locals():
+                assistant.user_model.history.close()
                 assistant.memory_manager.save_memory()
+                assistant.memory_manager.close_events()
+                get_log_pipeline().close()
                 print(f"{Colors.CYAN}Memory saved. Frontend stopped.{Colors.ENDC}")
         except Exception as e:
             print(f"{Colors.RED}Error saving memory on exit: {e}{Colors.ENDC}")
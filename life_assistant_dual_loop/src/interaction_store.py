@@ -0,0 +1,300 @@
+import os
+import re
+import json
+import sqlite3
+import datetime
+import threading
+
+INTERACTIONS_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data-user', 'interactions.db')
+
+# Columns stored as JSON text
+JSON_FIELDS = ('directives', 'actions', 'results', 'timings')
+FIELDS = ('started_at', 'user_input', 'directives', 'actions', 'results', 'response', 'timings', 'status')
+
+SEARCH_STOPWORDS = {'a', 'an', 'the', 'and', 'or', 'of', 'to', 'in', 'on', 'for', 'my', 'i', 'me', 'about', 'what', 'did', 'ask'}
+WORD_PATTERN = re.compile(r'\w+')
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def _start_of_day(moment):
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _add_months(moment, months):
+    month = moment.month - 1 + months
+    return moment.replace(year=moment.year + month // 12, month=month % 12 + 1, day=1)
+
+
+def parse_period(period, now=None):
+    """
+    Turn a period name into a time range
+
+    Understands 'today', 'yesterday', 'this/last week', 'this/last month',
+    'this/last year' and 'last N hours/days/weeks/months'.
+
+    Returns:
+        (start, end) datetimes, or None if the period is not understood
+    """
+    now = now or datetime.datetime.now()
+    period = ' '.join(str(period or '').lower().replace('_', ' ').split())
+    today = _start_of_day(now)
+
+    if period == 'today':
+        return today, now
+    if period == 'yesterday':
+        return today - datetime.timedelta(days=1), today
+    if period in ('this week', 'last week'):
+        start = today - datetime.timedelta(days=today.weekday())
+        if period == 'last week':
+            return start - datetime.timedelta(days=7), start
+        return start, now
+    if period in ('this month', 'last month'):
+        start = today.replace(day=1)
+        if period == 'last month':
+            return _add_months(start, -1), start
+        return start, now
+    if period in ('this year', 'last year'):
+        start = today.replace(month=1, day=1)
+        if period == 'last year':
+            return start.replace(year=start.year - 1), start
+        return start, now
+
+    match = re.fullmatch(r'(?:last|past) (\d+) (hour|day|week|month)s?', period)
+    if match:
+        count, unit = int(match.group(1)), match.group(2)
+        delta = {
+            'hour': datetime.timedelta(hours=1),
+            'day': datetime.timedelta(days=1),
+            'week': datetime.timedelta(weeks=1),
+            'month': datetime.timedelta(days=30)
+        }[unit]
+        return now - delta * count, now
+    return None
+
+
+def _describe(value):
+    """Flatten actions/results to plain text for the full-text index"""
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        return value
+    return ' '.join(str(item) for item in WORD_PATTERN.findall(json.dumps(value, default=str)))
+
+
+def _timestamp(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class InteractionStore:
+    """
+    SQLite archive of conversation turns, one row per request id, with a
+    time index and a full-text index over the user's input, the response and
+    the actions taken. The frontend and the backend each fill in their part
+    of a turn (input and response; actions, results and timings).
+    """
+
+    def __init__(self, db_path=INTERACTIONS_DB):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Both processes write here: wait for the other one's transaction instead of failing
+        self.conn = sqlite3.connect(db_path, timeout=5.0, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        """Create tables, indexes and the full-text index if available"""
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS interactions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    request_id TEXT NOT NULL UNIQUE,
+                    started_at TEXT NOT NULL,
+                    user_input TEXT,
+                    directives TEXT,
+                    actions TEXT,
+                    results TEXT,
+                    response TEXT,
+                    timings TEXT NOT NULL DEFAULT '{}',
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    search_text TEXT NOT NULL DEFAULT ''
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_interactions_started ON interactions(started_at)")
+
+        try:
+            with self.conn:
+                self.conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS interactions_fts USING fts5("
+                    "user_input, response, search_text, content='interactions', content_rowid='id')"
+                )
+                self.conn.execute("""
+                    CREATE TRIGGER IF NOT EXISTS interactions_fts_insert AFTER INSERT ON interactions BEGIN
+                        INSERT INTO interactions_fts(rowid, user_input, response, search_text)
+                        VALUES (new.id, new.user_input, new.response, new.search_text);
+                    END
+                """)
+                self.conn.execute("""
+                    CREATE TRIGGER IF NOT EXISTS interactions_fts_update AFTER UPDATE ON interactions BEGIN
+                        INSERT INTO interactions_fts(interactions_fts, rowid, user_input, response, search_text)
+                        VALUES ('delete', old.id, old.user_input, old.response, old.search_text);
+                        INSERT INTO interactions_fts(rowid, user_input, response, search_text)
+                        VALUES (new.id, new.user_input, new.response, new.search_text);
+                    END
+                """)
+                self.conn.execute("""
+                    CREATE TRIGGER IF NOT EXISTS interactions_fts_delete AFTER DELETE ON interactions BEGIN
+                        INSERT INTO interactions_fts(interactions_fts, rowid, user_input, response, search_text)
+                        VALUES ('delete', old.id, old.user_input, old.response, old.search_text);
+                    END
+                """)
+            self.fts_enabled = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: fall back to LIKE scans for text search
+            self.fts_enabled = False
+
+    def _row_to_interaction(self, row):
+        if row is None:
+            return None
+        interaction = dict(row)
+        interaction.pop('search_text', None)
+        for field in JSON_FIELDS:
+            if interaction.get(field) is not None:
+                try:
+                    interaction[field] = json.loads(interaction[field])
+                except ValueError:
+                    pass
+        return interaction
+
+    def record(self, request_id, **fields):
+        """
+        Create or update the record of a turn. Only the given fields are
+        changed; timings are merged into the ones already recorded.
+
+        Args:
+            request_id: Request id shared by the frontend and the backend
+            **fields: Any of started_at, user_input, directives, actions,
+                      results, response, timings (dict) and status
+        """
+        unknown = set(fields) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown interaction fields: {', '.join(sorted(unknown))}")
+
+        values = {}
+        for field, value in fields.items():
+            if field in JSON_FIELDS:
+                value = json.dumps(value, default=str) if value is not None else None
+            elif field == 'started_at':
+                value = _timestamp(value)
+            values[field] = value
+
+        # Actions and results are searchable too ("when did I add the dentist appointment")
+        search_parts = [_describe(fields[field]) for field in ('actions', 'results') if fields.get(field) is not None]
+        search_text = ' '.join(part for part in search_parts if part) or None
+
+        with self._lock, self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO interactions (request_id, started_at, user_input, directives, actions, results,
+                                          response, timings, status, search_text)
+                VALUES (:request_id, :started_at, :user_input, :directives, :actions, :results,
+                        :response, COALESCE(:timings, '{}'), COALESCE(:status, 'pending'), COALESCE(:search_text, ''))
+                ON CONFLICT(request_id) DO UPDATE SET
+                    user_input = COALESCE(:user_input, user_input),
+                    directives = COALESCE(:directives, directives),
+                    actions = COALESCE(:actions, actions),
+                    results = COALESCE(:results, results),
+                    response = COALESCE(:response, response),
+                    timings = json_patch(timings, COALESCE(:timings, '{}')),
+                    status = COALESCE(:status, status),
+                    search_text = CASE WHEN :search_text IS NULL THEN search_text
+                                       ELSE trim(search_text || ' ' || :search_text) END
+                """,
+                {
+                    'request_id': request_id,
+                    'started_at': values.get('started_at') or datetime.datetime.now().isoformat(),
+                    'user_input': values.get('user_input'),
+                    'directives': values.get('directives'),
+                    'actions': values.get('actions'),
+                    'results': values.get('results'),
+                    'response': values.get('response'),
+                    'timings': values.get('timings'),
+                    'status': values.get('status'),
+                    'search_text': search_text
+                }
+            )
+
+    def get(self, request_id):
+        """Get the record of a turn by its request id"""
+        row = self.conn.execute("SELECT * FROM interactions WHERE request_id = ?", (request_id,)).fetchone()
+        return self._row_to_interaction(row)
+
+    def search(self, query=None, start=None, end=None, limit=20):
+        """
+        Find turns by text and/or time range, most recent first
+
+        Args:
+            query: Words that must all appear in the input, response or actions
+            start: Earliest start time (datetime or ISO string), inclusive
+            end: Latest start time (datetime or ISO string), exclusive
+            limit: Maximum number of turns returned
+
+        Returns:
+            List of interaction dictionaries
+        """
+        words = [word for word in WORD_PATTERN.findall(str(query or '').lower()) if word not in SEARCH_STOPWORDS]
+        conditions = []
+        params = []
+
+        if words and self.fts_enabled:
+            sql = ("SELECT interactions.* FROM interactions_fts "
+                   "JOIN interactions ON interactions.id = interactions_fts.rowid")
+            conditions.append("interactions_fts MATCH ?")
+            params.append(' '.join(f'"{word}"*' for word in words))
+        else:
+            sql = "SELECT * FROM interactions"
+            for word in words:
+                conditions.append("(user_input LIKE ? OR response LIKE ? OR search_text LIKE ?)")
+                params.extend([f"%{word}%"] * 3)
+
+        if start is not None:
+            conditions.append("interactions.started_at >= ?")
+            params.append(_timestamp(start))
+        if end is not None:
+            conditions.append("interactions.started_at < ?")
+            params.append(_timestamp(end))
+
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY interactions.started_at DESC LIMIT ?"
+        params.append(limit)
+        return [self._row_to_interaction(row) for row in self.conn.execute(sql, params)]
+
+    def recent(self, limit=20):
+        """The most recent turns, newest first"""
+        return self.search(limit=limit)
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM interactions").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+def get_interaction_store(db_path=INTERACTIONS_DB):
+    """Shared InteractionStore for a database path, opened on first use"""
+    with _stores_lock:
+        if db_path not in _stores:
+            _stores[db_path] = InteractionStore(db_path)
+        return _stores[db_path]
@@ -12,7 +12,9 @@ import datetime
 import threading
 import queue
 import re
-import random
+
+from tail_reader import tail_lines, FileFollower
+from state_snapshot import SnapshotReader
 
 # Define colors for different thought types
 class Colors:
@@ -34,6 +36,11 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_BACKEND_DIR = os.path.join(BASE_DIR, 'data-backend')
 THOUGHTS_FILE = os.path.join(DATA_BACKEND_DIR, 'internal_thoughts.log')
 THREAD_STOP_EVENT = threading.Event()
+SNAPSHOT_READER = SnapshotReader()
+
+# Status refresh every 5 seconds; every 6th refresh (30 seconds) redraws the whole window
+STATUS_REFRESH_INTERVAL = 5
+FULL_REFRESH_EVERY = 6
 
 def clear_screen():
     """Clear the terminal screen"""
@@ -84,28 +91,16 @@ def watch_thoughts_file():
         with open(THOUGHTS_FILE, 'w', encoding='utf-8') as f:
             f.write("")
     
-    # Get the initial file size
-    last_size = os.path.getsize(THOUGHTS_FILE)
+    # Follow appends from the current end of file, surviving rotation
+    follower = FileFollower(THOUGHTS_FILE, start_at_end=True)
     
     while not THREAD_STOP_EVENT.is_set():
         try:
-            # Check if file size has changed
-            current_size = os.path.getsize(THOUGHTS_FILE)
-            
-            if current_size > last_size:
-                # Read the new content
-                with open(THOUGHTS_FILE, 'r', encoding='utf-8') as f:
-                    f.seek(last_size)
-                    new_content = f.read()
-                
-                # Process and print each new line
-                for line in new_content.splitlines():
-                    if line.strip():
-                        formatted_line = format_thought(line)
-                        print(formatted_line)
-                
-                # Update last size
-                last_size = current_size
+            # Process and print each new line
+            for line in follower.read_new_lines():
+                if line.strip():
+                    formatted_line = format_thought(line)
+                    print(formatted_line)
         except Exception as e:
             print(f"{Colors.RED}Error monitoring thoughts file: {e}{Colors.ENDC}")
         
@@ -115,46 +110,58 @@ def watch_thoughts_file():
 def display_multi_cycle_status():
     """Display current status of multi-cycle tasks if any are active"""
     try:
-        backend_memory_path = os.path.join(DATA_BACKEND_DIR, 'backend_memory.json')
-        if os.path.exists(backend_memory_path):
+        # Prefer the backend's shared memory snapshot over re-reading the memory file
+        memory = SNAPSHOT_READER.read()
+        if memory is None:
+            backend_memory_path = os.path.join(DATA_BACKEND_DIR, 'backend_memory.json')
+            if not os.path.exists(backend_memory_path):
+                return False
             with open(backend_memory_path, 'r') as f:
                 memory = json.load(f)
-                
-            multi_cycle = memory.get('multi_cycle_tasks', {})
-            active_sequences = multi_cycle.get('active_sequences', {})
-            current_id = multi_cycle.get('current_sequence_id')
+        
+        multi_cycle = memory.get('multi_cycle_tasks', {})
+        active_sequences = multi_cycle.get('active_sequences', {})
+        current_id = multi_cycle.get('current_sequence_id')
+        
+        if current_id and current_id in active_sequences:
+            sequence = active_sequences[current_id]
+            name = sequence.get('name', 'Unknown')
+            tasks = sequence.get('tasks', [])
+            current_idx = sequence.get('current_task_index', 0)
+            status = sequence.get('status', 'pending')
             
-            if current_id and current_id in active_sequences:
-                sequence = active_sequences[current_id]
-                name = sequence.get('name', 'Unknown')
-                tasks = sequence.get('tasks', [])
-                current_idx = sequence.get('current_task_index', 0)
-                status = sequence.get('status', 'pending')
-                
-                print(f"\n{Colors.BOLD}{Colors.BLUE}{'='*30} ACTIVE MULTI-CYCLE SEQUENCE {'='*30}{Colors.ENDC}")
-                print(f"{Colors.ORANGE}Sequence: {name} ({status}){Colors.ENDC}")
-                print(f"{Colors.ORANGE}Progress: Task {current_idx+1}/{len(tasks)} ({int((current_idx/len(tasks))*100)}%){Colors.ENDC}")
-                
-                # Show task list with status indicators
-                print(f"{Colors.ORANGE}Tasks:{Colors.ENDC}")
-                for i, task in enumerate(tasks):
-                    if i < current_idx:
-                        # Completed task
-                        print(f"{Colors.GREEN}  ✓ {task}{Colors.ENDC}")
-                    elif i == current_idx:
-                        # Current task
-                        print(f"{Colors.YELLOW}  ➤ {task} (CURRENT){Colors.ENDC}")
-                    else:
-                        # Pending task
-                        print(f"{Colors.GRAY}  ○ {task}{Colors.ENDC}")
-                        
-                print(f"{Colors.BOLD}{Colors.BLUE}{'='*80}{Colors.ENDC}\n")
-                return True
+            print(f"\n{Colors.BOLD}{Colors.BLUE}{'='*30} ACTIVE MULTI-CYCLE SEQUENCE {'='*30}{Colors.ENDC}")
+            print(f"{Colors.ORANGE}Sequence: {name} ({status}){Colors.ENDC}")
+            print(f"{Colors.ORANGE}Progress: Task {current_idx+1}/{len(tasks)} ({int((current_idx/len(tasks))*100)}%){Colors.ENDC}")
+            
+            # Show task list with status indicators
+            print(f"{Colors.ORANGE}Tasks:{Colors.ENDC}")
+            for i, task in enumerate(tasks):
+                if i < current_idx:
+                    # Completed task
+                    print(f"{Colors.GREEN}  ✓ {task}{Colors.ENDC}")
+                elif i == current_idx:
+                    # Current task
+                    print(f"{Colors.YELLOW}  ➤ {task} (CURRENT){Colors.ENDC}")
+                else:
+                    # Pending task
+                    print(f"{Colors.GRAY}  ○ {task}{Colors.ENDC}")
+                    
+            print(f"{Colors.BOLD}{Colors.BLUE}{'='*80}{Colors.ENDC}\n")
+            return True
     except Exception as e:
         print(f"{Colors.RED}Error displaying multi-cycle status: {e}{Colors.ENDC}")
     
     return False
 
+def show_recent_activity(count):
+    """Print the last few thought entries without reading the whole log"""
+    recent_lines = tail_lines(THOUGHTS_FILE, count)
+    if recent_lines:
+        print(f"{Colors.GRAY}--- Recent activity ---{Colors.ENDC}")
+        for line in recent_lines:
+            print(format_thought(line.strip()))
+
 def main():
     """Main function to run the internal window"""
     print_header()
@@ -170,39 +177,25 @@ def main():
         
         # Display periodic status updates
         last_status_check = time.time()
-        # Add current status info
-        if os.path.exists(THOUGHTS_FILE):
-            with open(THOUGHTS_FILE, 'r', encoding='utf-8') as f:
-                # Get last 10 lines of history
-                lines = f.readlines()
-                recent_lines = lines[-10:] if len(lines) > 10 else lines
-                
-                if recent_lines:
-                    print(f"{Colors.GRAY}--- Recent activity ---{Colors.ENDC}")
-                    for line in recent_lines:
-                        print(format_thought(line.strip()))
-                    print()
+        # Add current status info: last 10 lines of history
+        show_recent_activity(10)
+        print()
         
         print(f"{Colors.GREEN}Monitoring for internal thoughts... Press Ctrl+C to exit.{Colors.ENDC}")
-          # Watch for CTRL+C and periodically refresh multi-cycle task status
+        # Watch for CTRL+C and periodically refresh multi-cycle task status
+        refresh_count = 0
         while True:
             current_time = time.time()
             
-            # Check for multi-cycle task updates every 5 seconds
-            if current_time - last_status_check > 5:
-                # Clear screen occasionally to prevent overcrowding
-                if random.random() < 0.2:  # 20% chance of clearing and full refresh
+            # Check for multi-cycle task updates every few seconds
+            if current_time - last_status_check > STATUS_REFRESH_INTERVAL:
+                refresh_count += 1
+                # Clear screen on a fixed schedule to prevent overcrowding
+                if refresh_count % FULL_REFRESH_EVERY == 0:
                     print_header()
                     display_multi_cycle_status()
                     # Show last few thought entries
-                    if os.path.exists(THOUGHTS_FILE):
-                        with open(THOUGHTS_FILE, 'r', encoding='utf-8') as f:
-                            lines = f.readlines()
-                            recent_lines = lines[-5:] if len(lines) > 5 else lines
-                            if recent_lines:
-                                print(f"{Colors.GRAY}--- Recent activity ---{Colors.ENDC}")
-                                for line in recent_lines:
-                                    print(format_thought(line.strip()))
+                    show_recent_activity(5)
                 else:
                     # Just check for multi-cycle task updates
                     display_multi_cycle_status()
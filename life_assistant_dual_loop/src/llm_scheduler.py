@@ -0,0 +1,355 @@
+import os
+import json
+import time
+import socket
+import threading
+import http.client
+
+OLLAMA_HOST = 'localhost'
+OLLAMA_PORT = 11434
+
+INTERACTIVE = 'interactive'   # Calls made for a user request
+BACKGROUND = 'background'     # Queue tasks, constant tasks, sequence steps
+LANES = (INTERACTIVE, BACKGROUND)
+
+INTERACTIVE_GRACE = 5.0       # Seconds background calls stay held after a request is spotted
+HOLD_HEARTBEAT = 2.0          # Seconds between touches of the hold file during a frontend call
+
+# Touched by the frontend while its own model calls run, so the backend holds
+# background calls before a request file even exists
+HOLD_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'interactive_hold')
+WAIT_EWMA_ALPHA = 0.2
+
+
+class LLMCallPreempted(Exception):
+    """A background call was aborted to make room for an interactive one"""
+
+
+class _LaneStats:
+    def __init__(self):
+        self.queued = 0
+        self.max_queued = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.preempted = 0
+        self.wait_ewma = None
+        self.max_wait = 0.0
+        self.last_wait = 0.0
+
+    def record_wait(self, wait):
+        self.last_wait = wait
+        self.max_wait = max(self.max_wait, wait)
+        self.wait_ewma = wait if self.wait_ewma is None else self.wait_ewma + WAIT_EWMA_ALPHA * (wait - self.wait_ewma)
+
+    def as_dict(self):
+        return {
+            'queued': self.queued,
+            'max_queued': self.max_queued,
+            'in_flight': self.in_flight,
+            'completed': self.completed,
+            'failed': self.failed,
+            'preempted': self.preempted,
+            'avg_wait_ms': round((self.wait_ewma or 0.0) * 1000, 1),
+            'max_wait_ms': round(self.max_wait * 1000, 1),
+            'last_wait_ms': round(self.last_wait * 1000, 1)
+        }
+
+
+class _BackgroundCall:
+    """An in-flight background call that can be aborted from another thread"""
+
+    def __init__(self):
+        self.aborted = threading.Event()
+        self.connection = None
+
+    def abort(self):
+        self.aborted.set()
+        connection = self.connection
+        if connection is not None and connection.sock is not None:
+            try:
+                # Unblocks the reading thread immediately, even before the first token
+                connection.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class LLMScheduler:
+    """
+    Admits calls to the local Ollama instance in two lanes.
+
+    Interactive calls always go first: a background call is admitted only
+    when no interactive call is waiting (and none is expected, see
+    hold_background). Background calls are streamed so they can be aborted
+    mid-generation; an interactive call that arrives while one is running
+    aborts it, and the background caller gets LLMCallPreempted. Queue depth
+    and wait time are tracked per lane.
+    """
+
+    def __init__(self, max_concurrent=1, host=OLLAMA_HOST, port=OLLAMA_PORT):
+        self.max_concurrent = max_concurrent
+        self.host = host
+        self.port = port
+        self._cond = threading.Condition()
+        self._running = 0
+        self._background_calls = set()
+        self._hold_until = 0.0
+        self._stats = {lane: _LaneStats() for lane in LANES}
+
+    def _admissible(self, lane):
+        if self._running >= self.max_concurrent:
+            return False
+        if lane == BACKGROUND:
+            return self._stats[INTERACTIVE].queued == 0 and time.monotonic() >= self._hold_until
+        return True
+
+    def _abort_background(self):
+        """Abort running background calls and those still waiting for admission"""
+        for call in list(self._background_calls):
+            call.abort()
+        self._cond.notify_all()
+
+    def hold_background(self, seconds=INTERACTIVE_GRACE):
+        """
+        An interactive call is about to be made (e.g. a user request was just
+        written): abort running and waiting background calls and admit no new ones until
+        an interactive call completes or the hold expires
+        """
+        with self._cond:
+            self._hold_until = max(self._hold_until, time.monotonic() + seconds)
+            self._abort_background()
+
+    def background_held(self):
+        """True while a hold keeps background calls from being admitted"""
+        with self._cond:
+            return time.monotonic() < self._hold_until
+
+    def generate(self, prompt, model, lane=INTERACTIVE):
+        """
+        Run a generation in a lane, waiting for admission
+
+        Returns:
+            Response text
+
+        Raises:
+            LLMCallPreempted: Background call aborted for an interactive one
+        """
+        if lane not in LANES:
+            raise ValueError(f"Unknown LLM lane: {lane}")
+        stats = self._stats[lane]
+        call = _BackgroundCall() if lane == BACKGROUND else None
+
+        enqueued = time.monotonic()
+        with self._cond:
+            stats.queued += 1
+            stats.max_queued = max(stats.max_queued, stats.queued)
+            if lane == INTERACTIVE:
+                self._abort_background()
+            if call is not None:
+                # Registered while waiting too: a hold preempts a caller that was not admitted yet,
+                # so its thread gets back to the user instead of running once the hold expires
+                self._background_calls.add(call)
+            while not self._admissible(lane):
+                if call is not None and call.aborted.is_set():
+                    self._background_calls.discard(call)
+                    stats.queued -= 1
+                    stats.preempted += 1
+                    stats.record_wait(time.monotonic() - enqueued)
+                    raise LLMCallPreempted(f"Background call to {model} preempted while waiting for admission")
+                # Background waiters re-check periodically: a hold expires without a notification
+                self._cond.wait(0.5 if lane == BACKGROUND else None)
+            stats.queued -= 1
+            stats.in_flight += 1
+            self._running += 1
+            stats.record_wait(time.monotonic() - enqueued)
+
+        outcome = 'failed'
+        try:
+            text = self._stream(prompt, model, call) if call is not None else self._request(prompt, model)
+            outcome = 'completed'
+            return text
+        except LLMCallPreempted:
+            outcome = 'preempted'
+            raise
+        except Exception:
+            if call is not None and call.aborted.is_set():
+                # The connection was shut down under the reader
+                outcome = 'preempted'
+                raise LLMCallPreempted(f"Background call to {model} preempted by an interactive call")
+            raise
+        finally:
+            with self._cond:
+                setattr(stats, outcome, getattr(stats, outcome) + 1)
+                stats.in_flight -= 1
+                self._running -= 1
+                if call is not None:
+                    self._background_calls.discard(call)
+                else:
+                    self._hold_until = 0.0
+                self._cond.notify_all()
+
+    def _request(self, prompt, model):
+        connection = http.client.HTTPConnection(self.host, self.port)
+        try:
+            payload = json.dumps({"model": model, "prompt": prompt, "stream": False})
+            connection.request("POST", "/api/generate", payload, {'Content-Type': 'application/json'})
+            response_json = json.loads(connection.getresponse().read().decode("utf-8"))
+        finally:
+            connection.close()
+        if 'error' in response_json:
+            raise Exception(response_json['error'])
+        return response_json.get('response', 'No response from model')
+
+    def _stream(self, prompt, model, call):
+        connection = http.client.HTTPConnection(self.host, self.port)
+        call.connection = connection
+        try:
+            if call.aborted.is_set():
+                raise LLMCallPreempted(f"Background call to {model} preempted before it started")
+            payload = json.dumps({"model": model, "prompt": prompt, "stream": True})
+            connection.request("POST", "/api/generate", payload, {'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            parts = []
+            for line in response:
+                if call.aborted.is_set():
+                    raise LLMCallPreempted(f"Background call to {model} preempted by an interactive call")
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if 'error' in chunk:
+                    raise Exception(chunk['error'])
+                parts.append(chunk.get('response', ''))
+                if chunk.get('done'):
+                    break
+            if call.aborted.is_set():
+                raise LLMCallPreempted(f"Background call to {model} preempted by an interactive call")
+            return ''.join(parts)
+        finally:
+            call.connection = None
+            connection.close()
+
+    def stats(self):
+        """Queue depth, in-flight calls, outcomes and wait times per lane"""
+        with self._cond:
+            return {lane: self._stats[lane].as_dict() for lane in LANES}
+
+
+class InteractiveHold:
+    """
+    Held by the frontend around its own model calls: touches HOLD_FILE on
+    entry and every HOLD_HEARTBEAT seconds until exit, and the backend's
+    RequestWatcher holds background calls while the touches keep coming.
+    The frontend's calls go to the same Ollama instance, so a background
+    generation running there would otherwise delay them.
+    """
+
+    def __init__(self, hold_file=HOLD_FILE, heartbeat=HOLD_HEARTBEAT):
+        self.hold_file = hold_file
+        self.heartbeat = heartbeat
+        self._done = threading.Event()
+        self._thread = None
+
+    def _touch(self):
+        try:
+            with open(self.hold_file, 'a'):
+                os.utime(self.hold_file)
+        except OSError:
+            pass  # Holding is best effort; the call goes ahead either way
+
+    def _run(self):
+        while not self._done.wait(self.heartbeat):
+            self._touch()
+
+    def __enter__(self):
+        self._touch()
+        self._thread = threading.Thread(target=self._run, name="interactive-hold", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._done.set()
+        return False
+
+
+class RequestWatcher:
+    """
+    Watches the frontend's request file (and hold file) from a background
+    thread and holds background LLM calls as soon as a new request is
+    written or the frontend is calling the model, so user requests do not
+    wait for a long generation.
+    """
+
+    def __init__(self, request_file, scheduler, interval=0.2, spool_dir=None, hold_file=HOLD_FILE):
+        """
+        Args:
+            request_file: The frontend's request file
+            scheduler: LLMScheduler to hold
+            interval: Seconds between checks
+            spool_dir: Optional request spool directory; a new file there is a new request
+            hold_file: File the frontend touches while its own model calls run (InteractiveHold)
+        """
+        self.request_file = request_file
+        self.scheduler = scheduler
+        self.interval = interval
+        self.spool_dir = spool_dir
+        self.hold_file = hold_file
+        self._stop = threading.Event()
+        self._last_mtime = None
+        self._hold_mtime = self._mtime(hold_file)
+        self._last_id = self._read_id()  # A request already there at startup is handled first anyway
+        self._spooled = self._list_spool()
+        self._thread = None
+
+    def _read_id(self):
+        try:
+            with open(self.request_file, 'r') as f:
+                return json.load(f).get('id')
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.path.getmtime(path) if path else None
+        except OSError:
+            return None
+
+    def _list_spool(self):
+        if self.spool_dir is None:
+            return set()
+        try:
+            # Queued requests only: a request the backend claims is renamed, not new
+            return {name for name in os.listdir(self.spool_dir) if name.endswith('.json')}
+        except OSError:
+            return set()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="request-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            hold_mtime = self._mtime(self.hold_file)
+            if hold_mtime is not None and hold_mtime != self._hold_mtime:
+                self._hold_mtime = hold_mtime
+                self.scheduler.hold_background()
+            spooled = self._list_spool()
+            if spooled - self._spooled:
+                self.scheduler.hold_background()
+            self._spooled = spooled
+            try:
+                mtime = os.path.getmtime(self.request_file)
+            except OSError:
+                continue
+            if mtime == self._last_mtime:
+                continue
+            self._last_mtime = mtime
+            request_id = self._read_id()
+            if request_id and request_id != self._last_id:
+                self._last_id = request_id
+                self.scheduler.hold_background()
+
+    def close(self):
+        self._stop.set()
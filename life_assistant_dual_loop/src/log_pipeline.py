@@ -0,0 +1,234 @@
+import os
+import gzip
+import json
+import time
+import queue
+import atexit
+import shutil
+import datetime
+import threading
+
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024  # Rotate a log once it reaches 5 MB
+DEFAULT_BACKUP_COUNT = 5             # Keep this many gzipped segments per log
+DEFAULT_FLUSH_INTERVAL = 1.0         # Seconds between flushes of buffered writes
+DEFAULT_BATCH_SIZE = 512             # Maximum records written per batch
+
+
+class LogSink:
+    """
+    A human-readable log file with a JSONL sibling (foo.log -> foo.jsonl).
+    Both files are kept open, rotated by size and gzipped on rotation.
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES, backup_count=DEFAULT_BACKUP_COUNT, jsonl=True):
+        self.path = path
+        self.jsonl_path = os.path.splitext(path)[0] + '.jsonl' if jsonl else None
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._files = {}
+        self._sizes = {}
+
+    def _open(self, path):
+        if path not in self._files:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._files[path] = open(path, 'a', encoding='utf-8')
+            self._sizes[path] = os.path.getsize(path)
+        return self._files[path]
+
+    def write(self, texts, records):
+        """Write a batch of text lines and JSON records"""
+        self._write_to(self.path, ''.join(texts))
+        if self.jsonl_path and records:
+            self._write_to(self.jsonl_path, ''.join(
+                json.dumps(record, ensure_ascii=False, default=str) + '\n' for record in records
+            ))
+
+    def _write_to(self, path, data):
+        if not data:
+            return
+        f = self._open(path)
+        f.write(data)
+        self._sizes[path] += len(data.encode('utf-8'))
+        if self.max_bytes and self._sizes[path] >= self.max_bytes:
+            self._rotate(path)
+
+    def _rotate(self, path):
+        """Move the current file aside as segment .1.gz, shifting older segments up"""
+        self._files.pop(path).close()
+        self._sizes.pop(path, None)
+
+        for i in range(self.backup_count - 1, 0, -1):
+            older = f"{path}.{i}.gz"
+            if os.path.exists(older):
+                os.replace(older, f"{path}.{i + 1}.gz")
+
+        # Rename first so followers see a new file (new inode) immediately
+        rotated = f"{path}.1"
+        os.replace(path, rotated)
+        if self.backup_count > 0:
+            with open(rotated, 'rb') as src, gzip.open(f"{rotated}.gz", 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+        os.remove(rotated)
+        self._open(path)
+
+    def flush(self):
+        for f in self._files.values():
+            f.flush()
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+        self._sizes.clear()
+
+
+class LogPipeline:
+    """
+    Asynchronous log writer shared by all log files of a process.
+    Callers only enqueue; one consumer thread blocks on the queue, writes
+    batches grouped by file and flushes periodically.
+    """
+
+    def __init__(self, flush_interval=DEFAULT_FLUSH_INTERVAL, batch_size=DEFAULT_BATCH_SIZE):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.queue = queue.Queue()
+        self.sinks = {}
+        self._sink_options = {}
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def configure_sink(self, path, **options):
+        """Set rotation options (max_bytes, backup_count, jsonl) for a log file"""
+        self._sink_options[os.path.abspath(path)] = options
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="log-pipeline", daemon=True)
+            self._thread.start()
+        return self
+
+    def log(self, path, text, record=None):
+        """
+        Queue a log entry
+
+        Args:
+            path: Human-readable log file to append to
+            text: Text to append (should end with a newline)
+            record: Optional JSON-serialisable dict written to the JSONL sibling
+        """
+        self.queue.put((path, text, record))
+
+    def flush(self, timeout=5.0):
+        """Block until everything queued so far has been written and flushed"""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        done = threading.Event()
+        self.queue.put(done)
+        done.wait(timeout)
+
+    def close(self):
+        """Drain the queue, flush and close all files"""
+        if self._thread is not None and self._thread.is_alive():
+            self._stopped.set()
+            self.queue.put(None)
+            self._thread.join(timeout=5.0)
+        for sink in self.sinks.values():
+            sink.close()
+
+    def _get_sink(self, path):
+        path = os.path.abspath(path)
+        if path not in self.sinks:
+            self.sinks[path] = LogSink(path, **self._sink_options.get(path, {}))
+        return self.sinks[path]
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = False  # Timed out: only flush
+
+            batch = []
+            waiters = []
+            while item is not False:
+                if item is None:
+                    break
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    item = False
+
+            self._write_batch(batch)
+
+            now = time.monotonic()
+            if waiters or item is None or now - last_flush >= self.flush_interval:
+                for sink in self.sinks.values():
+                    try:
+                        sink.flush()
+                    except Exception as e:
+                        print(f"Error flushing log {sink.path}: {e}")
+                last_flush = now
+            for waiter in waiters:
+                waiter.set()
+
+            if item is None and self._stopped.is_set():
+                # Write whatever was queued after the stop marker
+                remaining = []
+                while True:
+                    try:
+                        entry = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if isinstance(entry, threading.Event):
+                        entry.set()
+                    elif entry is not None:
+                        remaining.append(entry)
+                self._write_batch(remaining)
+                for sink in self.sinks.values():
+                    sink.flush()
+                return
+
+    def _write_batch(self, batch):
+        grouped = {}
+        for path, text, record in batch:
+            texts, records = grouped.setdefault(path, ([], []))
+            texts.append(text)
+            if record is not None:
+                records.append(record)
+
+        for path, (texts, records) in grouped.items():
+            try:
+                self._get_sink(path).write(texts, records)
+            except Exception as e:
+                print(f"Error writing log {path}: {e}")
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_log_pipeline():
+    """Get the process-wide log pipeline, starting it on first use"""
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = LogPipeline().start()
+            atexit.register(_pipeline.close)
+        return _pipeline
+
+
+def log_event(path, text, record=None):
+    """Queue a line for a log file; a timestamped JSON record is added to its JSONL sibling"""
+    if record is not None and 'timestamp' not in record:
+        record = dict(record, timestamp=datetime.datetime.now().isoformat())
+    get_log_pipeline().log(path, text, record)
@@ -0,0 +1,272 @@
+import json
+import threading
+import contextlib
+
+# Key and secondary index fields of list-valued memory paths. Lists at other
+# paths are still deduplicated by content, without a key.
+COLLECTION_SPECS = {
+    'social_and_relationships.contacts': {'key': ('name',), 'indexes': ('relationship',)},
+    'social_and_relationships.contacts.friends': {'key': ('name',), 'indexes': ('relationship',)},
+    'social_and_relationships.contacts.colleagues': {'key': ('name',), 'indexes': ('company',)},
+    'health_and_wellness.medications': {'key': ('name',), 'indexes': ('frequency',)},
+    'health_and_wellness.medical_conditions': {'key': ('name',), 'indexes': ()},
+    'finance_and_banking.transactions': {'key': ('id',), 'indexes': ('date', 'category', 'currency')},
+    'finance_and_banking.bills': {'key': ('name',), 'indexes': ('due_date',)},
+    'finance_and_banking.contracts': {'key': ('name',), 'indexes': ('provider',)},
+}
+
+_FINGERPRINT = '__fingerprint__'
+_KEY = '__key__'
+
+
+def fingerprint(value):
+    """Hashable identity of a list item's content (dicts compare regardless of key order)"""
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return ' '.join(value.casefold().split())
+    try:
+        hash(value)
+    except TypeError:
+        return fingerprint(value)
+    return value
+
+
+class IndexedList:
+    """
+    Index over a list stored in memory, which stays the list itself.
+
+    Items are found by content fingerprint, by key (the configured key
+    fields, compared case-insensitively) and by secondary index fields,
+    each a hash of value -> positions. Lookups, additions and updates are
+    constant-time whatever the list length; removal keeps the list order
+    and reindexes the items after the removed one.
+    """
+
+    def __init__(self, items, key_fields=(), index_fields=()):
+        """
+        Args:
+            items: The list in memory (changed in place)
+            key_fields: Fields identifying an item; string items are their own key
+            index_fields: Fields to look items up by with find()
+        """
+        self.items = items
+        self.key_fields = tuple(key_fields)
+        self.index_fields = tuple(index_fields)
+        self.indexes = {}
+        for position, item in enumerate(items):
+            self._index(item, position)
+
+    def key_of(self, value):
+        """An item's key, or None if the collection has no key fields or the item lacks them"""
+        if not self.key_fields:
+            return None
+        if isinstance(value, dict):
+            parts = tuple(_normalize(value.get(field)) for field in self.key_fields)
+            if any(part in (None, '') for part in parts):
+                return None
+            return parts if len(parts) > 1 else parts[0]
+        if isinstance(value, str) and len(self.key_fields) == 1:
+            return _normalize(value)
+        return None
+
+    def _entries(self, item):
+        yield _FINGERPRINT, fingerprint(item)
+        key = self.key_of(item)
+        if key is not None:
+            yield _KEY, key
+        if isinstance(item, dict):
+            for field in self.index_fields:
+                if item.get(field) not in (None, ''):
+                    yield field, _normalize(item[field])
+
+    def _index(self, item, position):
+        for field, value in self._entries(item):
+            self.indexes.setdefault(field, {}).setdefault(value, set()).add(position)
+
+    def _unindex(self, item, position):
+        for field, value in self._entries(item):
+            positions = self.indexes.get(field, {}).get(value)
+            if positions is not None:
+                positions.discard(position)
+                if not positions:
+                    del self.indexes[field][value]
+
+    def _first(self, field, value):
+        positions = self.indexes.get(field, {}).get(value)
+        return min(positions) if positions else None
+
+    def position_of(self, value):
+        """Position of an equal item, else of the item with the same key, or None"""
+        position = self._first(_FINGERPRINT, fingerprint(value))
+        if position is None:
+            key = self.key_of(value)
+            if key is not None:
+                position = self._first(_KEY, key)
+        return position
+
+    def __contains__(self, value):
+        return self.position_of(value) is not None
+
+    def __len__(self):
+        return len(self.items)
+
+    def get(self, key):
+        """The item with a key (a value, or a tuple for several key fields), or None"""
+        position = self._first(_KEY, _normalize(key) if not isinstance(key, tuple) else tuple(map(_normalize, key)))
+        return self.items[position] if position is not None else None
+
+    def find(self, field, value):
+        """Items whose field equals value (through the index if the field has one)"""
+        if field in self.index_fields or (len(self.key_fields) == 1 and field == self.key_fields[0]):
+            index = _KEY if field not in self.index_fields else field
+            positions = self.indexes.get(index, {}).get(_normalize(value), ())
+            return [self.items[position] for position in sorted(positions)]
+        target = _normalize(value)
+        return [item for item in self.items if isinstance(item, dict) and _normalize(item.get(field)) == target]
+
+    def add(self, value):
+        """
+        Add an item; an item with the same key is updated instead
+
+        Returns:
+            'added', 'updated' or 'exists'
+        """
+        if self._first(_FINGERPRINT, fingerprint(value)) is not None:
+            return 'exists'
+        key = self.key_of(value)
+        position = self._first(_KEY, key) if key is not None else None
+        if position is not None:
+            current = self.items[position]
+            merged = dict(current, **value) if isinstance(current, dict) and isinstance(value, dict) else value
+            if fingerprint(merged) == fingerprint(current):
+                return 'exists'
+            self._replace(position, merged)
+            return 'updated'
+        self.items.append(value)
+        self._index(value, len(self.items) - 1)
+        return 'added'
+
+    def update(self, key, changes):
+        """
+        Change fields of the item with a key
+
+        Returns:
+            The updated item, or None if no item has the key
+        """
+        item = self.get(key)
+        if item is None:
+            return None
+        position = self.position_of(item)
+        updated = dict(item, **changes) if isinstance(item, dict) else changes
+        self._replace(position, updated)
+        return updated
+
+    def _replace(self, position, item):
+        self._unindex(self.items[position], position)
+        self.items[position] = item
+        self._index(item, position)
+
+    def remove(self, value):
+        """
+        Remove an equal item, or the item with the same key
+
+        Returns:
+            The removed item, or None if there was none
+        """
+        position = self.position_of(value)
+        if position is None:
+            return None
+        removed = self.items[position]
+        self._unindex(removed, position)
+        for later in range(position + 1, len(self.items)):
+            self._unindex(self.items[later], later)
+        del self.items[position]
+        for later in range(position, len(self.items)):
+            self._index(self.items[later], later)
+        return removed
+
+
+class MemoryCollections:
+    """
+    IndexedList for each list path of user memory in use, kept until memory
+    changes the list behind its back (another process, or another action
+    writing the path), when it is rebuilt on next use.
+    """
+
+    def __init__(self, memory_manager, specs=None):
+        self.memory_manager = memory_manager
+        self.specs = specs or COLLECTION_SPECS
+        self.collections = {}
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        memory_manager.subscribe(self._on_memory_change, stores='user')
+
+    def _on_memory_change(self, event):
+        if getattr(self._local, 'saving', False):
+            return  # Our own change, already in the index
+        path = event.path
+        with self._lock:
+            for collection_path in list(self.collections):
+                parts = tuple(collection_path.split('.'))
+                depth = min(len(parts), len(path))
+                if parts[:depth] == tuple(path[:depth]):
+                    del self.collections[collection_path]
+
+    def get(self, path, create=False):
+        """
+        The collection at a dotted user memory path
+
+        Args:
+            create: Create an empty list if the path has nothing yet
+
+        Returns:
+            IndexedList, or None if the path does not hold a list
+        """
+        user_mem = self.memory_manager.get_user_memory()
+        current = user_mem
+        parts = path.split('.')
+        for part in parts[:-1]:
+            if not isinstance(current, dict):
+                return None
+            current = current.setdefault(part, {}) if create else current.get(part)
+        if not isinstance(current, dict):
+            return None
+        items = current.setdefault(parts[-1], []) if create else current.get(parts[-1])
+        if not isinstance(items, list):
+            return None
+        with self._lock:
+            collection = self.collections.get(path)
+            if collection is None or collection.items is not items:
+                spec = self.specs.get(path, {})
+                collection = IndexedList(items, spec.get('key', ()), spec.get('indexes', ()))
+                self.collections[path] = collection
+            return collection
+
+    def save(self):
+        """
+        Save memory after collection changes without invalidating the collections;
+        inside batch() the save waits for the end of the batch
+        """
+        if getattr(self._local, 'batch_depth', 0):
+            self._local.unsaved = True
+            return True
+        self._local.saving = True
+        try:
+            return self.memory_manager.save_memory()
+        finally:
+            self._local.saving = False
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Save once for all collection changes made in the block (e.g. a request's actions)"""
+        self._local.batch_depth = getattr(self._local, 'batch_depth', 0) + 1
+        try:
+            yield self
+        finally:
+            self._local.batch_depth -= 1
+            if not self._local.batch_depth and getattr(self._local, 'unsaved', False):
+                self._local.unsaved = False
+                self.save()
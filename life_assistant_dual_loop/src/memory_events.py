@@ -0,0 +1,354 @@
+import os
+import json
+import queue
+import socket
+import threading
+from collections import namedtuple
+
+MEMORY_EVENTS_HOST = '127.0.0.1'
+BACKEND_EVENTS_PORT = 47231   # Backend broadcasts its memory changes here
+FRONTEND_EVENTS_PORT = 47232  # Frontend broadcasts its memory changes here
+
+# A single change: value at `path` (tuple of keys/indexes) inside `store` went from `old` to `new`.
+# `version` is the store's version after the change. Values must be treated as read-only.
+MemoryEvent = namedtuple('MemoryEvent', ['store', 'path', 'old', 'new', 'version'])
+
+
+class _Missing:
+    """Marker for a value that does not exist (key added or removed)"""
+
+    def __repr__(self):
+        return '<missing>'
+
+    def __bool__(self):
+        return False
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+MISSING = _Missing()
+_MISSING_JSON = {'$missing': True}
+
+
+def parse_path(path):
+    """Normalize a path given as 'a.b.0' or a sequence of keys into a tuple"""
+    if path is None:
+        return ()
+    if isinstance(path, str):
+        return tuple(int(part) if part.isdigit() else part for part in path.split('.') if part)
+    return tuple(path)
+
+
+def diff_values(old, new, path=()):
+    """
+    Compute the changes between two JSON-like values
+
+    Dictionaries are compared key by key. Lists of equal length are compared
+    index by index and appends are reported per new item; any other list
+    change replaces the whole list.
+
+    Yields:
+        (path, old, new) tuples, with MISSING for added or removed keys
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key, value in old.items():
+            if key not in new:
+                yield path + (key,), value, MISSING
+        for key, value in new.items():
+            if key not in old:
+                yield path + (key,), MISSING, value
+            elif old[key] != value:
+                yield from diff_values(old[key], value, path + (key,))
+    elif isinstance(old, list) and isinstance(new, list) and len(new) == len(old):
+        for index, (old_item, new_item) in enumerate(zip(old, new)):
+            if old_item != new_item:
+                yield from diff_values(old_item, new_item, path + (index,))
+    elif isinstance(old, list) and isinstance(new, list) and len(new) > len(old) and new[:len(old)] == old:
+        for index in range(len(old), len(new)):
+            yield path + (index,), MISSING, new[index]
+    elif old != new:
+        yield path, old, new
+
+
+def apply_change(target, path, value):
+    """Set (or delete, if value is MISSING) the value at path inside target"""
+    if not path:
+        raise ValueError("Cannot replace a whole store")
+    parent = target
+    for key in path[:-1]:
+        parent = parent[key]
+    key = path[-1]
+    if value is MISSING:
+        if isinstance(parent, list):
+            if key < len(parent):
+                del parent[key]
+        else:
+            parent.pop(key, None)
+    elif isinstance(parent, list) and key == len(parent):
+        parent.append(value)
+    else:
+        parent[key] = value
+
+
+def encode_value(value):
+    """Make a value JSON-serialisable, encoding MISSING as a marker object"""
+    return _MISSING_JSON if value is MISSING else value
+
+
+def decode_value(value):
+    """Reverse of encode_value"""
+    return MISSING if value == _MISSING_JSON else value
+
+
+def encode_event(event, origin=None):
+    """Encode an event as one JSON line"""
+    return json.dumps({
+        'store': event.store,
+        'path': list(event.path),
+        'old': encode_value(event.old),
+        'new': encode_value(event.new),
+        'version': event.version,
+        'origin': origin
+    }, default=str) + '\n'
+
+
+def decode_event(line):
+    """
+    Decode a JSON line produced by encode_event
+
+    Returns:
+        (event, origin)
+    """
+    data = json.loads(line)
+    event = MemoryEvent(
+        data['store'], tuple(data['path']), decode_value(data['old']), decode_value(data['new']), data['version']
+    )
+    return event, data.get('origin')
+
+
+class MemoryEventBus:
+    """
+    In-process fan-out of memory change events to subscribers.
+    Subscribers choose synchronous delivery (called by the thread that saved
+    memory) or queued delivery (called later from a dispatcher thread).
+    """
+
+    def __init__(self):
+        self._subscriptions = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+
+    def subscribe(self, callback, stores=None, path_prefix=None, mode='sync'):
+        """
+        Register a callback for memory change events
+
+        Args:
+            callback: Function called with each MemoryEvent
+            stores: Store names to receive ('user', 'system', 'backend'); all if None
+            path_prefix: Only receive changes at or below this path ('a.b' or tuple).
+                         Changes to an ancestor (e.g. a replaced list) are delivered too.
+            mode: 'sync' or 'queued'
+
+        Returns:
+            Subscription id for unsubscribe()
+        """
+        if mode not in ('sync', 'queued'):
+            raise ValueError(f"Unknown delivery mode: {mode}")
+        if isinstance(stores, str):
+            stores = (stores,)
+
+        with self._lock:
+            subscription_id = self._next_id
+            self._next_id += 1
+            self._subscriptions[subscription_id] = (
+                callback, set(stores) if stores else None, parse_path(path_prefix), mode
+            )
+            if mode == 'queued' and self._thread is None:
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(target=self._dispatch, name="memory-events", daemon=True)
+                self._thread.start()
+        return subscription_id
+
+    def unsubscribe(self, subscription_id):
+        with self._lock:
+            return self._subscriptions.pop(subscription_id, None) is not None
+
+    def has_subscribers(self):
+        return bool(self._subscriptions)
+
+    def publish(self, events):
+        """Deliver events to all matching subscribers"""
+        with self._lock:
+            subscriptions = list(self._subscriptions.values())
+        if not subscriptions:
+            return
+
+        for event in events:
+            for callback, stores, prefix, mode in subscriptions:
+                if stores is not None and event.store not in stores:
+                    continue
+                depth = min(len(prefix), len(event.path))
+                if event.path[:depth] != prefix[:depth]:
+                    continue
+                if mode == 'queued':
+                    self._queue.put((callback, event))
+                else:
+                    self._call(callback, event)
+
+    def _call(self, callback, event):
+        try:
+            callback(event)
+        except Exception as e:
+            print(f"Error in memory event subscriber {getattr(callback, '__name__', callback)}: {e}")
+
+    def _dispatch(self):
+        while True:
+            callback, event = self._queue.get()
+            self._call(callback, event)
+
+
+class MemoryEventBroadcaster:
+    """
+    Sends memory change events to other local processes as JSON lines over TCP.
+    Sending never blocks the caller: events are queued and written by a
+    background thread. Clients that fall behind or disconnect are dropped.
+    """
+
+    def __init__(self, port, host=MEMORY_EVENTS_HOST):
+        self.host = host
+        self.port = port
+        self.origin = os.getpid()
+        self._server = None
+        self._clients = []
+        self._clients_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._running = False
+
+    def start(self):
+        """Start listening; raises OSError if the port is unavailable"""
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind((self.host, self.port))
+        self._server.listen()
+        self._running = True
+        threading.Thread(target=self._accept_loop, name="memory-events-accept", daemon=True).start()
+        threading.Thread(target=self._send_loop, name="memory-events-send", daemon=True).start()
+        return self
+
+    def send(self, events):
+        if self._running and events:
+            self._queue.put(''.join(encode_event(event, self.origin) for event in events).encode('utf-8'))
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                client, _ = self._server.accept()
+            except OSError:
+                break
+            client.settimeout(5.0)
+            with self._clients_lock:
+                self._clients.append(client)
+
+    def _send_loop(self):
+        while True:
+            data = self._queue.get()
+            if data is None:
+                break
+            with self._clients_lock:
+                clients = list(self._clients)
+            for client in clients:
+                try:
+                    client.sendall(data)
+                except OSError:
+                    self._drop(client)
+
+    def _drop(self, client):
+        with self._clients_lock:
+            if client in self._clients:
+                self._clients.remove(client)
+        try:
+            client.close()
+        except OSError:
+            pass
+
+    def close(self):
+        self._running = False
+        self._queue.put(None)
+        if self._server is not None:
+            self._server.close()
+        with self._clients_lock:
+            clients, self._clients = self._clients, []
+        for client in clients:
+            try:
+                client.close()
+            except OSError:
+                pass
+
+
+class MemoryEventListener:
+    """
+    Receives memory change events broadcast by another process and passes
+    them to a callback. Reconnects automatically when the other side restarts.
+    """
+
+    RECONNECT_INTERVAL = 5.0
+
+    def __init__(self, callback, port, host=MEMORY_EVENTS_HOST):
+        self.callback = callback
+        self.host = host
+        self.port = port
+        self._stop = threading.Event()
+        self._socket = None
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="memory-events-listen", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        own_origin = os.getpid()
+        while not self._stop.is_set():
+            try:
+                self._socket = socket.create_connection((self.host, self.port), timeout=2.0)
+                self._socket.settimeout(None)
+                with self._socket.makefile('r', encoding='utf-8') as stream:
+                    for line in stream:
+                        if not line.strip():
+                            continue
+                        try:
+                            event, origin = decode_event(line)
+                        except (ValueError, KeyError) as e:
+                            print(f"Ignoring malformed memory event: {e}")
+                            continue
+                        if origin == own_origin:
+                            continue
+                        try:
+                            self.callback(event)
+                        except Exception as e:
+                            print(f"Error applying remote memory event: {e}")
+            except OSError:
+                pass
+            finally:
+                if self._socket is not None:
+                    try:
+                        self._socket.close()
+                    except OSError:
+                        pass
+                    self._socket = None
+            self._stop.wait(self.RECONNECT_INTERVAL)
+
+    def close(self):
+        self._stop.set()
+        if self._socket is not None:
+            try:
+                self._socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
@@ -4,14 +4,35 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, BASE_DIR)
 
 import json
+import copy
 import datetime
+import threading
+
+from memory_events import (
+    MemoryEvent, MemoryEventBus, MemoryEventBroadcaster, MemoryEventListener,
+    diff_values, apply_change
+)
+
+def _file_stamp(path):
+    try:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return None
 
 class MemoryManager:
     """
     Manages the multi-memory system: user memory, system memory, and backend memory.
     Provides methods for accessing and updating all memory stores.
+    
+    Every save publishes the changes made since the previous save as
+    MemoryEvent(store, path, old, new, version) to subscribers, and
+    optionally to other processes over a local socket.
     """
     
+    # Stores kept in sync with other processes; system memory is per process
+    REPLICATED_STORES = ('user', 'backend')
+    
     def __init__(self, memory_path, backend_memory_path=None, is_backend=False):
         self.memory_path = memory_path
         self.backend_memory_path = backend_memory_path
@@ -20,6 +41,19 @@ class MemoryManager:
         self.user_memory = {}
         self.system_memory = {}
         self.backend_memory = {}
+        
+        # Change tracking: last published copy and serialization of each store
+        self.versions = {'user': 0, 'system': 0, 'backend': 0}
+        self.events = MemoryEventBus()
+        self._shadows = {}
+        self._serialized = {}
+        self._written = {}  # What this process last wrote to each store's file
+        self._change_lock = threading.RLock()
+        # Modification stamp of each store's file when this process last read or wrote it
+        self._file_stamps = {}
+        self._broadcaster = None
+        self._listener = None
+        
         self.load_memory()
         
     def load_memory(self):
@@ -87,6 +121,9 @@ class MemoryManager:
             # Set up default memory structures
             self.user_memory = self._get_default_user_memory()
             self.system_memory = self._get_default_system_memory()
+        
+        self._reset_change_tracking()
+        self._record_file_stamps()
 
     def _get_default_user_memory(self):
         """Get the default comprehensive user memory structure"""
@@ -209,33 +246,290 @@ class MemoryManager:
 
     def save_memory(self):
         """
-        Save all memory stores to their respective files
+        Save all memory stores to their respective files and publish the changes
         """
         try:
-            # Save comprehensive user memory directly (no more combining needed)
-            # Update system_state timestamp
-            self.user_memory.setdefault("system_state", {})["last_interaction_timestamp"] = datetime.datetime.now().isoformat()
-            
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(self.memory_path), exist_ok=True)
-            
-            with open(self.memory_path, 'w') as f:
-                json.dump(self.user_memory, f, indent=2)
-            
-            # Save backend memory if applicable
-            if self.is_backend and self.backend_memory_path:
-                # Update backend state timestamp
-                self.backend_memory.setdefault("backend_state", {})["last_execution"] = datetime.datetime.now().isoformat()
+            with self._change_lock:
+                # Save comprehensive user memory directly (no more combining needed);
+                # the system_state timestamp moves only when something else changed
+                serialized = {'user': self._write_store('user', self.memory_path, "system_state", "last_interaction_timestamp")}
                 
-                os.makedirs(os.path.dirname(self.backend_memory_path), exist_ok=True)
-                with open(self.backend_memory_path, 'w') as f:
-                    json.dump(self.backend_memory, f, indent=2)
-                    
+                # Save backend memory if applicable
+                if self.is_backend and self.backend_memory_path:
+                    serialized['backend'] = self._write_store('backend', self.backend_memory_path, "backend_state", "last_execution")
+                
+                # System memory is not persisted, but its changes are still published
+                serialized['system'] = self._serialize('system')
+                events = self._collect_changes(serialized)
+                self._record_file_stamps()
+            
+            self._publish(events)
             return True
         except Exception as e:
             print(f"Error saving memory: {e}")
             return False
     
+    def _write_store(self, name, path, section, timestamp_field):
+        """
+        Write a store to its file unless it is what this process last wrote there
+        
+        The store's timestamp field is set to now only when the store changed
+        otherwise, so a save without changes writes nothing and publishes no event.
+        
+        Returns:
+            The store's serialization
+        """
+        serialized = self._serialize(name)
+        if serialized == self._written.get(name):
+            return serialized
+        self.get_store(name).setdefault(section, {})[timestamp_field] = datetime.datetime.now().isoformat()
+        serialized = self._serialize(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(serialized)
+        self._written[name] = serialized
+        return serialized
+    
+    def commit_changes(self, stores=('user', 'system', 'backend')):
+        """
+        Publish changes made to the in-memory stores without writing them to disk
+        
+        Returns:
+            List of MemoryEvent
+        """
+        with self._change_lock:
+            events = self._collect_changes({name: self._serialize(name) for name in stores})
+        self._publish(events)
+        return events
+    
+    def apply_changes(self, store, changes):
+        """
+        Apply path-level changes to a store and publish them (not written to disk)
+        
+        Args:
+            store: Store name ('user', 'system' or 'backend')
+            changes: List of (path, value) pairs; a value of MISSING deletes the path
+        
+        Returns:
+            The store's version after the changes
+        
+        Raises:
+            KeyError, IndexError, TypeError, ValueError: A path does not exist.
+            The store is left as it was before the call.
+        """
+        with self._change_lock:
+            target = self.get_store(store)
+            try:
+                for path, value in changes:
+                    apply_change(target, tuple(path), value)
+            except (KeyError, IndexError, TypeError, ValueError):
+                # Restore the touched sections from the last published copy
+                for key in {path[0] for path, _ in changes if path}:
+                    if key in self._shadows[store]:
+                        target[key] = copy.deepcopy(self._shadows[store][key])
+                    else:
+                        target.pop(key, None)
+                raise
+            events = self._collect_changes({store: self._serialize(store)})
+        self._publish(events)
+        return self.versions[store]
+    
+    def get_store(self, name):
+        """Get a memory store by name ('user', 'system' or 'backend')"""
+        stores = {'user': self.user_memory, 'system': self.system_memory, 'backend': self.backend_memory}
+        if name not in stores:
+            raise ValueError(f"Unknown memory store: {name}")
+        return stores[name]
+    
+    def _serialize(self, name):
+        """Serialize a store the way it is written to disk (system memory is never written)"""
+        if name == 'system':
+            return json.dumps(self.system_memory, default=str)
+        return json.dumps(self.get_store(name), indent=2)
+    
+    def _reset_change_tracking(self):
+        """Take the current stores as the baseline for change events"""
+        with self._change_lock:
+            for name in ('user', 'system', 'backend'):
+                self._serialized[name] = self._serialize(name)
+                self._shadows[name] = json.loads(self._serialized[name])
+    
+    def _collect_changes(self, serialized):
+        """
+        Diff each store against its copy from the previous save
+        
+        Args:
+            serialized: Current JSON serialization of each store
+        
+        Returns:
+            List of MemoryEvent
+        """
+        events = []
+        for name, text in serialized.items():
+            if text == self._serialized.get(name):
+                continue  # Unchanged since the last save
+            self._serialized[name] = text
+            shadow = json.loads(text)
+            changes = list(diff_values(self._shadows.get(name, {}), shadow))
+            self._shadows[name] = shadow
+            if not changes:
+                continue
+            self.versions[name] += 1
+            events.extend(MemoryEvent(name, path, old, new, self.versions[name]) for path, old, new in changes)
+        return events
+    
+    def _publish(self, events):
+        if not events:
+            return
+        self.events.publish(events)
+        if self._broadcaster is not None:
+            self._broadcaster.send(events)
+    
+    def subscribe(self, callback, stores=None, path_prefix=None, mode='sync'):
+        """
+        Subscribe to memory change events
+        
+        Args:
+            callback: Function called with each MemoryEvent(store, path, old, new, version).
+                      old/new are MISSING when a key was added/removed. Treat them as read-only.
+            stores: Store name or names ('user', 'system', 'backend'); all stores if None
+            path_prefix: Only changes at or below this path, e.g. 'personal_info.profile'
+            mode: 'sync' to be called during save_memory(), 'queued' to be called
+                  from a background dispatcher thread
+        
+        Returns:
+            Subscription id for unsubscribe()
+        """
+        return self.events.subscribe(callback, stores=stores, path_prefix=path_prefix, mode=mode)
+    
+    def unsubscribe(self, subscription_id):
+        """Remove a subscription created with subscribe()"""
+        return self.events.unsubscribe(subscription_id)
+    
+    def apply_event(self, event):
+        """
+        Apply a change published by another process and notify local subscribers.
+        The change is not written back to disk (its origin already saved it) and
+        is not re-broadcast.
+        """
+        if event.store not in self.REPLICATED_STORES or (event.store == 'backend' and not self.is_backend):
+            # Not held by this process: only pass it on to local subscribers
+            self.events.publish([event])
+            return
+        
+        store = self.get_store(event.store)
+        with self._change_lock:
+            try:
+                apply_change(store, event.path, copy.deepcopy(event.new))
+                apply_change(self._shadows[event.store], event.path, copy.deepcopy(event.new))
+            except (KeyError, IndexError, TypeError, ValueError):
+                # Local copy diverged: reload the store from disk and start diffing from there
+                self._reload_store(event.store)
+            self._serialized[event.store] = None
+            self.versions[event.store] = max(self.versions[event.store], event.version)
+        self.events.publish([event])
+    
+    def _store_path(self, name):
+        """File a store is saved to, or None if this process does not save it"""
+        if name == 'user':
+            return self.memory_path
+        if name == 'backend' and self.is_backend:
+            return self.backend_memory_path
+        return None
+    
+    def _record_file_stamps(self):
+        for name in self.REPLICATED_STORES:
+            path = self._store_path(name)
+            if path:
+                self._file_stamps[name] = _file_stamp(path)
+    
+    def refresh(self, stores=None):
+        """
+        Reload stores whose file another process saved since this one last read or
+        wrote it, in case its change events have not arrived (same call as
+        MemoryClient.refresh). The changes are published to local subscribers.
+        """
+        events = []
+        with self._change_lock:
+            for name in stores or self.REPLICATED_STORES:
+                path = self._store_path(name)
+                if not path:
+                    continue
+                stamp = _file_stamp(path)
+                if stamp is None or stamp == self._file_stamps.get(name):
+                    continue
+                try:
+                    with open(path, 'r') as f:
+                        data = json.load(f)
+                except (OSError, ValueError):
+                    continue  # Being written: the next refresh picks it up
+                self._file_stamps[name] = stamp
+                changes = list(diff_values(self._shadows.get(name, {}), data))
+                if not changes:
+                    continue
+                store = self.get_store(name)
+                store.clear()
+                store.update(data)
+                self._shadows[name] = copy.deepcopy(data)
+                self._serialized[name] = None
+                self.versions[name] += 1
+                events.extend(MemoryEvent(name, path, old, new, self.versions[name]) for path, old, new in changes)
+        if events:
+            self.events.publish(events)
+    
+    def snapshot(self, store='user'):
+        """
+        An up-to-date copy of a store that later changes do not affect
+        
+        Returns:
+            (version, copy): The store's version and a deep copy of it
+        """
+        self.refresh([store])
+        with self._change_lock:
+            return self.versions[store], copy.deepcopy(self.get_store(store))
+    
+    def _reload_store(self, name):
+        path = self.memory_path if name == 'user' else self.backend_memory_path
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reloading {name} memory: {e}")
+            return
+        store = self.get_store(name)
+        store.clear()
+        store.update(data)
+        self._shadows[name] = json.loads(json.dumps(store, default=str))
+    
+    def start_event_broadcaster(self, port):
+        """
+        Publish this process's memory changes to other local processes
+        
+        Returns:
+            True if the broadcaster is listening
+        """
+        try:
+            self._broadcaster = MemoryEventBroadcaster(port).start()
+            return True
+        except OSError as e:
+            print(f"Memory change broadcasting disabled (port {port}): {e}")
+            self._broadcaster = None
+            return False
+    
+    def listen_for_events(self, port):
+        """Apply memory changes broadcast by another process on the given port"""
+        if self._listener is None:
+            self._listener = MemoryEventListener(self.apply_event, port).start()
+    
+    def close_events(self):
+        """Stop cross-process event fan-out"""
+        if self._broadcaster is not None:
+            self._broadcaster.close()
+            self._broadcaster = None
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+    
     def update_user_memory(self, updates):
         """
         Update the user-facing memory with new data
@@ -324,9 +618,12 @@ class MemoryManager:
         
         self.save_memory()
         
-    def get_next_task_from_queue(self):
+    def get_next_task_from_queue(self, with_index=False):
         """
         Get the next task from the processing queue
+        
+        Args:
+            with_index: Return (queue index, task), the index being what mark_task_complete needs
         """
         if not self.is_backend:
             print("Warning: Attempting to access backend queue from frontend component")
@@ -339,9 +636,43 @@ class MemoryManager:
                     self.backend_memory["processing_queue"][i]["status"] = "in_progress"
                     self.backend_memory["processing_queue"][i]["started_at"] = datetime.datetime.now().isoformat()
                     self.save_memory()
-                    return task["task"]
+                    return (i, task["task"]) if with_index else task["task"]
         
-        return None
+        return (None, None) if with_index else None
+    
+    def get_pending_tasks(self, limit=None):
+        """
+        Get pending tasks from the processing queue without claiming them
+        
+        Returns:
+            List of (queue index, task), oldest first
+        """
+        pending = [
+            (i, entry["task"]) for i, entry in enumerate(self.backend_memory.get("processing_queue", []))
+            if entry.get("status") == "pending"
+        ]
+        return pending[:limit] if limit else pending
+    
+    def set_task_status(self, task_indexes, status):
+        """
+        Set the status of processing queue entries, e.g. claim a batch ("in_progress")
+        or give it back ("pending") when its planning was interrupted
+        """
+        if not self.is_backend:
+            print("Warning: Attempting to update backend queue from frontend component")
+            return
+        
+        queue = self.backend_memory.get("processing_queue", [])
+        now = datetime.datetime.now().isoformat()
+        for i in task_indexes:
+            if 0 <= i < len(queue):
+                queue[i]["status"] = status
+                if status == "in_progress":
+                    queue[i]["started_at"] = now
+                else:
+                    queue[i].pop("started_at", None)
+        
+        self.save_memory()
         
     def mark_task_complete(self, task_index, result):
         """
@@ -0,0 +1,179 @@
+"""
+Memory path resolution shared by the backend's function executor and the
+frontend's local read path, so both answer a retrieve_data the same way.
+"""
+
+# Simple keys stored by update_memory, mapped to the memory schema
+KEY_ALIASES = {
+    'name': 'personal_info.profile.full_name',
+    'full_name': 'personal_info.profile.full_name',
+    'age': 'personal_info.profile.age',
+    'height': 'personal_info.appearance.height',
+    'weight': 'personal_info.appearance.weight',
+    'phone': 'personal_info.contact.phone_numbers',
+    'email': 'personal_info.contact.email_addresses',
+    'address': 'personal_info.contact.mailing_address',
+    'birthday': 'personal_info.profile.date_of_birth'
+}
+
+# Common fields that might be requested without full path
+FIELD_ALIASES = {
+    "name": "personal_info.profile.full_name",
+    "full_name": "personal_info.profile.full_name",
+    "age": "personal_info.profile.age",
+    "height": "personal_info.appearance.height",
+    "weight": "personal_info.appearance.weight",
+    "phone": "personal_info.contact.phone_numbers",
+    "email": "personal_info.contact.email_addresses",
+    "address": "personal_info.contact.mailing_address",
+    "friends": "social_and_relationships.contacts",
+    "family": "social_and_relationships.family_members",
+    "tasks": "work_and_projects.tasks",
+    "health": "health_and_wellness",
+    "medical": "health_and_wellness.medical_conditions"
+}
+
+
+def retrieval_section(args):
+    """
+    The memory section a retrieve_data action asks for
+
+    Args:
+        args: The action's args; 'section', else 'path', else 'key'
+
+    Returns:
+        The section with common field names mapped to their full path, or None
+    """
+    section = args.get('section') or args.get('path') or args.get('key')
+    return FIELD_ALIASES.get(section, section)
+
+
+def _search_nested(data, section, path=""):
+    results = []
+    if isinstance(data, dict):
+        for k, v in data.items():
+            current_path = f"{path}.{k}" if path else k
+            if k == section or section.lower() in k.lower():
+                results.append((current_path, v))
+            if isinstance(v, dict):
+                results.extend(_search_nested(v, section, current_path))
+    return results
+
+
+def _search_recursive(data, query_lower, path=""):
+    matches = {}
+    if isinstance(data, dict):
+        for key_name, value in data.items():
+            current_path = f"{path}.{key_name}" if path else key_name
+            if (query_lower in key_name.lower() or
+                (isinstance(value, str) and query_lower in value.lower())):
+                matches[current_path] = value
+            elif isinstance(value, dict):
+                matches.update(_search_recursive(value, query_lower, current_path))
+            elif isinstance(value, list):
+                for i, item in enumerate(value):
+                    if isinstance(item, str) and query_lower in item.lower():
+                        matches[f"{current_path}[{i}]"] = item
+    return matches
+
+
+def _matches(item, where):
+    """True if a list item has the given field values (strings compared case-insensitively)"""
+    if not isinstance(item, dict):
+        return False
+    for field, value in where.items():
+        actual = item.get(field)
+        if isinstance(actual, str) and isinstance(value, str):
+            if actual.casefold().strip() != value.casefold().strip():
+                return False
+        elif actual != value:
+            return False
+    return True
+
+
+def read_memory(user_mem, args):
+    """
+    Answer a retrieve_data action on user memory
+
+    Args:
+        user_mem: User memory
+        args: The action's args (section/path/key, or query); 'where' ({field: value})
+              selects the matching items of a list
+
+    Returns:
+        A "memory_data" result, or an "error" result if the section is not found
+    """
+    key = args.get('key')
+    query = args.get('query')
+    where = args.get('where')
+    section = retrieval_section(args)
+
+    # Handle direct field access first (no section or with dot notation)
+    if section:
+        # If section contains dots, it's a nested path
+        if '.' in section:
+            curr = user_mem
+            for p in section.split('.'):
+                if isinstance(curr, dict) and p in curr:
+                    curr = curr[p]
+                else:
+                    return {
+                        "type": "error",
+                        "message": f"Path {section} not found in memory"
+                    }
+            if isinstance(where, dict) and isinstance(curr, list):
+                # Items of a list whose fields have the given values
+                return {
+                    "type": "memory_data",
+                    "path": section,
+                    "where": where,
+                    "data": [item for item in curr if _matches(item, where)]
+                }
+            return {
+                "type": "memory_data",
+                "path": section,
+                "data": curr
+            }
+        # Otherwise check top-level sections first
+        if section in user_mem:
+            if key and isinstance(user_mem[section], dict) and key in user_mem[section]:
+                return {
+                    "type": "memory_data",
+                    "section": section,
+                    "key": key,
+                    "data": user_mem[section][key]
+                }
+            return {
+                "type": "memory_data",
+                "section": section,
+                "data": user_mem[section]
+            }
+        # Search through all sections for the key
+        found_data = []
+        for sect_name, sect_data in user_mem.items():
+            if isinstance(sect_data, dict):
+                found_data.extend(_search_nested(sect_data, section, sect_name))
+        if found_data:
+            return {
+                "type": "memory_data",
+                "section": section,
+                "data": dict(found_data) if len(found_data) > 1 else found_data[0][1]
+            }
+        return {
+            "type": "error",
+            "message": f"Section '{section}' not found in memory"
+        }
+
+    # Search by query across all sections
+    if query:
+        return {
+            "type": "memory_data",
+            "query": query,
+            "data": _search_recursive(user_mem, query.lower())
+        }
+
+    # Return entire memory if no specific section/query
+    return {
+        "type": "memory_data",
+        "data": user_mem
+    }
@@ -0,0 +1,508 @@
+#!/usr/bin/env python3
+"""
+Memory service for the Life Assistant.
+One process owns the memory stores and serves them to the frontend and
+backend over a local socket, so neither side overwrites the other's updates.
+"""
+
+import os
+import sys
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import json
+import copy
+import socket
+import threading
+import socketserver
+from collections import deque
+
+from memory_manager import MemoryManager
+from memory_events import (
+    MemoryEvent, MemoryEventBus, MISSING, diff_values, apply_change, parse_path, encode_value, decode_value
+)
+
+# Path definitions (same files the backend uses)
+DATA_USER_DIR = os.path.join(BASE_DIR, 'data-user')
+DATA_BACKEND_DIR = os.path.join(BASE_DIR, 'data-backend')
+USER_MEMORY = os.path.join(DATA_USER_DIR, 'memory.json')
+BACKEND_MEMORY = os.path.join(DATA_BACKEND_DIR, 'backend_memory.json')
+
+MEMORY_SERVICE_HOST = '127.0.0.1'
+MEMORY_SERVICE_PORT = 47230
+SAVE_INTERVAL = 1.0        # Seconds between writes of changed stores to disk
+CHANGE_HISTORY_SIZE = 5000  # Changed paths remembered per store for conflict checks
+MAX_PUSH_ATTEMPTS = 3
+
+STORES = ('user', 'system', 'backend')
+
+
+class MemoryServiceError(Exception):
+    """The memory service rejected a request"""
+
+
+class MemoryConflictError(MemoryServiceError):
+    """A patch touched paths that changed since the version it was based on"""
+
+    def __init__(self, store, version, paths):
+        super().__init__(f"Conflicting changes to {store} memory at {paths} (now version {version})")
+        self.store = store
+        self.version = version
+        self.paths = paths
+
+
+def _paths_overlap(a, b):
+    """True if one path is a prefix of the other"""
+    depth = min(len(a), len(b))
+    return a[:depth] == b[:depth]
+
+
+def _json_copy(value):
+    return json.loads(json.dumps(value, default=str))
+
+
+class MemoryService:
+    """
+    Owns the memory stores and applies client operations to them.
+    Every store has a version number; patches name the version they were
+    computed against and are rejected if they touch paths changed since.
+    Changes are written to disk at most once per save interval.
+    """
+
+    def __init__(self, memory_path=USER_MEMORY, backend_memory_path=BACKEND_MEMORY,
+                 host=MEMORY_SERVICE_HOST, port=MEMORY_SERVICE_PORT, save_interval=SAVE_INTERVAL):
+        self.manager = MemoryManager(memory_path, backend_memory_path, is_backend=True)
+        self.host = host
+        self.port = port
+        self.save_interval = save_interval
+        self.lock = threading.RLock()
+        self.history = {store: deque(maxlen=CHANGE_HISTORY_SIZE) for store in STORES}
+        self.manager.subscribe(self._record_change)
+
+        self._dirty = False
+        self._stop = threading.Event()
+        self._server = None
+
+    def _record_change(self, event):
+        self.history[event.store].append((event.version, event.path))
+
+    def _conflicting_paths(self, store, base_version, paths):
+        """Paths of a patch that were changed by someone else after base_version"""
+        if base_version == self.manager.versions[store]:
+            return []
+        history = self.history[store]
+        if not history or history[0][0] > base_version + 1:
+            # Changes since base_version are no longer known: assume they all conflict
+            return paths
+        changed = [path for version, path in history if version > base_version]
+        return [path for path in paths if any(_paths_overlap(path, other) for other in changed)]
+
+    def handle(self, request):
+        """
+        Handle one request
+
+        Operations:
+            get: {stores: {name: since_version}} -> current value of each store
+                 newer than since_version
+            query: {store, path} -> value at a path
+            patch: {store, base_version, changes: [[path, value], ...]} -> new version and
+                   whether other changes were merged, or a conflict with the paths
+                   that changed since base_version
+            versions: -> version of every store
+            save: write changed stores to disk now
+        """
+        op = request.get('op')
+        with self.lock:
+            if op == 'get':
+                stores = {}
+                for name, since in request.get('stores', {}).items():
+                    version = self.manager.versions[name]
+                    if since == version:
+                        stores[name] = {'version': version, 'unchanged': True}
+                    else:
+                        stores[name] = {'version': version, 'value': self.manager.get_store(name)}
+                return {'stores': stores}
+
+            if op == 'query':
+                value = self.manager.get_store(request['store'])
+                for key in request.get('path', []):
+                    value = value[key]
+                return {'version': self.manager.versions[request['store']], 'value': value}
+
+            if op == 'patch':
+                store = request['store']
+                changes = [(tuple(path), decode_value(value)) for path, value in request.get('changes', [])]
+                conflicts = self._conflicting_paths(store, request.get('base_version'), [path for path, _ in changes])
+                if conflicts:
+                    return {'conflict': True, 'version': self.manager.versions[store], 'paths': conflicts}
+                merged = request.get('base_version') != self.manager.versions[store]
+                version = self.manager.apply_changes(store, changes)
+                self._dirty = True
+                # merged: other changes were made since base_version, the client must fetch them
+                return {'version': version, 'merged': merged}
+
+            if op == 'versions':
+                return {'versions': dict(self.manager.versions)}
+
+            if op == 'save':
+                self._save()
+                return {'saved': True}
+
+        raise MemoryServiceError(f"Unknown operation: {op}")
+
+    def _save(self):
+        with self.lock:
+            if self._dirty:
+                self._dirty = False
+                self.manager.save_memory()
+
+    def _save_loop(self):
+        while not self._stop.wait(self.save_interval):
+            self._save()
+
+    def serve_forever(self):
+        """Serve requests until shutdown() is called or the process is interrupted"""
+        service = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    request_id = None
+                    # Encode while holding the lock: responses reference the live stores
+                    with service.lock:
+                        try:
+                            request = json.loads(line)
+                            request_id = request.get('id')
+                            response = service.handle(request)
+                        except Exception as e:
+                            response = {'error': f"{type(e).__name__}: {e}"}
+                        response['id'] = request_id
+                        data = (json.dumps(response, default=str) + '\n').encode('utf-8')
+                    self.wfile.write(data)
+
+        class Server(socketserver.ThreadingTCPServer):
+            allow_reuse_address = True
+            daemon_threads = True
+
+        self._server = Server((self.host, self.port), Handler)
+        threading.Thread(target=self._save_loop, name="memory-service-save", daemon=True).start()
+        print(f"Memory service listening on {self.host}:{self.port}")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._stop.set()
+            self._server.server_close()
+            self._dirty = True
+            self._save()
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+
+
+class MemoryClient:
+    """
+    Proxy with the MemoryManager API backed by the memory service.
+
+    Stores are kept as local dictionaries that callers can read and modify
+    in place, as with MemoryManager. Saving sends only the paths that
+    changed since the last sync; getting a store fetches it again only if
+    the service has a newer version, and applies the difference in place so
+    references held by callers stay valid.
+    """
+
+    def __init__(self, host=MEMORY_SERVICE_HOST, port=MEMORY_SERVICE_PORT, is_backend=False, timeout=10.0):
+        self.host = host
+        self.port = port
+        self.is_backend = is_backend
+        self.timeout = timeout
+        self.memory_path = None
+        self.backend_memory_path = None
+
+        self.user_memory = {}
+        self.system_memory = {}
+        self.backend_memory = {}
+        # The frontend never holds backend memory
+        self.stores = STORES if is_backend else ('user', 'system')
+        self.versions = {store: None for store in STORES}
+        self.events = MemoryEventBus()
+        self._bases = {store: {} for store in STORES}
+        self._lock = threading.RLock()
+        self._socket = None
+        self._stream = None
+        self._next_id = 1
+
+        self._connect()
+        self.refresh()
+
+    def _connect(self):
+        self._socket = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._stream = self._socket.makefile('rwb')
+
+    def _request(self, op, **params):
+        with self._lock:
+            request_id = self._next_id
+            self._next_id += 1
+            data = (json.dumps(dict(params, op=op, id=request_id), default=str) + '\n').encode('utf-8')
+            for attempt in range(2):
+                try:
+                    if self._stream is None:
+                        self._connect()
+                    self._stream.write(data)
+                    self._stream.flush()
+                    line = self._stream.readline()
+                    if not line:
+                        raise ConnectionError("Memory service closed the connection")
+                    break
+                except OSError:
+                    # Service restarted: reconnect once
+                    self._close_socket()
+                    if attempt:
+                        raise
+            response = json.loads(line)
+            if 'error' in response:
+                raise MemoryServiceError(response['error'])
+            return response
+
+    def _close_socket(self):
+        for resource in (self._stream, self._socket):
+            if resource is not None:
+                try:
+                    resource.close()
+                except OSError:
+                    pass
+        self._stream = None
+        self._socket = None
+
+    def get_store(self, name):
+        if name not in STORES:
+            raise ValueError(f"Unknown memory store: {name}")
+        return getattr(self, f"{name}_memory")
+
+    def refresh(self, stores=None):
+        """Bring local stores up to date with the service, keeping unsaved local changes"""
+        with self._lock:
+            stores = stores or self.stores
+            response = self._request('get', stores={name: self.versions[name] for name in stores})
+            events = []
+            for name, state in response['stores'].items():
+                if state.get('unchanged'):
+                    continue
+                local = self.get_store(name)
+                fresh = state['value']
+                for path, old, new in diff_values(self._bases[name], fresh):
+                    self._apply_remote(local, fresh, path, old, new)
+                    events.append(MemoryEvent(name, path, old, new, state['version']))
+                self._bases[name] = fresh
+                self.versions[name] = state['version']
+        if events:
+            self.events.publish(events)
+
+    def _apply_remote(self, local, fresh, path, old, new):
+        """Apply a change from the service without discarding local edits elsewhere"""
+        try:
+            parent = local
+            for key in path[:-1]:
+                parent = parent[key]
+            key = path[-1]
+            if isinstance(parent, list) and old is MISSING and new is not MISSING:
+                # Items appended remotely go before items appended locally but not yet saved
+                parent.insert(key, copy.deepcopy(new))
+            elif new is MISSING:
+                if isinstance(parent, list):
+                    del parent[key]
+                else:
+                    parent.pop(key, None)
+            else:
+                parent[key] = copy.deepcopy(new)
+        except (KeyError, IndexError, TypeError):
+            # The local copy no longer has this structure: take the service's whole section
+            if path[0] in fresh:
+                local[path[0]] = copy.deepcopy(fresh[path[0]])
+            else:
+                local.pop(path[0], None)
+
+    def snapshot(self, store='user'):
+        """
+        An up-to-date copy of a store that later changes do not affect
+
+        Returns:
+            (version, copy): The service's version of the store and a deep copy of it
+        """
+        with self._lock:
+            self.refresh([store])
+            return self.versions[store], copy.deepcopy(self.get_store(store))
+
+    def query(self, store, path):
+        """
+        Get the value at a path of a store directly from the service
+
+        Args:
+            store: Store name
+            path: 'a.b.0' or a sequence of keys
+        """
+        return self._request('query', store=store, path=list(parse_path(path)))['value']
+
+    def patch(self, store, changes, base_version=None):
+        """
+        Send path-level changes to the service
+
+        Args:
+            store: Store name
+            changes: List of (path, value) pairs; MISSING deletes the path
+            base_version: Version the changes were computed against (default: local version)
+
+        Returns:
+            (version, merged): New version of the store, and whether the service
+            also holds other changes made since base_version
+
+        Raises:
+            MemoryConflictError: Some paths changed on the service since base_version
+        """
+        response = self._request(
+            'patch', store=store,
+            base_version=self.versions[store] if base_version is None else base_version,
+            changes=[[list(path), encode_value(value)] for path, value in changes]
+        )
+        if response.get('conflict'):
+            raise MemoryConflictError(store, response['version'], [tuple(path) for path in response['paths']])
+        return response['version'], response.get('merged', False)
+
+    def _push(self, name):
+        """Send unsaved local changes of one store, rebasing them on newer service data if needed"""
+        for attempt in range(MAX_PUSH_ATTEMPTS):
+            local = self.get_store(name)
+            changes = list(diff_values(self._bases[name], local))
+            if not changes:
+                return
+            try:
+                version, merged = self.patch(name, [(path, new) for path, old, new in changes])
+            except MemoryConflictError as e:
+                # Pull the other side's changes, then put ours back on top of the fields both
+                # changed (last writer wins). Appends from both sides are all kept.
+                print(f"Concurrent changes to {name} memory at {e.paths}, merging")
+                self.refresh([name])
+                for path, old, new in changes:
+                    appended = old is MISSING and isinstance(path[-1], int)
+                    if not appended and any(_paths_overlap(path, other) for other in e.paths):
+                        try:
+                            apply_change(local, path, copy.deepcopy(new))
+                        except (KeyError, IndexError, TypeError, ValueError):
+                            pass
+                continue
+            except MemoryServiceError as e:
+                # Usually a path that no longer exists on the service: resync and retry
+                print(f"Error saving {name} memory, resyncing: {e}")
+                self.refresh([name])
+                continue
+            self._bases[name] = _json_copy(local)
+            self.events.publish([MemoryEvent(name, path, old, new, version) for path, old, new in changes])
+            if merged:
+                # Fetch the other changes the service merged with ours
+                self.refresh([name])
+            else:
+                self.versions[name] = version
+            return
+        raise MemoryServiceError(f"Could not save {name} memory after {MAX_PUSH_ATTEMPTS} conflicting attempts")
+
+    def save_memory(self):
+        """
+        Send all unsaved changes to the memory service (which writes them to disk)
+        """
+        try:
+            with self._lock:
+                for name in self.stores:
+                    self._push(name)
+            return True
+        except Exception as e:
+            print(f"Error saving memory: {e}")
+            return False
+
+    def load_memory(self):
+        """Reload all stores from the memory service"""
+        with self._lock:
+            self.refresh()
+
+    def get_user_memory(self):
+        """
+        Get the user-facing memory
+        """
+        self.refresh(['user'])
+        return self.user_memory
+
+    def get_system_memory(self):
+        """
+        Get the system memory
+        """
+        self.refresh(['system'])
+        return self.system_memory
+
+    def get_backend_memory(self):
+        """
+        Get the backend-specific memory
+        """
+        if not self.is_backend:
+            print("Warning: Attempting to access backend memory from frontend component")
+        self.refresh(['backend'])
+        return self.backend_memory
+
+    def subscribe(self, callback, stores=None, path_prefix=None, mode='sync'):
+        """Subscribe to changes seen by this client (see MemoryManager.subscribe)"""
+        return self.events.subscribe(callback, stores=stores, path_prefix=path_prefix, mode=mode)
+
+    def unsubscribe(self, subscription_id):
+        return self.events.unsubscribe(subscription_id)
+
+    # The service is the only writer, so there is nothing to fan out between processes
+    def start_event_broadcaster(self, port):
+        return False
+
+    def listen_for_events(self, port):
+        pass
+
+    def close_events(self):
+        self._close_socket()
+
+
+def _synced(method):
+    """Run a MemoryManager method on up-to-date local stores"""
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            self.refresh()
+            return method(self, *args, **kwargs)
+    wrapper.__name__ = method.__name__
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+# Store operations work the same on the client's local stores; their
+# save_memory() calls send the resulting changes to the service.
+for _name in ('update_user_memory', 'update_system_memory', 'update_backend_memory',
+              'add_to_processing_queue', 'get_next_task_from_queue', 'get_pending_tasks', 'set_task_status',
+              'mark_task_complete',
+              'add_constant_task', 'get_due_constant_tasks'):
+    setattr(MemoryClient, _name, _synced(getattr(MemoryManager, _name)))
+MemoryClient._deep_update = MemoryManager._deep_update
+
+
+def connect_memory(memory_path, backend_memory_path=None, is_backend=False,
+                   host=MEMORY_SERVICE_HOST, port=MEMORY_SERVICE_PORT):
+    """
+    Get a memory manager: a client of the memory service if one is running,
+    otherwise a MemoryManager working on the files directly
+    """
+    try:
+        client = MemoryClient(host, port, is_backend=is_backend)
+        print(f"Using memory service at {host}:{port}")
+        return client
+    except OSError as e:
+        print(f"Memory service not reachable ({e}), using memory files directly")
+        return MemoryManager(memory_path, backend_memory_path, is_backend=is_backend)
+
+
+if __name__ == '__main__':
+    service = MemoryService()
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        print("\nMemory service stopped.")
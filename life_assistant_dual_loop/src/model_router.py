@@ -0,0 +1,227 @@
+import os
+import re
+import json
+import time
+import threading
+from llm_scheduler import LLMCallPreempted
+
+# Optional override of the ladders: {"frontend": [{"model": "...", "max_complexity": 0.4}, ...], ...}
+MODEL_LADDER_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'model_ladder.json')
+
+# Models per role, smallest first. A model is adequate for requests up to its max_complexity;
+# the last model of a ladder takes everything.
+DEFAULT_LADDERS = {
+    'frontend': [
+        {'model': 'llama3.2:1b', 'max_complexity': 0.35},
+        {'model': 'llama3.2', 'max_complexity': 1.0}
+    ],
+    'planner': [
+        {'model': 'llama3.2', 'max_complexity': 0.4},
+        {'model': 'deepseek-coder:latest', 'max_complexity': 1.0}
+    ]
+}
+
+EWMA_ALPHA = 0.3             # Weight of the newest observation
+MIN_SAMPLES = 3              # Observations before a model's statistics affect routing
+MIN_PARSE_SUCCESS = 0.6      # Below this a model is skipped for larger ones
+LATENCY_ADVANTAGE = 0.7      # A larger model is preferred if its latency is below this fraction
+
+PLANNING_WORDS = {
+    'plan', 'schedule', 'organize', 'organise', 'steps', 'sequence', 'project', 'budget', 'compare',
+    'analyze', 'analyse', 'research', 'prepare', 'arrange', 'itinerary', 'strategy', 'routine', 'every'
+}
+REFERENCE_WORDS = {'it', 'that', 'those', 'them', 'this', 'again', 'same', 'instead'}
+WORD_PATTERN = re.compile(r'[a-z]+')
+
+
+def classify_complexity(text='', directives=None, expected_actions=None, history_turns=0):
+    """
+    Estimate how demanding a request is for a model
+
+    Args:
+        text: The user's request (or any prompt-specific text)
+        directives: Structured directives, if already known
+        expected_actions: Number of actions the request is expected to need, if known
+        history_turns: Number of recent conversation turns the request may depend on
+
+    Returns:
+        Complexity score between 0 (trivial) and 1 (complex planning)
+    """
+    words = WORD_PATTERN.findall(str(text).lower())
+
+    if expected_actions is None:
+        if isinstance(directives, dict) and isinstance(directives.get('actions'), list):
+            expected_actions = len(directives['actions'])
+        elif isinstance(directives, list):
+            expected_actions = len(directives)
+        else:
+            # Each "and"/"then"/comma-joined clause tends to be one more action
+            expected_actions = 1 + sum(1 for word in words if word in ('and', 'then', 'also')) + str(text).count(',')
+
+    directive_size = len(json.dumps(directives, default=str)) if directives else len(str(text))
+    planning = sum(1 for word in words if word in PLANNING_WORDS)
+    references = sum(1 for word in words if word in REFERENCE_WORDS)
+
+    score = 0.0
+    score += min(directive_size / 1500.0, 1.0) * 0.3
+    score += min(max(expected_actions - 1, 0) / 4.0, 1.0) * 0.35
+    score += min(planning / 2.0, 1.0) * 0.35
+    if history_turns and references:
+        # Resolving references to earlier turns needs a more capable model
+        score += 0.1
+    return min(score, 1.0)
+
+
+def complexity_label(score):
+    if score < 0.2:
+        return 'trivial'
+    if score < 0.5:
+        return 'simple'
+    return 'complex'
+
+
+def load_ladders(path=MODEL_LADDER_FILE):
+    """Model ladders from the override file, or the defaults"""
+    ladders = dict(DEFAULT_LADDERS)
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                ladders.update(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"Error reading model ladder file, using defaults: {e}")
+    return ladders
+
+
+class ModelStats:
+    """Exponentially weighted latency and parse success of one model"""
+
+    def __init__(self):
+        self.samples = 0
+        self.latency = None
+        self.parse_success = None
+        self.unavailable = False
+
+    def record(self, latency, parsed):
+        self.samples += 1
+        success = 1.0 if parsed else 0.0
+        if self.parse_success is None:
+            self.parse_success = success
+        else:
+            self.parse_success += EWMA_ALPHA * (success - self.parse_success)
+        if latency is not None:
+            if self.latency is None:
+                self.latency = latency
+            else:
+                self.latency += EWMA_ALPHA * (latency - self.latency)
+
+    def healthy(self):
+        return self.samples < MIN_SAMPLES or self.parse_success >= MIN_PARSE_SUCCESS
+
+    def as_dict(self):
+        return {
+            'samples': self.samples,
+            'latency_s': round(self.latency, 3) if self.latency is not None else None,
+            'parse_success': round(self.parse_success, 3) if self.parse_success is not None else None,
+            'unavailable': self.unavailable
+        }
+
+
+class ModelRouter:
+    """
+    Picks a model per request from a ladder of models, smallest first.
+
+    A request goes to the smallest model adequate for its complexity. The
+    statistics kept per model adapt this: a model whose responses often fail
+    to parse is passed over, a model that is not installed is skipped for
+    the rest of the session, and a larger adequate model is used if it has
+    proven clearly faster. run() also escalates within a request when a
+    model errors or its response cannot be parsed.
+    """
+
+    # Shared by the routers of a role within the process. Parse success depends on the
+    # prompt format, so a model's statistics are kept per role.
+    _stats = {}
+    _stats_lock = threading.Lock()
+
+    def __init__(self, role, ladder=None):
+        self.role = role
+        self.ladder = ladder or load_ladders().get(role) or DEFAULT_LADDERS[role]
+
+    def _model_stats(self, model):
+        key = (self.role, model)
+        with self._stats_lock:
+            if key not in self._stats:
+                self._stats[key] = ModelStats()
+            return self._stats[key]
+
+    def candidates(self, complexity):
+        """Models adequate for a complexity, in the order they should be tried"""
+        adequate = [entry['model'] for entry in self.ladder if complexity <= entry.get('max_complexity', 1.0)]
+        adequate = adequate or [self.ladder[-1]['model']]
+        usable = [model for model in adequate if not self._model_stats(model).unavailable]
+        healthy = [model for model in usable if self._model_stats(model).healthy()]
+        ordered = healthy + [model for model in usable if model not in healthy]
+        if not ordered:
+            return [self.ladder[-1]['model']]
+
+        # A larger model that has proven clearly faster goes first
+        first = self._model_stats(ordered[0])
+        for model in ordered[1:len(healthy)]:
+            stats = self._model_stats(model)
+            if (first.latency is not None and stats.latency is not None and stats.samples >= MIN_SAMPLES
+                    and stats.latency < first.latency * LATENCY_ADVANTAGE):
+                ordered.remove(model)
+                ordered.insert(0, model)
+                break
+        return ordered
+
+    def route(self, complexity):
+        """The model to use for a request of the given complexity"""
+        return self.candidates(complexity)[0]
+
+    def record(self, model, latency, parsed):
+        """Record the outcome of a call: latency in seconds (None if it failed) and whether it parsed"""
+        self._model_stats(model).record(latency, parsed)
+
+    def run(self, complexity, call, parse=None):
+        """
+        Call the routed model, moving up the ladder on errors or unparseable responses
+
+        Args:
+            complexity: Score from classify_complexity
+            call: Function (model) -> response text
+            parse: Function (text) -> parsed value, or None if the response is unusable
+
+        Returns:
+            (text, parsed, model): parsed is None if no model produced a usable response
+
+        Raises:
+            The last model's error if every model failed
+        """
+        models = self.candidates(complexity)
+        text, parsed, error = None, None, None
+        for model in models:
+            started = time.perf_counter()
+            try:
+                text = call(model)
+            except LLMCallPreempted:
+                raise  # Not the model's fault: the caller gives way to a user request
+            except Exception as e:
+                error = e
+                if 'not found' in str(e).lower():
+                    self._model_stats(model).unavailable = True
+                else:
+                    self.record(model, None, False)
+                continue
+            latency = time.perf_counter() - started
+            parsed = parse(text) if parse else text
+            self.record(model, latency, parsed is not None)
+            if parsed is not None:
+                return text, parsed, model
+        if text is None and error is not None:
+            raise error
+        return text, None, models[-1]
+
+    def stats(self):
+        """Statistics of the models in this router's ladder"""
+        return {entry['model']: self._model_stats(entry['model']).as_dict() for entry in self.ladder}
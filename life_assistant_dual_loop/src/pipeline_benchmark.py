@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Compare the staged and single-pass pipelines on a recorded request set.
+
+For every request, each pipeline plans its actions and writes a reply with
+the real models (Ollama must be running). Actions are not executed, so
+memory and tasks are left untouched. Reported per pipeline: end-to-end
+latency (median, p95) and action accuracy against the expected action
+types (exact match of the set of types, and recall of expected types).
+
+Usage:
+    python3 src/pipeline_benchmark.py [--requests FILE] [--recorded N] [--output FILE]
+"""
+import os
+import sys
+import json
+import time
+import copy
+import argparse
+import statistics
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from user_interaction_model import UserInteractionModel
+from task_execution_model import TaskExecutionModel
+from interaction_store import get_interaction_store
+
+DEFAULT_REQUESTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_requests.json')
+USER_MEMORY = os.path.join(BASE_DIR, 'data-user', 'memory.json')
+
+
+def load_requests(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def load_recorded_requests(count):
+    """The last `count` completed turns of the interaction archive, with the actions that were executed"""
+    requests = []
+    for interaction in get_interaction_store().search(limit=count * 4):
+        actions = interaction.get('actions') or []
+        if interaction.get('status') != 'completed' or not interaction.get('user_input') or not actions:
+            continue
+        requests.append({
+            'input': interaction['user_input'],
+            'expected_actions': [action.get('type') for action in actions if isinstance(action, dict)]
+        })
+        if len(requests) == count:
+            break
+    return list(reversed(requests))
+
+
+def simulated_response(actions):
+    """Backend-style response for planned actions, as if they all succeeded"""
+    return {
+        'status': 'success',
+        'actions': [dict(type=action.get('type'), args=action.get('args', {}), result=None, success=True) for action in actions],
+        'confirmations': []
+    }
+
+
+def run_staged(user_model, task_model, request, memory):
+    thoughts, directives = user_model.process_input(request, memory)
+    _, actions, results = task_model.execute_directives(directives, "", "", "", {})
+    user_model.generate_output(results, memory, simulated_response(actions))
+    return actions
+
+
+def run_single(user_model, task_model, request, memory):
+    _, actions, draft_reply = user_model.plan_and_reply(request, memory)
+    if not draft_reply or any(action.get('type') == 'retrieve_data' for action in actions):
+        user_model.generate_output(f"Executed {len(actions)} actions.", memory, simulated_response(actions))
+    return actions
+
+
+PIPELINES = {'staged': run_staged, 'single': run_single}
+
+
+def score(expected, actions):
+    """(exact match of action type sets, recall of expected types)"""
+    predicted = [action.get('type') for action in actions if isinstance(action, dict)]
+    expected_types = set(expected)
+    recall = len(expected_types & set(predicted)) / len(expected_types) if expected_types else 1.0
+    return set(predicted) == expected_types, recall
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def run_benchmark(requests, memory):
+    user_model = UserInteractionModel()
+    task_model = TaskExecutionModel()
+    report = {}
+    for name, pipeline in PIPELINES.items():
+        latencies, exact, recalls, failures = [], 0, [], 0
+        for request in requests:
+            # Every request starts from the same memory and an empty conversation
+            user_model.history.turns = []
+            user_model.history.summary = ""
+            started = time.perf_counter()
+            try:
+                actions = pipeline(user_model, task_model, request['input'], copy.deepcopy(memory))
+            except Exception as e:
+                print(f"[{name}] {request['input']!r} failed: {e}")
+                failures += 1
+                actions = []
+            latencies.append((time.perf_counter() - started) * 1000)
+            matched, recall = score(request.get('expected_actions', []), actions)
+            exact += int(matched)
+            recalls.append(recall)
+            print(f"[{name}] {latencies[-1]:8.0f} ms  {'ok ' if matched else 'MISS'}  {request['input']}")
+
+        report[name] = {
+            'requests': len(requests),
+            'failures': failures,
+            'median_ms': round(statistics.median(latencies), 1),
+            'p95_ms': round(percentile(latencies, 0.95), 1),
+            'exact_accuracy': round(exact / len(requests), 3),
+            'action_recall': round(sum(recalls) / len(recalls), 3)
+        }
+    user_model.history.close()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare staged and single-pass pipeline latency and action accuracy")
+    parser.add_argument("--requests", default=DEFAULT_REQUESTS, help="JSON list of {input, expected_actions}")
+    parser.add_argument("--recorded", type=int, default=0,
+                        help="Use the last N completed turns from the interaction archive instead")
+    parser.add_argument("--output", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    requests = load_recorded_requests(args.recorded) if args.recorded else load_requests(args.requests)
+    if not requests:
+        print("No requests to run.")
+        return
+
+    memory = {}
+    if os.path.exists(USER_MEMORY):
+        with open(USER_MEMORY, 'r') as f:
+            memory = json.load(f)
+
+    report = run_benchmark(requests, memory)
+
+    print(f"\n{'pipeline':<10}{'median ms':>12}{'p95 ms':>12}{'exact':>10}{'recall':>10}{'failed':>8}")
+    for name, stats in report.items():
+        print(f"{name:<10}{stats['median_ms']:>12}{stats['p95_ms']:>12}{stats['exact_accuracy']:>10}"
+              f"{stats['action_recall']:>10}{stats['failures']:>8}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
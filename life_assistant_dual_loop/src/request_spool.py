@@ -0,0 +1,158 @@
+import os
+import json
+import time
+
+# One file per request and per response, so several requests can be in flight.
+# Both sides resolve the directories from this module's location. A queued
+# request is <ns>-<id>.json; the backend claims it by renaming it to .claimed
+# before it starts, so a cancel can tell a queued request from a started one.
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+REQUEST_SPOOL_DIR = os.path.join(SRC_DIR, 'requests')
+RESPONSE_SPOOL_DIR = os.path.join(SRC_DIR, 'responses')
+
+TRANSPORT_SPOOL = 'spool'   # Value of a request's "transport" field when it came through the spool
+QUEUED_SUFFIX = '.json'
+CLAIMED_SUFFIX = '.claimed'
+
+
+def _write_atomic(path, data):
+    """Write JSON so that readers never see a partial file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+        return True
+    except OSError:
+        return False
+
+
+def _request_files(spool_dir=REQUEST_SPOOL_DIR, suffix=QUEUED_SUFFIX):
+    """Queued (or claimed) request files in submission order"""
+    try:
+        names = os.listdir(spool_dir)
+    except OSError:
+        return []
+    return [os.path.join(spool_dir, name) for name in sorted(names) if name.endswith(suffix)]
+
+
+def _cancel_marker(request_id, response_dir=RESPONSE_SPOOL_DIR):
+    return os.path.join(response_dir, f"{request_id}.cancelled")
+
+
+def submit_request(request, spool_dir=REQUEST_SPOOL_DIR):
+    """
+    Queue a request for the backend
+
+    Args:
+        request: Request dict with an "id"
+    """
+    request = dict(request, transport=TRANSPORT_SPOOL)
+    # The nanosecond prefix keeps the files in submission order
+    _write_atomic(os.path.join(spool_dir, f"{time.time_ns()}-{request['id']}.json"), request)
+
+
+def cancel_request(request_id, spool_dir=REQUEST_SPOOL_DIR, response_dir=RESPONSE_SPOOL_DIR):
+    """
+    Withdraw a request, or have its response discarded if the backend already started it
+
+    Returns:
+        bool: True if the request was still queued and is now removed, False if
+        the backend had claimed it (its actions still run)
+    """
+    for path in _request_files(spool_dir):
+        if path.endswith(f"-{request_id}{QUEUED_SUFFIX}") and _remove(path):
+            return True
+    # Started: the backend drops the response when it sees the marker; a
+    # response written before the marker is taken here instead
+    marker = _cancel_marker(request_id, response_dir)
+    _write_atomic(marker, {"cancelled_at": time.time()})
+    if take_response(request_id, response_dir) is not None:
+        _remove(marker)
+    return False
+
+
+def next_request(spool_dir=REQUEST_SPOOL_DIR):
+    """Claim the oldest queued request, or None if there is none"""
+    for path in _request_files(spool_dir):
+        claimed = path[:-len(QUEUED_SUFFIX)] + CLAIMED_SUFFIX
+        try:
+            os.rename(path, claimed)
+        except OSError:
+            continue  # Withdrawn before we could claim it
+        try:
+            with open(claimed, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            _remove(claimed)  # Unreadable: nothing to answer
+    return None
+
+
+def release_claimed_requests(spool_dir=REQUEST_SPOOL_DIR):
+    """
+    Queue again the requests claimed by a backend that stopped before answering them
+
+    Returns:
+        Number of requests released
+    """
+    released = 0
+    for path in _request_files(spool_dir, CLAIMED_SUFFIX):
+        try:
+            os.rename(path, path[:-len(CLAIMED_SUFFIX)] + QUEUED_SUFFIX)
+            released += 1
+        except OSError:
+            pass
+    return released
+
+
+def discard_request(request_id, spool_dir=REQUEST_SPOOL_DIR):
+    """Remove a request from the spool once it has been handled"""
+    for suffix in (CLAIMED_SUFFIX, QUEUED_SUFFIX):
+        for path in _request_files(spool_dir, suffix):
+            if path.endswith(f"-{request_id}{suffix}"):
+                _remove(path)
+
+
+def complete_request(request, response, spool_dir=REQUEST_SPOOL_DIR, response_dir=RESPONSE_SPOOL_DIR):
+    """Publish the response to a spooled request and remove the request"""
+    _write_atomic(os.path.join(response_dir, f"{request['id']}.json"), response)
+    # Checked after writing: a cancel either sees the response or left its marker first
+    marker = _cancel_marker(request['id'], response_dir)
+    if os.path.exists(marker):
+        _remove(os.path.join(response_dir, f"{request['id']}.json"))
+        _remove(marker)
+    discard_request(request['id'], spool_dir)
+
+
+def take_response(request_id, response_dir=RESPONSE_SPOOL_DIR):
+    """
+    Collect the backend's response to a request
+
+    Returns:
+        The response, removed from the spool, or None if it is not there yet
+    """
+    path = os.path.join(response_dir, f"{request_id}.json")
+    try:
+        with open(path, 'r') as f:
+            response = json.load(f)
+    except (OSError, ValueError):
+        return None
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+    return response
+
+
+def spool_stamp(spool_dir=REQUEST_SPOOL_DIR):
+    """Changes whenever a request is added to or removed from the spool"""
+    try:
+        stat = os.stat(spool_dir)
+        return stat.st_mtime_ns, len(os.listdir(spool_dir))
+    except OSError:
+        return None
@@ -0,0 +1,189 @@
+import re
+import time
+import threading
+from collections import OrderedDict
+
+MAX_ENTRIES = 256
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Words that carry no meaning for a lookup ("what's my height" -> "height")
+STOPWORDS = {
+    'a', 'an', 'the', 'of', 'to', 'for', 'in', 'on', 'at', 'about', 'and', 'or',
+    'i', 'im', 'me', 'my', 'mine', 'myself', 'you', 'your', 'we', 'our',
+    'is', 'am', 'are', 'was', 'were', 'be', 'do', 'does', 'did', 'have', 'has', 'got',
+    'what', 'whats', 'which', 'who', 'whos', 'how', 'hows', 'when', 'where', 'wheres',
+    'can', 'could', 'would', 'will', 'please', 'tell', 'show', 'give', 'know', 'again',
+    'current', 'currently', 'saved', 'stored', 's'
+}
+
+# Words for the same memory field, mapped to one concept ("how tall am I" -> "height")
+CONCEPTS = {
+    'tall': 'height', 'height': 'height',
+    'old': 'age', 'age': 'age',
+    'weigh': 'weight', 'weight': 'weight', 'heavy': 'weight',
+    'born': 'birthday', 'birth': 'birthday', 'birthday': 'birthday', 'birthdate': 'birthday',
+    'called': 'name', 'name': 'name',
+    'live': 'address', 'address': 'address', 'home': 'address',
+    'phone': 'phone', 'number': 'phone', 'mobile': 'phone',
+    'email': 'email', 'mail': 'email',
+    'friend': 'friends', 'friends': 'friends', 'contacts': 'friends',
+    'family': 'family', 'relatives': 'family',
+    'task': 'tasks', 'tasks': 'tasks', 'todo': 'tasks', 'todos': 'tasks',
+    'health': 'health', 'medical': 'medical', 'conditions': 'medical'
+}
+
+# Requests with these words change something, so they are never answered from the cache
+WRITE_WORDS = {
+    'set', 'update', 'change', 'add', 'remove', 'delete', 'forget', 'save', 'store',
+    'record', 'note', 'put', 'mark', 'complete', 'schedule', 'remind', 'cancel', 'now', 'remember'
+}
+
+# User memory rewritten on every request; answers that read all of memory ignore it
+BOOKKEEPING_PATHS = (('last_interaction',), ('system_state',), ('assistant_memory',))
+
+
+def normalize_input(text):
+    """
+    Canonical terms of a request: lowercase words without stopwords, with
+    words for the same field mapped to one concept, sorted
+
+    Returns:
+        Tuple of terms; empty if nothing meaningful is left
+    """
+    words = WORD_PATTERN.findall(str(text).lower().replace("'", ""))
+    terms = set()
+    for word in words:
+        if word in STOPWORDS:
+            continue
+        terms.add(CONCEPTS.get(word, CONCEPTS.get(word.rstrip('s'), word)))
+    return tuple(sorted(terms))
+
+
+def _paths_overlap(a, b):
+    """True if one path is a prefix of the other"""
+    depth = min(len(a), len(b))
+    return a[:depth] == b[:depth]
+
+
+def result_paths(result):
+    """
+    Memory paths a retrieve_data result depends on
+
+    Args:
+        result: A result from memory_paths.read_memory
+
+    Returns:
+        Tuple of paths; () stands for the whole of user memory (a section or a
+        query searched across memory)
+    """
+    if result.get('path'):
+        return (tuple(result['path'].split('.')),)
+    return ((),)
+
+
+class CacheEntry:
+    def __init__(self, terms, reply, paths, version):
+        self.terms = terms
+        self.reply = reply
+        self.paths = paths
+        self.version = version
+        self.hits = 0
+        self.created = time.time()
+
+
+class ResponseCache:
+    """
+    Replies to memory lookups, reused for the same question in other words.
+
+    A request is keyed by its normalized terms, so rephrasing (stopwords,
+    words for the same field) still hits, while any other name, number or
+    content word misses: a near match would be another person's answer.
+    Each entry records the memory paths its answer was read from
+    and is dropped as soon as a change event touches one of them, so an
+    answer is never served after the data behind it changed.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self._lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def attach(self, memory_manager):
+        """Drop entries when the user memory they were read from changes"""
+        memory_manager.subscribe(self._on_memory_change, stores='user')
+
+    def _on_memory_change(self, event):
+        path = tuple(event.path)
+        bookkeeping = any(_paths_overlap(path, ignored) and len(path) >= len(ignored) for ignored in BOOKKEEPING_PATHS)
+        with self._lock:
+            stale = [
+                key for key, entry in self.entries.items()
+                if any(_paths_overlap(path, dependency) and (dependency or not bookkeeping) for dependency in entry.paths)
+            ]
+            for key in stale:
+                del self.entries[key]
+            self.invalidations += len(stale)
+
+    @staticmethod
+    def cacheable(text):
+        """False for requests that may change something"""
+        return not any(word in WRITE_WORDS for word in WORD_PATTERN.findall(str(text).lower()))
+
+    def lookup(self, text):
+        """
+        The cached reply to a request, or None
+
+        Returns:
+            CacheEntry or None
+        """
+        terms = normalize_input(text)
+        if not terms or not self.cacheable(text):
+            return None
+        with self._lock:
+            entry = self.entries.get(terms)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(terms)
+            entry.hits += 1
+            self.hits += 1
+            return entry
+
+    def store(self, text, reply, results, version=None):
+        """
+        Cache the reply to a memory lookup
+
+        Args:
+            text: The user's request
+            reply: The reply shown to the user
+            results: The retrieve_data results the reply was written from
+            version: User memory version the results were read at
+        """
+        terms = normalize_input(text)
+        if not terms or not reply or not self.cacheable(text):
+            return
+        paths = []
+        for result in results:
+            if not isinstance(result, dict) or result.get('type') != 'memory_data':
+                return  # Failed lookups are not cached
+            paths.extend(result_paths(result))
+        with self._lock:
+            self.entries[terms] = CacheEntry(terms, reply, tuple(paths), version)
+            self.entries.move_to_end(terms)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'invalidations': self.invalidations
+            }
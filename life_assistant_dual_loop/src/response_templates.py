@@ -0,0 +1,119 @@
+import threading
+
+# Actions whose result can be reported without a model call
+CONFIRMATION_ACTIONS = (
+    'update_memory', 'append_to_list', 'remove_from_list', 'update_nested',
+    'add_task', 'complete_task', 'create_task_sequence', 'add_subtask'
+)
+MAX_LIST_VALUES = 10      # Longer retrieved lists go to the model
+MAX_VALUE_CHARS = 200     # Longer retrieved values go to the model
+
+
+def _label(path):
+    """Readable name of the last path segment ('personal_info.profile.full_name' -> 'full name')"""
+    return str(path).split('.')[-1].replace('_', ' ').strip()
+
+
+def _is_scalar(value):
+    return isinstance(value, (str, int, float, bool)) or value is None
+
+
+def _join(values):
+    values = [str(value) for value in values]
+    if len(values) > 1:
+        return ', '.join(values[:-1]) + ' and ' + values[-1]
+    return values[0] if values else ''
+
+
+def render_retrieved_value(result):
+    """
+    Phrase a retrieve_data result holding a single value or a short list of values
+
+    Returns:
+        Response text, or None if the result needs the model
+    """
+    if not isinstance(result, dict) or result.get('type') != 'memory_data':
+        return None
+    path = result.get('path') or result.get('key') or result.get('section')
+    if not path or result.get('query'):
+        return None
+
+    label = _label(path)
+    data = result.get('formatted_data', result.get('data'))
+    if data is None or data == '' or data == [] or data == {}:
+        return f"I don't have your {label} saved yet."
+    if isinstance(data, list):
+        if len(data) > MAX_LIST_VALUES or not all(_is_scalar(item) for item in data):
+            return None
+        verb = 'is' if len(data) == 1 else 'are'
+        return f"Your {label} {verb} {_join(data)}."
+    if not _is_scalar(data) or len(str(data)) > MAX_VALUE_CHARS:
+        return None
+    if isinstance(data, bool):
+        data = 'yes' if data else 'no'
+    return f"Your {label} is {data}."
+
+
+class ResponseRenderer:
+    """
+    Renders the final reply from templates when the outcome of a request is
+    fully determined by its actions: every action succeeded and is either a
+    memory/task update with a confirmation, or a single retrieval of a
+    simple value. Anything else (errors, several retrievals, structured
+    data) is left to the model. Counts how often each path is taken.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.templated = 0
+        self.llm = 0
+
+    def render(self, full_response):
+        """
+        Render the reply for a backend response from templates
+
+        Args:
+            full_response: Backend response with 'actions' (executed actions)
+                           and 'confirmations' (from generate_memory_confirmations)
+
+        Returns:
+            Response text, or None if the model should write the reply
+        """
+        text = self._render(full_response)
+        with self._lock:
+            if text is None:
+                self.llm += 1
+            else:
+                self.templated += 1
+        return text
+
+    def _render(self, full_response):
+        if not isinstance(full_response, dict) or full_response.get('status') == 'error':
+            return None
+        actions = full_response.get('actions') or []
+        if not actions or not all(action.get('success') for action in actions):
+            return None
+
+        if len(actions) == 1 and actions[0].get('type') == 'retrieve_data':
+            return render_retrieved_value(actions[0].get('result'))
+
+        if not all(action.get('type') in CONFIRMATION_ACTIONS for action in actions):
+            return None
+        confirmations = [
+            confirmation.lstrip('✓ ').strip() for confirmation in full_response.get('confirmations') or []
+        ]
+        # Every action must have been confirmed, or the reply would leave something out
+        if len(confirmations) != len(actions):
+            return None
+        if len(confirmations) == 1:
+            return f"Done. {confirmations[0]}."
+        return "Done:\n" + ''.join(f"- {confirmation}\n" for confirmation in confirmations).rstrip()
+
+    def counts(self):
+        with self._lock:
+            total = self.templated + self.llm
+            return {
+                'templated': self.templated,
+                'llm': self.llm,
+                'templated_fraction': round(self.templated / total, 3) if total else 0.0
+            }
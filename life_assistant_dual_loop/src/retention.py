@@ -0,0 +1,211 @@
+import os
+import json
+import gzip
+import datetime
+import threading
+
+ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data-backend', 'archive')
+
+# How long entries of the lists and maps that grow with every request stay in
+# memory. Older entries, and the oldest beyond max_count, are moved to the
+# archive. Entries not matching 'when' are never evicted; a rule with
+# 'unless_any' is skipped while any entry matches it (processing queue
+# indexes are held by batches in progress, and eviction would shift them;
+# entries left in progress by an interrupted run are reset at backend startup).
+RETENTION_RULES = [
+    {
+        'store': 'backend',
+        'path': 'execution_history',
+        'max_count': 500,
+        'max_age_days': 90,
+        'time_fields': ('completed_at', 'added_at')
+    },
+    {
+        'store': 'backend',
+        'path': 'processing_queue',
+        'max_count': 100,
+        'max_age_days': 7,
+        'time_fields': ('completed_at', 'added_at'),
+        'when': {'status': 'completed'},
+        'unless_any': {'status': 'in_progress'}
+    },
+    {
+        'store': 'backend',
+        'path': 'multi_cycle_tasks.completed_sequences',
+        'max_count': 100,
+        'max_age_days': 180,
+        'time_fields': ('finished_at', 'created_at')
+    },
+    {
+        'store': 'user',
+        'path': 'assistant_memory.user_feedback',
+        'max_count': 200,
+        'max_age_days': 365,
+        'time_fields': ('timestamp', 'created_at', 'date')
+    }
+]
+
+
+def _parse_time(value):
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        moment = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return moment.replace(tzinfo=None) if moment.tzinfo is None else moment.astimezone().replace(tzinfo=None)
+
+
+def _matches(entry, fields):
+    return isinstance(entry, dict) and all(entry.get(field) == value for field, value in fields.items())
+
+
+class RetentionEngine:
+    """
+    Applies RETENTION_RULES to user and backend memory.
+
+    Evicted entries are appended to gzip-compressed JSON lines files, one per
+    path and day (the entry's own date), under data-backend/archive, so
+    memory stays bounded however long the assistant runs while old entries
+    can still be searched with search_archive().
+    """
+
+    def __init__(self, memory_manager, rules=None, archive_dir=None):
+        self._lock = threading.Lock()
+        self.memory_manager = memory_manager
+        self.rules = rules or RETENTION_RULES
+        self.archive_dir = archive_dir or ARCHIVE_DIR
+        self.runs = 0
+        self.evicted = {}
+        self.last_run = None
+
+    def _container(self, rule):
+        memory = self.memory_manager.get_backend_memory() if rule['store'] == 'backend' else self.memory_manager.get_user_memory()
+        *parents, name = rule['path'].split('.')
+        for part in parents:
+            memory = memory.get(part) if isinstance(memory, dict) else None
+        if not isinstance(memory, dict) or not isinstance(memory.get(name), (list, dict)):
+            return None, None
+        return memory, name
+
+    def _entry_time(self, rule, entry):
+        if isinstance(entry, dict):
+            for field in rule.get('time_fields', ()):
+                moment = _parse_time(entry.get(field))
+                if moment is not None:
+                    return moment
+        return None
+
+    def _evictions(self, rule, entries, now):
+        """Keys (list positions or map keys) of the entries a rule evicts, oldest first"""
+        if rule.get('unless_any') and any(_matches(entry, rule['unless_any']) for _, entry in entries):
+            return []
+        candidates = [(key, entry) for key, entry in entries if not rule.get('when') or _matches(entry, rule['when'])]
+        times = {key: self._entry_time(rule, entry) for key, entry in candidates}
+        evicted = set()
+        if rule.get('max_age_days') is not None:
+            cutoff = now - datetime.timedelta(days=rule['max_age_days'])
+            evicted.update(key for key, moment in times.items() if moment is not None and moment < cutoff)
+        if rule.get('max_count') is not None:
+            # Oldest first; entries without a time count as older than any dated one
+            kept = sorted((key for key, _ in candidates if key not in evicted), key=lambda key: times[key] or datetime.datetime.min)
+            evicted.update(kept[:max(len(kept) - rule['max_count'], 0)])
+        return [key for key, _ in entries if key in evicted]
+
+    def _archive(self, rule, evicted, now):
+        """Append evicted entries to their day's archive file"""
+        directory = os.path.join(self.archive_dir, rule['store'], rule['path'])
+        os.makedirs(directory, exist_ok=True)
+        by_day = {}
+        for key, entry in evicted:
+            moment = self._entry_time(rule, entry) or now
+            by_day.setdefault(moment.date().isoformat(), []).append({
+                "archived_at": now.isoformat(),
+                "key": key,
+                "entry": entry
+            })
+        for day, records in by_day.items():
+            # Each run adds a gzip member; readers see the members as one stream
+            with gzip.open(os.path.join(directory, f"{day}.jsonl.gz"), 'at', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, default=str) + '\n')
+
+    def apply(self, now=None):
+        """
+        Evict and archive entries past their retention, saving memory once
+
+        Returns:
+            {path: number of entries evicted}
+        """
+        now = now or datetime.datetime.now()
+        counts = {}
+        with self._lock:
+            for rule in self.rules:
+                parent, name = self._container(rule)
+                if parent is None:
+                    continue
+                container = parent[name]
+                entries = list(container.items()) if isinstance(container, dict) else list(enumerate(container))
+                keys = self._evictions(rule, entries, now)
+                if not keys:
+                    continue
+                evicted_keys = set(keys)
+                # Archive before removing, so a failed write loses nothing
+                self._archive(rule, [(key if isinstance(container, dict) else None, container[key]) for key in keys], now)
+                if isinstance(container, dict):
+                    for key in keys:
+                        del container[key]
+                else:
+                    container[:] = [entry for position, entry in enumerate(container) if position not in evicted_keys]
+                counts[rule['path']] = len(keys)
+                self.evicted[rule['path']] = self.evicted.get(rule['path'], 0) + len(keys)
+            self.runs += 1
+            self.last_run = now.isoformat()
+        if counts:
+            self.memory_manager.save_memory()
+        return counts
+
+    def stats(self):
+        with self._lock:
+            return {
+                'runs': self.runs,
+                'last_run': self.last_run,
+                'evicted': dict(self.evicted)
+            }
+
+
+def search_archive(path, query=None, start=None, end=None, limit=50, rules=None, archive_dir=None):
+    """
+    Archived entries of a memory path, newest day first
+
+    Args:
+        path: Memory path of a rule ('execution_history', ...)
+        query: Only entries whose JSON contains this text (case-insensitive)
+        start: First day (date, datetime or ISO string)
+        end: End of the range, exclusive (a datetime after midnight includes its day)
+
+    Returns:
+        List of {"archived_at", "key", "entry"}
+    """
+    rule = next((rule for rule in rules or RETENTION_RULES if rule['path'] == path), None)
+    if rule is None:
+        raise ValueError(f"No retention rule for {path}")
+    directory = os.path.join(archive_dir or ARCHIVE_DIR, rule['store'], rule['path'])
+    if not os.path.isdir(directory):
+        return []
+    if isinstance(end, datetime.datetime) and end.time() != datetime.time():
+        end = end.date() + datetime.timedelta(days=1)
+    start = str(start)[:10] if start else None
+    end = str(end)[:10] if end else None
+    query = query.lower() if query else None
+    results = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        day = name[:10]
+        if not name.endswith('.jsonl.gz') or (start and day < start) or (end and day >= end):
+            continue
+        with gzip.open(os.path.join(directory, name), 'rt', encoding='utf-8') as f:
+            records = [json.loads(line) for line in f if not query or query in line.lower()]
+        results.extend(reversed(records))
+        if len(results) >= limit:
+            break
+    return results[:limit]
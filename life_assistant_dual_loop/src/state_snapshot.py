@@ -0,0 +1,255 @@
+import os
+import json
+import time
+import struct
+from multiprocessing import shared_memory
+
+SNAPSHOT_SEGMENT_NAME = 'life_assistant_state'
+SNAPSHOT_SEGMENT_SIZE = 4 * 1024 * 1024
+
+# Segment layout: sequence counter (u64), payload length (u32), flags (u32), JSON payload
+HEADER = struct.Struct('<QII')
+SEQUENCE = struct.Struct('<Q')
+FLAGS_OFFSET = 12
+FLAG_CLOSED = 1  # Set by the publisher on shutdown so readers re-attach to the next backend
+
+# Queue entries beyond this are summarised only by their status counts
+MAX_SNAPSHOT_QUEUE_ENTRIES = 2000
+
+
+def _attach_segment(name):
+    """Attach to an existing segment without letting this process's resource tracker unlink it on exit"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 has no track flag: unregister manually on POSIX
+        segment = shared_memory.SharedMemory(name=name)
+        if os.name == 'posix':
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(segment._name, 'shared_memory')
+            except Exception:
+                pass
+        return segment
+
+
+def build_state_snapshot(backend_memory, system_memory=None, max_queue_entries=MAX_SNAPSHOT_QUEUE_ENTRIES):
+    """
+    Build the compact monitor view of backend state: queue, sequences and stats
+
+    Args:
+        backend_memory: Backend memory dictionary
+        system_memory: Optional system memory for cycle statistics
+        max_queue_entries: Most recent queue entries to include
+
+    Returns:
+        JSON-serialisable snapshot dictionary
+    """
+    queue = backend_memory.get('processing_queue', [])
+    queue_counts = {}
+    for entry in queue:
+        status = entry.get('status', 'pending')
+        queue_counts[status] = queue_counts.get(status, 0) + 1
+
+    compact_queue = []
+    for entry in queue[-max_queue_entries:] if max_queue_entries else []:
+        task = entry.get('task', {})
+        if not isinstance(task, dict):
+            task = {'description': str(task)}
+        compact_queue.append({
+            'id': task.get('id', ''),
+            'description': task.get('description', 'No description'),
+            'priority': task.get('priority', 'medium'),
+            'status': entry.get('status', 'pending'),
+            'added_at': entry.get('added_at'),
+            'subtasks': task.get('subtasks', [])
+        })
+
+    multi_cycle = backend_memory.get('multi_cycle_tasks', {})
+    active_sequences = {}
+    for seq_id, sequence in multi_cycle.get('active_sequences', {}).items():
+        active_sequences[seq_id] = {
+            'name': sequence.get('name'),
+            'description': sequence.get('description', ''),
+            'tasks': sequence.get('tasks', []),
+            'status': sequence.get('status', 'pending'),
+            'priority': sequence.get('priority', 'medium'),
+            'current_task_index': sequence.get('current_task_index', 0),
+            'failed_count': len(sequence.get('failed_tasks', []))
+        }
+
+    backend_state = backend_memory.get('backend_state', {})
+    return {
+        'processing_queue': compact_queue,
+        'constant_tasks': backend_memory.get('constant_tasks', []),
+        'next_cycle_plan': backend_memory.get('next_cycle_plan', []),
+        'multi_cycle_tasks': {
+            'active_sequences': active_sequences,
+            'current_sequence_id': multi_cycle.get('current_sequence_id'),
+            'completed_count': len(multi_cycle.get('completed_sequences', {}))
+        },
+        'stats': {
+            'queue_length': len(queue),
+            'queue_counts': queue_counts,
+            'execution_count': backend_state.get('execution_count', 0),
+            'last_execution': backend_state.get('last_execution'),
+            'cycles_completed': (system_memory or {}).get('system', {}).get('cycles_completed', 0)
+        }
+    }
+
+
+class SnapshotPublisher:
+    """
+    Publishes versioned state snapshots into a shared memory segment.
+    Writes are guarded by a seqlock: the sequence counter is odd while a
+    write is in progress and even once the payload is consistent.
+    """
+
+    def __init__(self, name=SNAPSHOT_SEGMENT_NAME, size=SNAPSHOT_SEGMENT_SIZE):
+        self.name = name
+        try:
+            self.segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left over from a previous backend run: reuse it if it is big enough
+            self.segment = _attach_segment(name)
+            if self.segment.size < size:
+                self.segment.close()
+                self.segment.unlink()
+                self.segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.sequence = SEQUENCE.unpack_from(self.segment.buf, 0)[0]
+        if self.sequence % 2:
+            self.sequence += 1
+        self._last_payload = None
+
+    @property
+    def version(self):
+        return self.sequence // 2
+
+    def publish(self, snapshot):
+        """
+        Publish a snapshot if it differs from the last one
+
+        Returns:
+            bool: True if a new version was written
+        """
+        capacity = self.segment.size - HEADER.size
+        max_entries = len(snapshot.get('processing_queue', []))
+        payload = json.dumps(snapshot, separators=(',', ':'), default=str).encode('utf-8')
+        while len(payload) > capacity and max_entries > 0:
+            # Too big for the segment: keep only the most recent queue entries
+            max_entries //= 2
+            snapshot = dict(snapshot, processing_queue=snapshot['processing_queue'][-max_entries:] if max_entries else [])
+            payload = json.dumps(snapshot, separators=(',', ':'), default=str).encode('utf-8')
+        if len(payload) > capacity:
+            raise ValueError(f"State snapshot of {len(payload)} bytes does not fit in {capacity} bytes")
+
+        if payload == self._last_payload:
+            return False
+
+        buf = self.segment.buf
+        self.sequence += 1  # odd: write in progress
+        SEQUENCE.pack_into(buf, 0, self.sequence)
+        buf[HEADER.size:HEADER.size + len(payload)] = payload
+        struct.pack_into('<I', buf, SEQUENCE.size, len(payload))
+        struct.pack_into('<I', buf, FLAGS_OFFSET, 0)
+        self.sequence += 1  # even: consistent
+        SEQUENCE.pack_into(buf, 0, self.sequence)
+
+        self._last_payload = payload
+        return True
+
+    def close(self, unlink=True):
+        try:
+            struct.pack_into('<I', self.segment.buf, FLAGS_OFFSET, FLAG_CLOSED)
+            self.segment.close()
+            if unlink:
+                self.segment.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SnapshotReader:
+    """
+    Reads state snapshots published by the backend without touching the
+    memory files. Checking for a new version only reads the segment header.
+    """
+
+    ATTACH_RETRY_INTERVAL = 5.0
+    READ_RETRIES = 100
+
+    def __init__(self, name=SNAPSHOT_SEGMENT_NAME):
+        self.name = name
+        self.segment = None
+        self.sequence = None
+        self.snapshot = None
+        self._last_attach_attempt = 0
+
+    @property
+    def attached(self):
+        return self.segment is not None
+
+    @property
+    def version(self):
+        return self.sequence // 2 if self.sequence is not None else None
+
+    def _ensure_attached(self):
+        if self.segment is not None:
+            return True
+        now = time.monotonic()
+        if now - self._last_attach_attempt < self.ATTACH_RETRY_INTERVAL:
+            return False
+        self._last_attach_attempt = now
+        try:
+            self.segment = _attach_segment(self.name)
+            return True
+        except (FileNotFoundError, OSError):
+            return False
+
+    def read_if_changed(self):
+        """
+        Get the latest snapshot if a newer version was published since the last read
+
+        Returns:
+            Snapshot dictionary, or None if unchanged or no publisher is running
+        """
+        if not self._ensure_attached():
+            return None
+
+        buf = self.segment.buf
+        if struct.unpack_from('<I', buf, FLAGS_OFFSET)[0] & FLAG_CLOSED:
+            # The backend shut down: look for the next one's segment
+            self.close()
+            self.sequence = None
+            self.snapshot = None
+            return None
+
+        for attempt in range(self.READ_RETRIES):
+            before = SEQUENCE.unpack_from(buf, 0)[0]
+            if before == self.sequence or before == 0:
+                return None
+            if before % 2:
+                # Writer is mid-update
+                time.sleep(0.001 if attempt > 10 else 0)
+                continue
+            length = struct.unpack_from('<I', buf, SEQUENCE.size)[0]
+            payload = bytes(buf[HEADER.size:HEADER.size + length])
+            after = SEQUENCE.unpack_from(buf, 0)[0]
+            if before != after:
+                continue  # Torn read: retry
+            try:
+                self.snapshot = json.loads(payload)
+            except ValueError:
+                continue
+            self.sequence = before
+            return self.snapshot
+        return None
+
+    def read(self):
+        """Get the latest snapshot, reusing the cached copy if nothing changed"""
+        self.read_if_changed()
+        return self.snapshot
+
+    def close(self):
+        if self.segment is not None:
+            self.segment.close()
+            self.segment = None
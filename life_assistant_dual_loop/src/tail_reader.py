@@ -0,0 +1,98 @@
+import os
+
+DEFAULT_BLOCK_SIZE = 8192
+
+
+def tail_lines(path, n, block_size=DEFAULT_BLOCK_SIZE, encoding='utf-8'):
+    """
+    Read the last n lines of a file by reading blocks backwards from EOF.
+    Cost depends on n and line length, not on the size of the file.
+
+    Returns:
+        List of lines without trailing newlines (empty if the file is missing)
+    """
+    if n <= 0:
+        return []
+    try:
+        f = open(path, 'rb')
+    except OSError:
+        return []
+
+    with f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b''
+        # n lines need n newlines before them, plus possibly a trailing newline
+        while position > 0 and data.count(b'\n') <= n:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            data = f.read(read_size) + data
+
+    lines = data.decode(encoding, errors='replace').splitlines()
+    if position > 0:
+        # The first line is probably cut in the middle
+        lines = lines[1:]
+    return lines[-n:]
+
+
+class FileFollower:
+    """
+    Follow a growing log file by byte offset, like `tail -F`.
+    Detects rotation (the path now points at a different inode) and
+    truncation (the file shrank below the current offset) and restarts
+    from the beginning of the new file.
+    """
+
+    def __init__(self, path, start_at_end=True, encoding='utf-8'):
+        self.path = path
+        self.encoding = encoding
+        self._identity = None
+        self._offset = 0
+        self._partial = b''
+
+        stat = self._stat()
+        if stat is not None:
+            self._identity = (stat.st_dev, stat.st_ino)
+            self._offset = stat.st_size if start_at_end else 0
+
+    def _stat(self):
+        try:
+            return os.stat(self.path)
+        except OSError:
+            return None
+
+    def read_new_lines(self):
+        """
+        Read complete lines appended since the last call
+
+        Returns:
+            List of new lines without trailing newlines
+        """
+        stat = self._stat()
+        if stat is None:
+            return []
+
+        identity = (stat.st_dev, stat.st_ino)
+        if identity != self._identity or stat.st_size < self._offset:
+            # Rotated or truncated: start over on the new file
+            self._identity = identity
+            self._offset = 0
+            self._partial = b''
+
+        if stat.st_size == self._offset:
+            return []
+
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(self._offset)
+                data = f.read(stat.st_size - self._offset)
+        except OSError:
+            return []
+
+        self._offset += len(data)
+        data = self._partial + data
+        lines = data.split(b'\n')
+        # Keep an incomplete last line until its newline arrives
+        self._partial = lines.pop()
+        return [line.decode(self.encoding, errors='replace').rstrip('\r') for line in lines]
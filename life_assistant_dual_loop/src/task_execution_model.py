@@ -1,12 +1,16 @@
+import re
 import json
 import http.client  # Built-in HTTP client
 import os
 import sys
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, BASE_DIR)
+from model_router import ModelRouter, classify_complexity
+from llm_scheduler import INTERACTIVE, BACKGROUND, LLMCallPreempted
+from user_interaction_model import extract_json_object
 
 OLLAMA_URL = 'http://localhost:11434/api/generate'
-MODEL = 'deepseek-coder:latest'  # Using Deepseek Coder R1 for backend execution
+MODEL = 'deepseek-coder:latest'  # Default planning model; ModelRouter picks per request from the 'planner' ladder
 DEFAULT_TASKS_FILE = os.path.join(BASE_DIR, 'data-backend', 'tasks.md')
 
 class TaskExecutionModel:
@@ -15,7 +19,16 @@ class TaskExecutionModel:
     Generates concrete actions based on directives from the user interaction model.
     """
     
-    def execute_directives(self, directives, plan, tasks=None, cron=None, system_memory=None):
+    def __init__(self, scheduler=None):
+        """
+        Args:
+            scheduler: Optional LLMScheduler; calls then go through its interactive/background lanes
+        """
+        # Only complex planning goes to the large model
+        self.router = ModelRouter('planner')
+        self.scheduler = scheduler
+    
+    def execute_directives(self, directives, plan, tasks=None, cron=None, system_memory=None, lane=INTERACTIVE):
         """
         Process directives from the user interaction model and determine actions
         
@@ -25,9 +38,13 @@ class TaskExecutionModel:
             tasks: Current tasks
             cron: Current cron tasks (not used in simplified version)
             system_memory: System memory for context
+            lane: Scheduler lane, INTERACTIVE for user requests or BACKGROUND
             
         Returns:
             (thoughts, actions, results): Model thoughts, planned actions, and execution results
+            
+        Raises:
+            LLMCallPreempted: A background call was aborted for a user request
         """
         if tasks is None:
             with open(DEFAULT_TASKS_FILE, 'r') as f:
@@ -36,14 +53,42 @@ class TaskExecutionModel:
         # Build the execution prompt
         prompt = self.build_execution_prompt(directives, plan, tasks, cron, system_memory)
         
-        # Query Deepseek Coder R1
+        # Query the routed model, moving to a larger one if no actions can be parsed
+        complexity = classify_complexity(directives.get('request', '') if isinstance(directives, dict) else '', directives=directives)
         try:
-            response = self.query_ollama(prompt, MODEL)
+            response, parsed, model = self.router.run(
+                complexity,
+                lambda model: self.query_ollama(prompt, model, lane),
+                parse=self._usable_actions
+            )
+        except LLMCallPreempted:
+            raise
         except Exception as e:
             print(f"Error querying execution model: {e}")
             return f"Error querying execution model: {e}", [], "Error occurred during processing"
         
-        # Parse the response to extract thoughts and actions
+        thoughts, actions = parsed or self.parse_actions(response)
+        
+        # Execution results summary
+        if actions:
+            results = f"Generated {len(actions)} actions to fulfill your request."
+        else:
+            results = "I understood your request but couldn't determine specific actions to take."
+            
+        return thoughts, actions, results
+
+    def _usable_actions(self, response):
+        """Parsed (thoughts, actions), or None if the response holds no actions"""
+        thoughts, actions = self.parse_actions(response)
+        return (thoughts, actions) if actions else None
+    
+    def parse_actions(self, response):
+        """
+        Split a model response into thoughts and a list of actions
+        
+        Returns:
+            (thoughts, actions): actions is [] if none could be parsed
+        """
         try:            # Split into thoughts and JSON actions
             thoughts = ""
             actions = []
@@ -133,25 +178,22 @@ class TaskExecutionModel:
             thoughts = f"Error parsing model response: {e}\n{response[:200]}..."
             actions = []
         
-        # Execution results summary
-        if actions:
-            results = f"Generated {len(actions)} actions to fulfill your request."
-        else:
-            results = "I understood your request but couldn't determine specific actions to take."
-            
-        return thoughts, actions, results
+        return thoughts, actions
 
-    def query_ollama(self, prompt, model=MODEL):
+    def query_ollama(self, prompt, model=MODEL, lane=INTERACTIVE):
         """
         Query Ollama API using built-in http client
         
         Args:
             prompt: The prompt to send to the model
             model: The model name to use
+            lane: Scheduler lane (used only with a scheduler)
             
         Returns:
             response_text: The model's response
         """
+        if self.scheduler is not None:
+            return self.scheduler.generate(prompt, model, lane)
         try:
             conn = http.client.HTTPConnection("localhost", 11434)
             headers = {'Content-Type': 'application/json'}
@@ -168,6 +210,9 @@ class TaskExecutionModel:
             conn.close()
             
             response_json = json.loads(data)
+            if 'error' in response_json:
+                # e.g. "model 'x' not found": lets the router move on to another model
+                raise Exception(response_json['error'])
             return response_json.get('response', 'No response from model')
         except Exception as e:
             raise Exception(f"Failed to query Ollama: {e}")
@@ -185,8 +230,28 @@ class TaskExecutionModel:
             
         Returns:
             prompt: Complete prompt for execution model
-        """        # System prompt for Deepseek Coder R1
-        system_prompt = """You are Deepseek Coder R1, a powerful AI assistant responsible for planning and executing complex tasks.
+        """
+        system_prompt = self.execution_instructions()
+        
+        # Format the directives
+        directives_str = json.dumps(directives, indent=2) if directives else "No directives provided"
+        
+        # Format the tasks
+        tasks_str = tasks if tasks else "No tasks available"
+        
+        # Build the complete prompt
+        complete_prompt = f"{system_prompt}\n\n"
+        complete_prompt += f"DIRECTIVES:\n{directives_str}\n\n"
+        complete_prompt += f"CURRENT TASKS:\n{tasks_str}\n\n"
+        
+        complete_prompt += "Your response (thoughts followed by JSON actions array):"
+        
+        return complete_prompt
+
+    def execution_instructions(self):
+        """Instructions and action reference shared by the single and batch planning prompts"""
+        # System prompt for Deepseek Coder R1
+        return """You are Deepseek Coder R1, a powerful AI assistant responsible for planning and executing complex tasks.
         Your job is to take directives from the frontend system and convert them into concrete actions that can be executed.
 
         MEMORY STRUCTURE OVERVIEW:
@@ -214,7 +279,7 @@ class TaskExecutionModel:
            - sequence_name: Clear descriptive name for the sequence
            - tasks: Array of task descriptions, each representing one step
            - description: Detailed explanation of what this sequence accomplishes
-        3. Each task in the sequence will be executed in order across multiple interactions
+        3. Each task in the sequence will be executed in order in the background, one step per idle cycle
         4. The system will automatically track progress and move to the next task
         5. Use internal thoughts to explain what's happening during execution
         6. When detecting a complex multi-step request that needs consistent execution, 
@@ -253,7 +318,17 @@ class TaskExecutionModel:
         - For specific fields: {"type": "retrieve_data", "args": {"data_type": "memory", "section": "personal_info.profile.age"}}
         - For entire sections: {"type": "retrieve_data", "args": {"data_type": "memory", "section": "health_and_wellness"}}
         - For search: {"type": "retrieve_data", "args": {"data_type": "memory", "query": "doctor"}}
-        - For tasks: {"type": "retrieve_data", "args": {"data_type": "tasks", "query": "urgent"}}        10. create_task_sequence: Create a multi-cycle task sequence
+        - For list items: {"type": "retrieve_data", "args": {"data_type": "memory", "section": "social_and_relationships.contacts", "where": {"name": "John"}}}
+        - For tasks: {"type": "retrieve_data", "args": {"data_type": "tasks", "query": "urgent"}}
+        - For past conversations: {"type": "retrieve_data", "args": {"data_type": "interactions", "query": "doctor", "period": "last month"}}
+        - For spending and budgets: {"type": "retrieve_data", "args": {"data_type": "finance", "category": "food", "period": "this month"}} (add "group_by": "category" or "month" for a breakdown; budgets remaining are included)
+        - For old task history and feedback moved out of memory: {"type": "retrieve_data", "args": {"data_type": "archive", "path": "execution_history", "query": "doctor", "period": "last year"}}
+        - For transactions, mood or fitness history (series "transactions", "mood", "fitness"):
+          totals/averages: {"type": "retrieve_data", "args": {"data_type": "timeseries", "series": "transactions", "field": "amount", "op": "sum", "period": "this month", "where": {"category": "groceries"}}}
+          rolling average per day: {"type": "retrieve_data", "args": {"data_type": "timeseries", "series": "mood", "field": "score", "op": "mean", "window": 7, "period": "last month"}}
+          latest entries: {"type": "retrieve_data", "args": {"data_type": "timeseries", "series": "transactions", "limit": 10}}
+        
+        10. create_task_sequence: Create a multi-cycle task sequence
         {"type": "create_task_sequence", "args": {"sequence_name": "Setup Health Profile", "tasks": ["Collect basic health information", "Record medical conditions", "Document medications"], "description": "Complete health profile setup for the user", "priority": "high"}}
         
         11. add_subtask: Add a subtask to an existing task
@@ -276,18 +351,83 @@ class TaskExecutionModel:
         Focus on understanding what the user wants and executing their request accurately.
         For complex requests, break them down into manageable steps and create task sequences.
         """
+
+    def build_batch_prompt(self, tasks, tasks_md, system_memory=None):
+        """
+        Build one prompt planning several queued tasks, keyed t1..tN
         
-        # Format the directives
-        directives_str = json.dumps(directives, indent=2) if directives else "No directives provided"
+        Args:
+            tasks: Queued task dicts (description, priority, ...)
+            tasks_md: Current tasks
+            system_memory: System memory (not used in simple version)
+            
+        Returns:
+            prompt: Complete prompt for the batch
+        """
+        batch = {f"t{i + 1}": task for i, task in enumerate(tasks)}
         
-        # Format the tasks
-        tasks_str = tasks if tasks else "No tasks available"
+        complete_prompt = f"{self.execution_instructions()}\n\n"
+        complete_prompt += f"BATCH OF BACKGROUND TASKS:\n{json.dumps(batch, indent=2, default=str)}\n\n"
+        complete_prompt += f"CURRENT TASKS:\n{tasks_md if tasks_md else 'No tasks available'}\n\n"
+        complete_prompt += (
+            "Plan every task of the batch on its own, as if it were the only directive. "
+            "Respond with brief thoughts followed by ONE JSON object mapping each task key to its array of actions "
+            "(an empty array if a task needs no action), for example:\n"
+            '```json\n{"t1": [{"type": "add_task", "args": {"task": "...", "priority": "medium"}}], "t2": []}\n```\n\n'
+        )
+        complete_prompt += "Your response (thoughts followed by the JSON object of action arrays):"
         
-        # Build the complete prompt
-        complete_prompt = f"{system_prompt}\n\n"
-        complete_prompt += f"DIRECTIVES:\n{directives_str}\n\n"
-        complete_prompt += f"CURRENT TASKS:\n{tasks_str}\n\n"
+        return complete_prompt
+    
+    def plan_batch(self, tasks, tasks_md, system_memory=None, lane=BACKGROUND):
+        """
+        Plan several queued tasks with one model call
         
-        complete_prompt += "Your response (thoughts followed by JSON actions array):"
+        Args:
+            tasks: Queued task dicts
+            tasks_md: Current tasks
+            system_memory: System memory for context
+            lane: Scheduler lane
+            
+        Returns:
+            (thoughts, planned): planned maps task position to its action list; tasks
+            the response left out are missing from it
+            
+        Raises:
+            LLMCallPreempted: The call was aborted for a user request
+            Exception: Every model failed
+        """
+        prompt = self.build_batch_prompt(tasks, tasks_md, system_memory)
+        keys = [f"t{i + 1}" for i in range(len(tasks))]
+        
+        # Each task of the batch counts as one expected action
+        complexity = classify_complexity(directives=tasks, expected_actions=len(tasks))
+        response, parsed, model = self.router.run(
+            complexity,
+            lambda model: self.query_ollama(prompt, model, lane),
+            parse=lambda text: self.parse_batch_actions(text, keys)
+        )
+        if not parsed:
+            return response, {}
+        thoughts, keyed = parsed
+        return thoughts, {keys.index(key): actions for key, actions in keyed.items()}
+    
+    def parse_batch_actions(self, response, keys):
+        """
+        Extract the keyed action lists from a batch response
         
-        return complete_prompt
\ No newline at end of file
+        Returns:
+            (thoughts, {key: actions}), or None if no task key could be parsed
+        """
+        keyed = extract_json_object(response)
+        if not isinstance(keyed, dict):
+            return None
+        keyed = {
+            key: [action for action in actions if isinstance(action, dict) and action.get('type')]
+            for key, actions in keyed.items() if key in keys and isinstance(actions, list)
+        }
+        if not keyed:
+            return None
+        # Thoughts are whatever precedes the JSON
+        thoughts = re.split(r'```|\{', response, maxsplit=1)[0].strip()
+        return thoughts, keyed
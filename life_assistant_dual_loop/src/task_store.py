@@ -0,0 +1,278 @@
+import os
+import re
+import sqlite3
+import datetime
+import threading
+
+TASK_LINE_PATTERN = re.compile(r'^\s*[-*]\s*\[( |x|X)\]\s*(.+?)\s*$')
+
+
+def normalize_task_text(text):
+    """Normalize task text for duplicate detection (case, punctuation and spacing insensitive)"""
+    text = str(text or '')
+    match = TASK_LINE_PATTERN.match(text)
+    if match:
+        text = match.group(2)
+    text = text.casefold()
+    text = re.sub(r'[^\w\s]', ' ', text)
+    return ' '.join(text.split())
+
+
+class TaskStore:
+    """
+    SQLite-backed task store with stable ids, a status index and a text index.
+    The markdown task file is only a rendered view, regenerated lazily when read.
+    """
+
+    def __init__(self, db_path, markdown_path=None):
+        self.db_path = db_path
+        self.markdown_path = markdown_path
+        self._lock = threading.RLock()
+        self._rendered = None
+        self._dirty = True
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        is_new = not os.path.exists(db_path)
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self._create_schema()
+        self._data_version = self._read_data_version()
+
+        # Seed a fresh store from the existing markdown file
+        if is_new and markdown_path and os.path.exists(markdown_path):
+            self.import_markdown(markdown_path)
+
+    def _create_schema(self):
+        """Create tables, indexes and the full-text index if available"""
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS tasks (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    text TEXT NOT NULL,
+                    norm_text TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    priority TEXT NOT NULL DEFAULT 'medium',
+                    created_at TEXT NOT NULL,
+                    completed_at TEXT
+                )
+            """)
+            self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_norm_text ON tasks(norm_text)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status, id)")
+
+        try:
+            with self.conn:
+                self.conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(norm_text, content='tasks', content_rowid='id')"
+                )
+                self.conn.execute("""
+                    CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+                        INSERT INTO tasks_fts(rowid, norm_text) VALUES (new.id, new.norm_text);
+                    END
+                """)
+                self.conn.execute("""
+                    CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+                        INSERT INTO tasks_fts(tasks_fts, rowid, norm_text) VALUES ('delete', old.id, old.norm_text);
+                    END
+                """)
+            self.fts_enabled = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: fall back to LIKE scans for text search
+            self.fts_enabled = False
+
+    def _row_to_task(self, row):
+        return dict(row) if row is not None else None
+
+    def _mark_dirty(self):
+        self._dirty = True
+        self._rendered = None
+
+    def _read_data_version(self):
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _check_other_writers(self):
+        """Mark the view dirty if another connection (e.g. the other process) changed the database"""
+        version = self._read_data_version()
+        if version != self._data_version:
+            self._data_version = version
+            self._mark_dirty()
+
+    def import_markdown(self, markdown_path):
+        """Import tasks from a markdown checklist file"""
+        try:
+            with open(markdown_path, 'r') as f:
+                lines = f.readlines()
+        except OSError:
+            return 0
+
+        imported = 0
+        for line in lines:
+            match = TASK_LINE_PATTERN.match(line)
+            if not match:
+                continue
+            task, created = self.add(match.group(2))
+            if match.group(1).lower() == 'x':
+                self.complete(task['id'])
+            imported += int(created)
+        return imported
+
+    def get(self, task_id):
+        """Get a task by its id"""
+        row = self.conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return self._row_to_task(row)
+
+    def find(self, text):
+        """Find a task by text, ignoring case, punctuation and spacing"""
+        row = self.conn.execute(
+            "SELECT * FROM tasks WHERE norm_text = ?", (normalize_task_text(text),)
+        ).fetchone()
+        return self._row_to_task(row)
+
+    def add(self, text, priority='medium'):
+        """
+        Add a task unless an equivalent one already exists; an equivalent
+        completed task is reopened (back to pending) instead
+
+        Returns:
+            (task, created): The stored task and whether it was newly created
+        """
+        norm_text = normalize_task_text(text)
+        if not norm_text:
+            raise ValueError("Task text is empty")
+
+        with self._lock:
+            existing = self.find(text)
+            if existing and existing['status'] == 'completed':
+                return self.reopen(existing['id']), False
+            if existing:
+                return existing, False
+
+            with self.conn:
+                cursor = self.conn.execute(
+                    "INSERT INTO tasks (text, norm_text, status, priority, created_at) VALUES (?, ?, 'pending', ?, ?)",
+                    (str(text).strip(), norm_text, priority or 'medium', datetime.datetime.now().isoformat())
+                )
+            self._mark_dirty()
+            return self.get(cursor.lastrowid), True
+
+    def complete(self, task):
+        """
+        Mark a task as completed
+
+        Args:
+            task: Task id, or task text. Text is matched exactly after normalization,
+                  then by word match if exactly one pending task contains all its words.
+
+        Returns:
+            The completed task, or None if no pending task matched
+        """
+        with self._lock:
+            if isinstance(task, int):
+                entry = self.get(task)
+            else:
+                entry = self.find(task)
+                if entry is None:
+                    candidates = self.search(task, status='pending', limit=2)
+                    entry = candidates[0] if len(candidates) == 1 else None
+
+            if entry is None or entry['status'] == 'completed':
+                return None
+
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE tasks SET status = 'completed', completed_at = ? WHERE id = ?",
+                    (datetime.datetime.now().isoformat(), entry['id'])
+                )
+            self._mark_dirty()
+            return self.get(entry['id'])
+
+    def reopen(self, task_id):
+        """
+        Set a completed task back to pending
+
+        Returns:
+            The reopened task, or None if no completed task has this id
+        """
+        with self._lock:
+            with self.conn:
+                cursor = self.conn.execute(
+                    "UPDATE tasks SET status = 'pending', completed_at = NULL WHERE id = ? AND status = 'completed'",
+                    (task_id,)
+                )
+            if not cursor.rowcount:
+                return None
+            self._mark_dirty()
+            return self.get(task_id)
+
+    def list(self, status=None):
+        """List tasks in creation order, optionally filtered by status"""
+        if status:
+            rows = self.conn.execute("SELECT * FROM tasks WHERE status = ? ORDER BY id", (status,))
+        else:
+            rows = self.conn.execute("SELECT * FROM tasks ORDER BY id")
+        return [self._row_to_task(row) for row in rows]
+
+    def search(self, query, status=None, limit=50):
+        """Find tasks containing all words of the query"""
+        words = normalize_task_text(query).split()
+        if not words:
+            return []
+
+        if self.fts_enabled:
+            match = ' '.join(f'"{word}"*' for word in words)
+            sql = "SELECT tasks.* FROM tasks_fts JOIN tasks ON tasks.id = tasks_fts.rowid WHERE tasks_fts MATCH ?"
+            params = [match]
+        else:
+            sql = "SELECT * FROM tasks WHERE " + " AND ".join("norm_text LIKE ?" for _ in words)
+            params = [f"%{word}%" for word in words]
+
+        if status:
+            sql += " AND status = ?"
+            params.append(status)
+        sql += " ORDER BY id LIMIT ?"
+        params.append(limit)
+        return [self._row_to_task(row) for row in self.conn.execute(sql, params)]
+
+    def render_markdown(self, tasks=None):
+        """
+        Render tasks as a markdown checklist. Rendering of the full list is cached
+        and the markdown file is rewritten only when tasks changed since the last render,
+        here or through another connection to the database.
+        """
+        if tasks is not None:
+            lines = [f"- [{'x' if t['status'] == 'completed' else ' '}] {t['text']}" for t in tasks]
+            return '\n'.join(lines)
+
+        with self._lock:
+            self._check_other_writers()
+            if self._rendered is None:
+                lines = [f"- [{'x' if t['status'] == 'completed' else ' '}] {t['text']}" for t in self.list()]
+                self._rendered = "# Tasks\n\n" + ''.join(line + "\n" for line in lines)
+            if self._dirty:
+                self.write_markdown()
+            return self._rendered
+
+    def write_markdown(self):
+        """Write the rendered view to the markdown file"""
+        if not self.markdown_path or self._rendered is None:
+            return
+        directory = os.path.dirname(self.markdown_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.markdown_path, 'w') as f:
+            f.write(self._rendered)
+        self._dirty = False
+
+    def close(self):
+        """Flush the markdown view and close the database"""
+        if self._dirty and self.markdown_path:
+            self.render_markdown()
+        self.conn.close()
+
+
+def task_store_path(markdown_path):
+    """Database path backing a markdown task file (tasks.md -> tasks.db)"""
+    return os.path.splitext(markdown_path)[0] + '.db'
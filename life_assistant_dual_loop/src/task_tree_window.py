@@ -16,6 +16,8 @@ import threading
 import queue
 import random
 
+from state_snapshot import SnapshotReader
+
 # Path definitions
 DATA_BACKEND_DIR = os.path.join(BASE_DIR, 'data-backend')
 BACKEND_MEMORY_PATH = os.path.join(DATA_BACKEND_DIR, 'backend_memory.json')
@@ -58,6 +60,8 @@ class TaskTreeWindow:
         
         # Task tree structure
         self.task_tree = {}
+        self.memory_signature = None
+        self.snapshot_reader = SnapshotReader()
         
         # Icons for tree visualization
         self.icons = {
@@ -75,8 +79,37 @@ class TaskTreeWindow:
         }
     
     def clear_screen(self):
-        """Clear the terminal screen"""
-        os.system('cls' if os.name == 'nt' else 'clear')
+        """Clear the terminal screen with ANSI escapes (no subprocess)"""
+        sys.stdout.write('\033[2J\033[H')
+        sys.stdout.flush()
+    
+    def get_memory_signature(self):
+        """Cheap change detector for the backend memory file: (mtime, size)"""
+        try:
+            stat = os.stat(BACKEND_MEMORY_PATH)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+    
+    def load_task_data_if_changed(self):
+        """Reload task data only if the backend state changed since the last load.
+        Uses the backend's shared memory snapshot when available, otherwise the
+        backend memory file's (mtime, size) signature.
+        
+        Returns:
+            (task_tree, changed): Current task tree and whether it was reloaded
+        """
+        snapshot = self.snapshot_reader.read_if_changed()
+        if snapshot is not None:
+            return self.load_task_data(snapshot), True
+        if self.snapshot_reader.attached:
+            return self.task_tree, False
+        
+        signature = self.get_memory_signature()
+        if signature is not None and signature == self.memory_signature:
+            return self.task_tree, False
+        self.memory_signature = signature
+        return self.load_task_data(), True
     
     def print_header(self):
         """Print the window header"""
@@ -102,90 +135,97 @@ class TaskTreeWindow:
         print(f"{Colors.BOLD}{Colors.HEADER}{'='*80}{Colors.ENDC}")
         print()
     
-    def load_task_data(self):
-        """Load task data from backend memory file"""
+    def load_task_data(self, backend_memory=None):
+        """Build the task tree from backend memory
+        
+        Args:
+            backend_memory: Backend memory or state snapshot dictionary.
+                            Read from the backend memory file if not given.
+        """
         try:
-            if os.path.exists(BACKEND_MEMORY_PATH):
+            if backend_memory is None:
+                if not os.path.exists(BACKEND_MEMORY_PATH):
+                    return {"error": "Backend memory file not found"}
                 with open(BACKEND_MEMORY_PATH, 'r') as f:
                     backend_memory = json.load(f)
+            
+            # Get current time for age calculation
+            now = datetime.datetime.now()
+            
+            # Extract tasks from various sources in backend memory
+            task_tree = {
+                "processing_queue": [],
+                "constant_tasks": [],
+                "multi_cycle_tasks": [],
+                "next_cycle_plan": []
+            }
+            
+            # Process the queue tasks
+            if "processing_queue" in backend_memory:
+                for task in backend_memory["processing_queue"]:
+                    task_info = self._extract_task_info(task, now)
+                    if task_info:
+                        task_tree["processing_queue"].append(task_info)
+            
+            # Process constant tasks
+            if "constant_tasks" in backend_memory:
+                for task in backend_memory["constant_tasks"]:
+                    task_info = self._extract_task_info(task, now)
+                    if task_info:
+                        task_tree["constant_tasks"].append(task_info)
+              # Process multi-cycle tasks
+            if "multi_cycle_tasks" in backend_memory:
+                multi_cycle = backend_memory.get("multi_cycle_tasks", {})
+                active_sequences = multi_cycle.get("active_sequences", {})
+                completed_sequences = multi_cycle.get("completed_sequences", {})
+                current_id = multi_cycle.get("current_sequence_id")
+                if isinstance(active_sequences, dict):
+                    active_sequences = [dict(sequence, id=seq_id) for seq_id, sequence in active_sequences.items()]
+                # Process active sequences
+                for i, sequence in enumerate(active_sequences):
+                    seq_id = sequence.get("id", f"seq_{i}")
+                    seq_info = {
+                        "id": seq_id,
+                        "name": sequence.get("name", "Unnamed Sequence"),
+                        "description": sequence.get("description", ""),
+                        "status": sequence.get("status", "pending"),
+                        "priority": sequence.get("priority", "medium"),
+                        "is_current": seq_id == current_id,
+                        "progress": {
+                            "current": sequence.get("current_task_index", 0),
+                            "total": len(sequence.get("tasks", []))
+                        },
+                        "tasks": []
+                    }
                 
-                # Get current time for age calculation
-                now = datetime.datetime.now()
-                
-                # Extract tasks from various sources in backend memory
-                task_tree = {
-                    "processing_queue": [],
-                    "constant_tasks": [],
-                    "multi_cycle_tasks": [],
-                    "next_cycle_plan": []
-                }
-                
-                # Process the queue tasks
-                if "processing_queue" in backend_memory:
-                    for task in backend_memory["processing_queue"]:
-                        task_info = self._extract_task_info(task, now)
-                        if task_info:
-                            task_tree["processing_queue"].append(task_info)
+                    # Add individual tasks in the sequence
+                    tasks = sequence.get("tasks", [])
+                    current_idx = sequence.get("current_task_index", 0)
+                    completed_tasks = [t.get("task") for t in sequence.get("completed_tasks", [])]
                 
-                # Process constant tasks
-                if "constant_tasks" in backend_memory:
-                    for task in backend_memory["constant_tasks"]:
-                        task_info = self._extract_task_info(task, now)
-                        if task_info:
-                            task_tree["constant_tasks"].append(task_info)
-                  # Process multi-cycle tasks
-                if "multi_cycle_tasks" in backend_memory:
-                    multi_cycle = backend_memory.get("multi_cycle_tasks", {})
-                    active_sequences = multi_cycle.get("active_sequences", [])
-                    completed_sequences = multi_cycle.get("completed_sequences", [])
-                    current_id = multi_cycle.get("current_sequence_id")
-                      # Process active sequences
-                    for i, sequence in enumerate(active_sequences):
-                        seq_id = sequence.get("id", f"seq_{i}")
-                        seq_info = {
-                            "id": seq_id,
-                            "name": sequence.get("name", "Unnamed Sequence"),
-                            "description": sequence.get("description", ""),
-                            "status": sequence.get("status", "pending"),
-                            "priority": sequence.get("priority", "medium"),
-                            "is_current": seq_id == current_id,
-                            "progress": {
-                                "current": sequence.get("current_task_index", 0),
-                                "total": len(sequence.get("tasks", []))
-                            },
-                            "tasks": []
+                    for i, task in enumerate(tasks):
+                        status = "completed" if i < current_idx else \
+                                "in_progress" if i == current_idx else "pending"
+                    
+                        task_info = {
+                            "description": task,
+                            "status": status,
+                            "index": i,
+                            "priority": sequence.get("priority", "medium")
                         }
-                        
-                        # Add individual tasks in the sequence
-                        tasks = sequence.get("tasks", [])
-                        current_idx = sequence.get("current_task_index", 0)
-                        completed_tasks = [t.get("task") for t in sequence.get("completed_tasks", [])]
-                        
-                        for i, task in enumerate(tasks):
-                            status = "completed" if i < current_idx else \
-                                    "in_progress" if i == current_idx else "pending"
-                            
-                            task_info = {
-                                "description": task,
-                                "status": status,
-                                "index": i,
-                                "priority": sequence.get("priority", "medium")
-                            }
-                            seq_info["tasks"].append(task_info)
-                        
-                        task_tree["multi_cycle_tasks"].append(seq_info)
-                
-                # Process next cycle plan
-                if "next_cycle_plan" in backend_memory:
-                    for task in backend_memory.get("next_cycle_plan", []):
-                        task_info = self._extract_task_info(task, now)
-                        if task_info:
-                            task_tree["next_cycle_plan"].append(task_info)
+                        seq_info["tasks"].append(task_info)
                 
-                self.task_tree = task_tree
-                return task_tree
-            else:
-                return {"error": "Backend memory file not found"}
+                    task_tree["multi_cycle_tasks"].append(seq_info)
+            
+            # Process next cycle plan
+            if "next_cycle_plan" in backend_memory:
+                for task in backend_memory.get("next_cycle_plan", []):
+                    task_info = self._extract_task_info(task, now)
+                    if task_info:
+                        task_tree["next_cycle_plan"].append(task_info)
+            
+            self.task_tree = task_tree
+            return task_tree
         except Exception as e:
             return {"error": str(e)}
     
@@ -250,9 +290,10 @@ class TaskTreeWindow:
             }
         return None
     
-    def display_task_tree(self):
+    def display_task_tree(self, task_tree=None):
         """Display the task tree with proper formatting"""
-        task_tree = self.load_task_data()
+        if task_tree is None:
+            task_tree = self.load_task_data()
         
         if "error" in task_tree:
             print(f"{Colors.RED}Error loading task data: {task_tree['error']}{Colors.ENDC}")
@@ -620,19 +661,22 @@ class TaskTreeWindow:
         
         try:
             # Initial display
-            self.display_task_tree()
+            task_tree, _ = self.load_task_data_if_changed()
+            self.display_task_tree(task_tree)
             self._display_task_statistics()
             
             while not self.thread_stop_event.is_set():
                 # Wait a bit
                 time.sleep(2)
                 
-                # Periodically refresh
+                # Periodically refresh, repainting only when the backend memory changed
                 current_time = time.time()
                 if current_time - self.last_check_time >= 3:  # Refresh every 3 seconds
-                    self.print_header()
-                    self.display_task_tree()
-                    self._display_task_statistics()
+                    task_tree, changed = self.load_task_data_if_changed()
+                    if changed:
+                        self.print_header()
+                        self.display_task_tree(task_tree)
+                        self._display_task_statistics()
                     self.last_check_time = current_time
         
         except KeyboardInterrupt:
@@ -640,6 +684,267 @@ class TaskTreeWindow:
         finally:
             self.thread_stop_event.set()
 
+class CursesTaskTreeView:
+    """
+    Flicker-free curses renderer for the task tree.
+    Reloads only when the backend memory file changes, flattens the tree into
+    rows and redraws only the screen rows whose content changed. Sections and
+    sequences can be collapsed, and the view scrolls for large queues.
+    
+    Keys: Up/Down/j/k move, PgUp/PgDn/Home/End scroll, Space/Enter collapse or
+    expand, c collapse all, e expand all, q quit.
+    """
+    
+    POLL_INTERVAL_MS = 500          # How often the memory file signature is checked
+    AUTO_COLLAPSE_THRESHOLD = 50    # Sections with more rows start collapsed
+    HEADER_LINES = 2
+    
+    STATUS_SYMBOLS = {'completed': '✓', 'in_progress': '▶', 'failed': '✗', 'pending': '○'}
+    PRIORITY_SYMBOLS = {'high': '!', 'medium': '•', 'low': '·'}
+    SECTION_TITLES = {
+        'multi_cycle_tasks': 'MULTI-CYCLE TASK SEQUENCES',
+        'processing_queue': 'PROCESSING QUEUE',
+        'constant_tasks': 'CONSTANT TASKS',
+        'next_cycle_plan': 'NEXT CYCLE PLAN'
+    }
+    
+    def __init__(self, window):
+        self.window = window
+        self.collapsed = set()
+        self.auto_collapsed = set()
+        self.rows = []
+        self.drawn = {}
+        self.cursor = 0
+        self.scroll = 0
+        self.curses = None
+        self.styles = {}
+    
+    def run(self):
+        import curses
+        self.curses = curses
+        curses.wrapper(self._main)
+    
+    def _init_styles(self):
+        curses = self.curses
+        self.styles = {'normal': curses.A_NORMAL, 'header': curses.A_BOLD}
+        if curses.has_colors():
+            curses.start_color()
+            try:
+                curses.use_default_colors()
+                background = -1
+            except curses.error:
+                background = curses.COLOR_BLACK
+            palette = {
+                'completed': curses.COLOR_GREEN,
+                'in_progress': curses.COLOR_YELLOW,
+                'failed': curses.COLOR_RED,
+                'pending': curses.COLOR_WHITE,
+                'section': curses.COLOR_MAGENTA,
+                'info': curses.COLOR_CYAN
+            }
+            for pair_number, (name, color) in enumerate(palette.items(), start=1):
+                curses.init_pair(pair_number, color, background)
+                self.styles[name] = curses.color_pair(pair_number)
+            self.styles['section'] |= curses.A_BOLD
+    
+    def _style(self, name):
+        return self.styles.get(name, self.styles.get('normal', 0))
+    
+    def _main(self, stdscr):
+        curses = self.curses
+        try:
+            curses.curs_set(0)
+        except curses.error:
+            pass
+        stdscr.timeout(self.POLL_INTERVAL_MS)
+        self._init_styles()
+        stdscr.clear()
+        
+        while True:
+            task_tree, changed = self.window.load_task_data_if_changed()
+            if changed:
+                self.rows = self.build_rows(task_tree)
+            self.render(stdscr)
+            
+            key = stdscr.getch()
+            if key in (ord('q'), ord('Q')):
+                break
+            self.handle_key(key, stdscr)
+    
+    def build_rows(self, task_tree):
+        """Flatten the task tree into display rows: dicts with key, text, style, collapsible and parent"""
+        rows = []
+        if "error" in task_tree:
+            return [{'key': 'error', 'text': f"Error loading task data: {task_tree['error']}", 'style': 'failed', 'collapsible': False, 'parent': None}]
+        
+        for section, title in self.SECTION_TITLES.items():
+            entries = task_tree.get(section, [])
+            if not entries:
+                continue
+            section_key = f"section:{section}"
+            if len(entries) > self.AUTO_COLLAPSE_THRESHOLD and section_key not in self.auto_collapsed:
+                self.auto_collapsed.add(section_key)
+                self.collapsed.add(section_key)
+            
+            marker = '+' if section_key in self.collapsed else '-'
+            rows.append({'key': section_key, 'text': f"[{marker}] {title} ({len(entries)})", 'style': 'section', 'collapsible': True, 'parent': None})
+            if section_key in self.collapsed:
+                continue
+            
+            for i, entry in enumerate(entries):
+                if section == 'multi_cycle_tasks':
+                    self._add_sequence_rows(rows, entry, section_key)
+                else:
+                    self._add_task_rows(rows, entry, f"{section}:{i}", section_key, 1)
+        
+        if not rows:
+            rows.append({'key': 'empty', 'text': "No tasks currently in the system.", 'style': 'pending', 'collapsible': False, 'parent': None})
+        return rows
+    
+    def _add_sequence_rows(self, rows, sequence, section_key):
+        sequence_key = f"sequence:{sequence['id']}"
+        progress = sequence['progress']
+        percentage = int((progress['current'] / max(1, progress['total'])) * 100)
+        marker = '+' if sequence_key in self.collapsed else '-'
+        current = " * CURRENT" if sequence.get('is_current') else ""
+        rows.append({
+            'key': sequence_key,
+            'text': f"  [{marker}] {self.PRIORITY_SYMBOLS.get(sequence['priority'], '•')} {sequence['name']} "
+                    f"[{sequence['status'].upper()}] {progress['current']}/{progress['total']} ({percentage}%){current}",
+            'style': sequence['status'],
+            'collapsible': True,
+            'parent': section_key
+        })
+        if sequence_key in self.collapsed:
+            return
+        for task in sequence['tasks']:
+            rows.append({
+                'key': f"{sequence_key}:{task['index']}",
+                'text': f"      {self.STATUS_SYMBOLS.get(task['status'], '○')} Task {task['index'] + 1}: {task['description']}",
+                'style': task['status'],
+                'collapsible': False,
+                'parent': sequence_key
+            })
+    
+    def _add_task_rows(self, rows, task, key, parent, depth):
+        status = str(task.get('status', 'pending')).lower()
+        priority = str(task.get('priority', 'medium')).lower()
+        age = f" ({task['age']})" if task.get('age') else ""
+        interval = f" [{task['interval']}]" if task.get('interval') else ""
+        rows.append({
+            'key': key,
+            'text': f"{'  ' * depth}{self.PRIORITY_SYMBOLS.get(priority, '•')} {self.STATUS_SYMBOLS.get(status, '○')} "
+                    f"{task.get('description', 'No description')}{age}{interval}",
+            'style': status,
+            'collapsible': False,
+            'parent': parent
+        })
+        for j, subtask in enumerate(task.get('subtasks') or []):
+            if isinstance(subtask, dict):
+                self._add_task_rows(rows, subtask, f"{key}:{j}", parent, depth + 1)
+    
+    def render(self, stdscr):
+        """Redraw only the screen lines whose content changed since the last render"""
+        curses = self.curses
+        height, width = stdscr.getmaxyx()
+        body_height = max(1, height - self.HEADER_LINES)
+        
+        self.cursor = max(0, min(self.cursor, len(self.rows) - 1))
+        if self.cursor < self.scroll:
+            self.scroll = self.cursor
+        elif self.cursor >= self.scroll + body_height:
+            self.scroll = self.cursor - body_height + 1
+        self.scroll = max(0, min(self.scroll, max(0, len(self.rows) - body_height)))
+        
+        desired = {
+            0: ("TASK TREE  (q quit, space collapse, c/e collapse/expand all)", 'section'),
+            1: (f"{len(self.rows)} rows, showing {self.scroll + 1}-{min(len(self.rows), self.scroll + body_height)}", 'info')
+        }
+        for y in range(body_height):
+            index = self.scroll + y
+            if index < len(self.rows):
+                row = self.rows[index]
+                style = row['style'] + (':selected' if index == self.cursor else '')
+                desired[self.HEADER_LINES + y] = (row['text'], style)
+            else:
+                desired[self.HEADER_LINES + y] = ("", 'normal')
+        
+        for y, (text, style) in desired.items():
+            if self.drawn.get(y) == (text, style, width):
+                continue
+            base_style, _, selected = style.partition(':')
+            attr = self._style(base_style) | (curses.A_REVERSE if selected else 0)
+            try:
+                stdscr.move(y, 0)
+                stdscr.clrtoeol()
+                stdscr.addnstr(y, 0, text, max(0, width - 1), attr)
+            except curses.error:
+                pass
+            self.drawn[y] = (text, style, width)
+        
+        # Forget lines that are no longer on screen after a resize
+        for y in [y for y in self.drawn if y >= height]:
+            del self.drawn[y]
+        
+        stdscr.noutrefresh()
+        curses.doupdate()
+    
+    def handle_key(self, key, stdscr):
+        curses = self.curses
+        height, _ = stdscr.getmaxyx()
+        page = max(1, height - self.HEADER_LINES - 1)
+        
+        if key in (curses.KEY_UP, ord('k')):
+            self.cursor -= 1
+        elif key in (curses.KEY_DOWN, ord('j')):
+            self.cursor += 1
+        elif key == curses.KEY_PPAGE:
+            self.cursor -= page
+        elif key == curses.KEY_NPAGE:
+            self.cursor += page
+        elif key == curses.KEY_HOME:
+            self.cursor = 0
+        elif key == curses.KEY_END:
+            self.cursor = len(self.rows) - 1
+        elif key in (ord(' '), ord('\n'), curses.KEY_ENTER) and self.rows:
+            self.toggle(self.rows[max(0, min(self.cursor, len(self.rows) - 1))])
+        elif key == ord('c'):
+            self.collapsed.update(row['key'] for row in self.rows if row['collapsible'])
+            self._rebuild()
+        elif key == ord('e'):
+            self.collapsed.clear()
+            self._rebuild()
+        elif key == curses.KEY_RESIZE:
+            self.drawn.clear()
+            stdscr.clear()
+    
+    def toggle(self, row):
+        """Collapse or expand the row, or the group the row belongs to"""
+        key = row['key'] if row['collapsible'] else row['parent']
+        if key is None:
+            return
+        if key in self.collapsed:
+            self.collapsed.discard(key)
+        else:
+            self.collapsed.add(key)
+        self._rebuild()
+        # Keep the cursor on the toggled group
+        for i, candidate in enumerate(self.rows):
+            if candidate['key'] == key:
+                self.cursor = i
+                break
+    
+    def _rebuild(self):
+        self.rows = self.build_rows(self.window.task_tree)
+
 if __name__ == "__main__":
     window = TaskTreeWindow()
-    window.run()
+    if "--curses" in sys.argv:
+        try:
+            CursesTaskTreeView(window).run()
+        except ImportError:
+            # curses is not available on Windows without the windows-curses package
+            print(f"{Colors.YELLOW}curses is not available, falling back to the classic view{Colors.ENDC}")
+            window.run()
+    else:
+        window.run()
@@ -0,0 +1,635 @@
+import os
+import sys
+import json
+import math
+import time
+import bisect
+import struct
+import datetime
+import threading
+from array import array
+
+TIMESERIES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data-user', 'timeseries')
+
+SEGMENT_ROWS = 4096        # Rows per sealed segment file
+SEGMENT_MAGIC = b'TSEG1\n'
+MAX_ROLLING_DAYS = 3660
+
+# Append-only memory lists kept as time series: memory path, fields holding the
+# entry's time (first one present), numeric columns and dictionary-encoded string
+# columns. Other fields of an entry are kept with it as JSON.
+SERIES = {
+    'transactions': {
+        'path': 'finance_and_banking.transactions',
+        'time_fields': ('date', 'timestamp', 'time'),
+        'numbers': ('amount',),
+        'strings': ('id', 'date', 'timestamp', 'currency', 'category', 'description', 'merchant', 'account', 'type', 'source')
+    },
+    'mood': {
+        'path': 'health_and_wellness.mental_health.mood_tracking',
+        'time_fields': ('timestamp', 'date', 'time'),
+        'numbers': ('score', 'rating', 'level', 'energy'),
+        'strings': ('timestamp', 'date', 'time', 'mood', 'note', 'notes')
+    },
+    'fitness': {
+        'path': 'health_and_wellness.fitness.activities',
+        'time_fields': ('date', 'timestamp', 'time'),
+        'numbers': ('duration_minutes', 'distance_km', 'calories', 'steps'),
+        'strings': ('date', 'timestamp', 'time', 'activity', 'type', 'name', 'notes')
+    }
+}
+
+_EXTRA = '__extra__'
+_SERIES_BY_PATH = {spec['path']: name for name, spec in SERIES.items()}
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def series_for_path(path):
+    """Name of the time series stored at a memory path, or None"""
+    return _SERIES_BY_PATH.get(path)
+
+
+def migrated_marker(name):
+    """What a migrated memory list is replaced with"""
+    return {
+        "timeseries": name,
+        "note": "Entries are kept in the time-series store: retrieve_data with data_type 'timeseries'"
+    }
+
+
+def to_epoch(value):
+    """Seconds since the epoch of a timestamp (number, ISO date or datetime), or None"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime.datetime):
+        return value.timestamp()
+    if isinstance(value, datetime.date):
+        return datetime.datetime(value.year, value.month, value.day).timestamp()
+    if isinstance(value, str) and value:
+        try:
+            return datetime.datetime.fromisoformat(value.strip().replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def _day(epoch):
+    return datetime.date.fromtimestamp(epoch)
+
+
+class TimeSeriesStore:
+    """
+    Column store for an append-only memory list.
+
+    Entry times and numeric fields are array('d') columns; string fields are
+    array('I') codes into a per-column dictionary. New entries are appended
+    to a head log and sealed into a binary segment file every SEGMENT_ROWS
+    entries; sealed segments are never rewritten. Removing an entry appends
+    its row to a tombstone log. Row numbers are positions in the columns,
+    and a time-sorted permutation of them serves range queries by bisection.
+
+    One process writes a series (the backend); others pick up its appends
+    and seals on their next query. Listeners see every entry as it enters
+    or leaves the store, in this process or from another one.
+    """
+
+    def __init__(self, name, directory=None):
+        self._lock = threading.RLock()
+        self.name = name
+        self.spec = SERIES[name]
+        self.directory = directory or os.path.join(TIMESERIES_DIR, name)
+        self.head_path = os.path.join(self.directory, 'head.jsonl')
+        self.tombstone_path = os.path.join(self.directory, 'tombstones.txt')
+        os.makedirs(self.directory, exist_ok=True)
+        self.listeners = []
+        self._reset()
+        self.refresh()
+
+    def _reset(self):
+        self.times = array('d')
+        self.numbers = {field: array('d') for field in self.spec['numbers']}
+        self.strings = {field: array('I') for field in self.spec['strings'] + (_EXTRA,)}
+        # Code 0 stands for a missing value
+        self.dictionaries = {field: [None] for field in self.strings}
+        self.codes = {field: {} for field in self.strings}
+        self.order = array('I')          # Rows sorted by time
+        self.sorted_times = array('d')   # Their times, for bisection
+        self.deleted = set()
+        self.fingerprints = {}           # hash(fingerprint) -> rows
+        self.ids = {}                    # Entry 'id' -> rows
+        self.segments = []
+        self.sealed_rows = 0
+        self.head_offset = 0
+        self.tombstone_offset = 0
+        self.directory_stamp = None
+
+    # --- Encoding ---
+
+    def _split(self, record):
+        """(numbers, strings, extra JSON) of an entry as the columns hold it"""
+        numbers, strings, extra = {}, {}, {}
+        if not isinstance(record, dict):
+            return numbers, strings, json.dumps({'__value__': record}, sort_keys=True, default=str)
+        for field, value in record.items():
+            if field in self.numbers and isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+                numbers[field] = float(value)
+            elif field in self.strings and isinstance(value, str):
+                strings[field] = value
+            else:
+                extra[field] = value
+        return numbers, strings, json.dumps(extra, sort_keys=True, default=str) if extra else None
+
+    @staticmethod
+    def _join(numbers, strings, extra):
+        if extra:
+            extra = json.loads(extra)
+            if '__value__' in extra:
+                return extra['__value__']
+        record = dict(strings)
+        for field, value in numbers.items():
+            record[field] = int(value) if value.is_integer() else value
+        if extra:
+            record.update(extra)
+        return record
+
+    def fingerprint(self, record):
+        """Identity of an entry's content, as it reads back from the columns"""
+        return json.dumps(self._join(*self._split(record)), sort_keys=True, default=str)
+
+    def _entry_time(self, record):
+        if isinstance(record, dict):
+            for field in self.spec['time_fields']:
+                epoch = to_epoch(record.get(field))
+                if epoch is not None:
+                    return epoch
+        return None
+
+    def _code(self, field, value):
+        if value is None:
+            return 0
+        codes = self.codes[field]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self.dictionaries[field])
+            self.dictionaries[field].append(value)
+        return code
+
+    def _add_row(self, epoch, record):
+        numbers, strings, extra = self._split(record)
+        row = len(self.times)
+        self.times.append(epoch)
+        for field, column in self.numbers.items():
+            column.append(numbers.get(field, math.nan))
+        for field, column in self.strings.items():
+            column.append(self._code(field, extra if field == _EXTRA else strings.get(field)))
+        self._index_row(row)
+        return row
+
+    def _index_row(self, row):
+        epoch = self.times[row]
+        if not self.sorted_times or epoch >= self.sorted_times[-1]:
+            position = len(self.order)
+        else:
+            position = bisect.bisect_right(self.sorted_times, epoch)
+        self.order.insert(position, row)
+        self.sorted_times.insert(position, epoch)
+        record = self.record(row)
+        self.fingerprints.setdefault(hash(json.dumps(record, sort_keys=True, default=str)), []).append(row)
+        if isinstance(record, dict) and record.get('id') is not None:
+            self.ids.setdefault(str(record['id']), []).append(row)
+        if row not in self.deleted:
+            self._notify('add', row)
+
+    def add_listener(self, callback):
+        """
+        Call callback(change, epoch, record) for each entry added ('add') or
+        removed ('remove'), starting with an 'add' for every entry stored now
+        """
+        with self._lock:
+            self.refresh()
+            for row in self._rows():
+                callback('add', self.times[row], self.record(row))
+            self.listeners.append(callback)
+
+    def _notify(self, change, row):
+        if not self.listeners:
+            return
+        epoch, record = self.times[row], self.record(row)
+        for callback in self.listeners:
+            try:
+                callback(change, epoch, record)
+            except Exception as e:
+                print(f"Error in {self.name} listener: {e}")
+
+    def _delete(self, row):
+        if row not in self.deleted:
+            self.deleted.add(row)
+            if row < len(self.times):
+                self._notify('remove', row)
+
+    def record(self, row):
+        """The entry stored at a row"""
+        numbers = {field: column[row] for field, column in self.numbers.items() if not math.isnan(column[row])}
+        strings = {field: self.dictionaries[field][column[row]] for field, column in self.strings.items()
+                   if field != _EXTRA and column[row]}
+        return self._join(numbers, strings, self.dictionaries[_EXTRA][self.strings[_EXTRA][row]])
+
+    # --- Files ---
+
+    def _segment_files(self):
+        return sorted(name for name in os.listdir(self.directory) if name.startswith('segment-') and name.endswith('.seg'))
+
+    def _load_segment(self, name):
+        with open(os.path.join(self.directory, name), 'rb') as f:
+            if f.read(len(SEGMENT_MAGIC)) != SEGMENT_MAGIC:
+                raise ValueError(f"Not a segment file: {name}")
+            header_length, = struct.unpack('<I', f.read(4))
+            header = json.loads(f.read(header_length))
+            data = f.read()
+        swap = header['byteorder'] != sys.byteorder
+        first_row = len(self.times)
+
+        def column(entry):
+            values = array(entry['typecode'])
+            values.frombytes(data[entry['offset']:entry['offset'] + entry['length']])
+            if swap:
+                values.byteswap()
+            return values
+
+        columns = {entry['name']: entry for entry in header['columns']}
+        self.times.extend(column(columns['__time__']))
+        for field, target in self.numbers.items():
+            target.extend(column(columns[field]) if field in columns else array('d', [math.nan]) * header['rows'])
+        for field, target in self.strings.items():
+            if field not in columns:
+                target.extend(array('I', [0]) * header['rows'])
+                continue
+            # Segment-local codes to this store's codes
+            mapping = [self._code(field, value) for value in columns[field]['dictionary']]
+            target.extend(array('I', (mapping[code] for code in column(columns[field]))))
+        for row in range(first_row, len(self.times)):
+            self._index_row(row)
+        self.segments.append(name)
+        self.sealed_rows = len(self.times)
+
+    def _seal(self):
+        """Write the head rows to a new segment file and empty the head log"""
+        rows = range(self.sealed_rows, len(self.times))
+        if not rows:
+            return
+        columns, chunks, offset = [], [], 0
+
+        def add(name, values, dictionary=None):
+            nonlocal offset
+            data = values.tobytes()
+            entry = {'name': name, 'typecode': values.typecode, 'offset': offset, 'length': len(data)}
+            if dictionary is not None:
+                entry['dictionary'] = dictionary
+            columns.append(entry)
+            chunks.append(data)
+            offset += len(data)
+
+        add('__time__', self.times[rows.start:rows.stop])
+        for field, column in self.numbers.items():
+            add(field, column[rows.start:rows.stop])
+        for field, column in self.strings.items():
+            local = {0: 0}
+            dictionary = [None]
+            codes = array('I')
+            for code in column[rows.start:rows.stop]:
+                if code not in local:
+                    local[code] = len(dictionary)
+                    dictionary.append(self.dictionaries[field][code])
+                codes.append(local[code])
+            add(field, codes, dictionary)
+
+        header = json.dumps({
+            'series': self.name,
+            'first_row': rows.start,
+            'rows': len(rows),
+            'byteorder': sys.byteorder,
+            'min_time': min(self.times[rows.start:rows.stop]),
+            'max_time': max(self.times[rows.start:rows.stop]),
+            'columns': columns
+        }).encode('utf-8')
+        name = f"segment-{rows.start:010d}.seg"
+        path = os.path.join(self.directory, name)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(SEGMENT_MAGIC)
+            f.write(struct.pack('<I', len(header)))
+            f.write(header)
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(path + '.tmp', path)
+        self.segments.append(name)
+        self.sealed_rows = rows.stop
+        # Head lines of sealed rows are skipped when read, so a crash here loses nothing
+        with open(self.head_path, 'w'):
+            pass
+        self.head_offset = 0
+        self.directory_stamp = self._directory_stamp()
+
+    def _directory_stamp(self):
+        try:
+            return os.stat(self.directory).st_mtime_ns
+        except OSError:
+            return None
+
+    def _drop_head_rows(self):
+        """Forget rows that were only in the head log (another process sealed them)"""
+        for row in range(self.sealed_rows, len(self.times)):
+            if row not in self.deleted:
+                self._notify('remove', row)
+        del self.times[self.sealed_rows:]
+        for column in list(self.numbers.values()) + list(self.strings.values()):
+            del column[self.sealed_rows:]
+        kept = [(epoch, row) for epoch, row in zip(self.sorted_times, self.order) if row < self.sealed_rows]
+        self.sorted_times = array('d', (epoch for epoch, _ in kept))
+        self.order = array('I', (row for _, row in kept))
+        for index in (self.fingerprints, self.ids):
+            for key in list(index):
+                rows = [row for row in index[key] if row < self.sealed_rows]
+                if rows:
+                    index[key] = rows
+                else:
+                    del index[key]
+        self.head_offset = 0
+
+    def _read_log(self, path, offset):
+        """Complete lines appended to a log since offset, and the new offset"""
+        try:
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+        except OSError:
+            return [], offset
+        end = data.rfind(b'\n') + 1
+        return data[:end].decode('utf-8').splitlines(), offset + end
+
+    def refresh(self):
+        """Pick up segments, head entries and removals written by another process"""
+        with self._lock:
+            stamp = self._directory_stamp()
+            if stamp != self.directory_stamp:
+                self.directory_stamp = stamp
+                new_segments = [name for name in self._segment_files() if name not in self.segments]
+                if new_segments:
+                    self._drop_head_rows()
+                    for name in new_segments:
+                        self._load_segment(name)
+            try:
+                if os.path.getsize(self.head_path) < self.head_offset:
+                    self.head_offset = 0  # Emptied after a seal
+            except OSError:
+                pass
+            lines, self.head_offset = self._read_log(self.head_path, self.head_offset)
+            for line in lines:
+                entry = json.loads(line)
+                if entry['row'] == len(self.times):
+                    self._add_row(entry['time'], entry['record'])
+            lines, self.tombstone_offset = self._read_log(self.tombstone_path, self.tombstone_offset)
+            for line in lines:
+                if line.strip():
+                    self._delete(int(line))
+
+    # --- Changes ---
+
+    def _find_id(self, record):
+        """Live row of the entry with the same 'id', or None"""
+        if not isinstance(record, dict) or record.get('id') is None:
+            return None
+        for row in self.ids.get(str(record['id']), ()):
+            if row not in self.deleted:
+                return row
+        return None
+
+    def _find(self, record):
+        for row in self.fingerprints.get(hash(self.fingerprint(record)), ()):
+            if row not in self.deleted and self.fingerprint(self.record(row)) == self.fingerprint(record):
+                return row
+        return None
+
+    def __contains__(self, record):
+        with self._lock:
+            self.refresh()
+            return self._find(record) is not None
+
+    def append(self, record):
+        """
+        Add an entry (its time is taken from its time field, else now)
+
+        Entries are events, so an entry equal to a stored one (the same coffee
+        bought twice in a day) is added again; only an entry with the 'id' of
+        a stored one is a repeat.
+
+        Returns:
+            False if an entry with the same 'id' is already stored
+        """
+        with self._lock:
+            self.refresh()
+            if self._find_id(record) is not None:
+                return False
+            epoch = self._entry_time(record)
+            epoch = time.time() if epoch is None else epoch
+            row = self._add_row(epoch, record)
+            line = json.dumps({'row': row, 'time': epoch, 'record': record}, default=str) + '\n'
+            with open(self.head_path, 'a') as f:
+                f.write(line)
+                self.head_offset = f.tell()
+            if len(self.times) - self.sealed_rows >= SEGMENT_ROWS:
+                self._seal()
+            return True
+
+    def remove(self, record):
+        """
+        Remove the entry with the 'id' of record, else one equal to record
+
+        Returns:
+            False if there is none
+        """
+        with self._lock:
+            self.refresh()
+            row = self._find_id(record)
+            if row is None:
+                row = self._find(record)
+            if row is None:
+                return False
+            self._delete(row)
+            with open(self.tombstone_path, 'a') as f:
+                f.write(f"{row}\n")
+                self.tombstone_offset = f.tell()
+            return True
+
+    # --- Queries ---
+
+    def _rows(self, start=None, end=None, where=None):
+        """Live rows with start <= time < end matching where, in time order"""
+        low = 0 if start is None else bisect.bisect_left(self.sorted_times, to_epoch(start))
+        high = len(self.order) if end is None else bisect.bisect_left(self.sorted_times, to_epoch(end))
+        rows = self.order[low:high]
+        if self.deleted:
+            rows = [row for row in rows if row not in self.deleted]
+        for field, value in (where or {}).items():
+            if field in self.strings:
+                code = self.codes[field].get(value)
+                if code is None:
+                    # Not stored under this spelling: compare case-insensitively
+                    wanted = {c for v, c in self.codes[field].items() if str(v).casefold() == str(value).casefold()}
+                    column = self.strings[field]
+                    rows = [row for row in rows if column[row] in wanted]
+                else:
+                    column = self.strings[field]
+                    rows = [row for row in rows if column[row] == code]
+            elif field in self.numbers:
+                column = self.numbers[field]
+                rows = [row for row in rows if column[row] == value]
+            else:
+                rows = [row for row in rows if isinstance(self.record(row), dict) and self.record(row).get(field) == value]
+        return rows
+
+    def _values(self, field, rows):
+        column = self.numbers[field]
+        return [value for value in (column[row] for row in rows) if not math.isnan(value)]
+
+    def count(self, start=None, end=None, where=None):
+        with self._lock:
+            self.refresh()
+            return len(self._rows(start, end, where))
+
+    def entries(self, start=None, end=None, where=None, limit=None):
+        """Entries in a time range, oldest first; the latest limit of them if given"""
+        with self._lock:
+            self.refresh()
+            rows = self._rows(start, end, where)
+            if limit:
+                rows = rows[-limit:]
+            return [self.record(row) for row in rows]
+
+    def aggregate(self, field, op='sum', start=None, end=None, where=None):
+        """
+        Aggregate a numeric field over a time range
+
+        Args:
+            op: 'sum', 'mean', 'min', 'max' or 'count'
+
+        Returns:
+            The aggregate, or None if no entry has the field
+        """
+        if field not in self.numbers:
+            raise ValueError(f"{field} is not a numeric field of {self.name}")
+        with self._lock:
+            self.refresh()
+            values = self._values(field, self._rows(start, end, where))
+        if op == 'count':
+            return len(values)
+        if not values:
+            return None
+        if op == 'sum':
+            return math.fsum(values)
+        if op == 'mean':
+            return math.fsum(values) / len(values)
+        if op == 'min':
+            return min(values)
+        if op == 'max':
+            return max(values)
+        raise ValueError(f"Unknown aggregate: {op}")
+
+    def rolling(self, field, window_days=7, op='mean', start=None, end=None, where=None):
+        """
+        Aggregate of a numeric field over a trailing window, for each day of a range
+
+        Returns:
+            List of {"date", "value"}; value is None for days with no entries in the window
+        """
+        if op not in ('mean', 'sum', 'count'):
+            raise ValueError(f"Unknown rolling aggregate: {op}")
+        with self._lock:
+            self.refresh()
+            rows = self._rows(start, end, where)
+            column = self.numbers[field]
+            points = [(self.times[row], column[row]) for row in rows if not math.isnan(column[row])]
+        if not points:
+            return []
+        first_day = _day(to_epoch(start)) if start is not None else _day(points[0][0])
+        last_day = _day(to_epoch(end) - 1) if end is not None else _day(points[-1][0])
+        days = min((last_day - first_day).days + 1, MAX_ROLLING_DAYS)
+
+        result, low, high, total = [], 0, 0, 0.0
+        for offset in range(days):
+            day = first_day + datetime.timedelta(days=offset)
+            day_end = datetime.datetime.combine(day + datetime.timedelta(days=1), datetime.time()).timestamp()
+            window_start = day_end - window_days * 86400
+            while high < len(points) and points[high][0] < day_end:
+                total += points[high][1]
+                high += 1
+            while low < high and points[low][0] < window_start:
+                total -= points[low][1]
+                low += 1
+            n = high - low
+            if op == 'count':
+                value = n
+            elif not n:
+                value = None
+            else:
+                value = round(total / n if op == 'mean' else total, 6)
+            result.append({"date": day.isoformat(), "value": value})
+        return result
+
+    def stats(self):
+        with self._lock:
+            columns = [self.times, self.order, self.sorted_times] + list(self.numbers.values()) + list(self.strings.values())
+            try:
+                disk = sum(os.path.getsize(os.path.join(self.directory, name)) for name in os.listdir(self.directory))
+            except OSError:
+                disk = 0
+            return {
+                'rows': len(self.times),
+                'live': len(self.times) - len(self.deleted),
+                'segments': len(self.segments),
+                'column_bytes': sum(column.itemsize * len(column) for column in columns),
+                'disk_bytes': disk
+            }
+
+
+def get_timeseries_store(name, directory=None):
+    """Shared TimeSeriesStore for a series, opened on first use"""
+    with _stores_lock:
+        key = (name, directory)
+        if key not in _stores:
+            _stores[key] = TimeSeriesStore(name, directory)
+        return _stores[key]
+
+
+def migrate_memory_lists(memory_manager):
+    """
+    Move entries of time-series paths out of user memory into their stores,
+    leaving a marker in their place
+
+    Returns:
+        Number of entries moved
+    """
+    user_mem = memory_manager.get_user_memory()
+    moved = 0
+    changed = False
+    for name, spec in SERIES.items():
+        parts = spec['path'].split('.')
+        parent = user_mem
+        for part in parts[:-1]:
+            parent = parent.get(part) if isinstance(parent, dict) else None
+        if not isinstance(parent, dict) or not isinstance(parent.get(parts[-1]), list):
+            continue
+        store = get_timeseries_store(name)
+        for entry in parent[parts[-1]]:
+            store.append(entry)
+        moved += len(parent[parts[-1]])
+        if parent[parts[-1]]:
+            print(f"Moved {len(parent[parts[-1]])} {name} entries from memory to the time-series store")
+        parent[parts[-1]] = migrated_marker(name)
+        changed = True
+    if changed:
+        memory_manager.save_memory()
+    return moved
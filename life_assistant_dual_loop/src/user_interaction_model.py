@@ -1,14 +1,20 @@
 import datetime
 import json
+import re
 import http.client  # Use built-in HTTP client instead of requests
 import os
 import sys
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, BASE_DIR)
 from utils import read_file, write_file
+from context_assembler import ContextAssembler
+from conversation_history import ConversationHistory, SUMMARY_WORD_LIMIT
+from response_templates import ResponseRenderer
+from model_router import ModelRouter, classify_complexity
+from llm_scheduler import InteractiveHold
 
 OLLAMA_URL = 'http://localhost:11434/api/generate'
-MODEL = 'llama3.2'  # Using Llama3.2 for frontend interactions
+MODEL = 'llama3.2'  # Default frontend model; ModelRouter picks per request from the 'frontend' ladder
 
 class UserInteractionModel:
     """
@@ -16,8 +22,11 @@ class UserInteractionModel:
     Translates user needs into system tasks and presents results back to the user.
     """
     def __init__(self):
-        self.conversation_history = []
-        self.max_history_items = 10  # Keep last 10 exchanges for context
+        # Persistent turns plus a rolling summary of older ones, updated in idle time
+        self.history = ConversationHistory(summarizer=self.summarize_conversation)
+        self.context_assembler = ContextAssembler()  # Relevant memory facts within a fixed token budget
+        self.response_renderer = ResponseRenderer()  # Template replies for simple, fully determined results
+        self.router = ModelRouter('frontend')  # Small model for simple turns, larger one for complex ones
       
     def process_input(self, human_input, user_memory):
         """
@@ -30,28 +39,40 @@ class UserInteractionModel:
         Returns:
             (thoughts, directives): Model thoughts and directives for the task execution system
         """
-        # Add input to conversation history
-        self.conversation_history.append({
-            "role": "user",
-            "content": human_input,
-            "timestamp": datetime.datetime.now().isoformat()
-        })
-        
-        # Trim history if it gets too long
-        if len(self.conversation_history) > self.max_history_items:
-            self.conversation_history = self.conversation_history[-self.max_history_items:]
-        
-        # Build prompt
+        # Build prompt (from the history before this input, which is the current request)
         prompt = self.build_prompt(human_input, user_memory)
+        complexity = classify_complexity(human_input, history_turns=len(self.history.get_recent()))
+        
+        # Add input to conversation history
+        self.history.add_turn("user", human_input)
         
-        # Query TinyLlama
+        # Query the routed model, moving to a larger one if the response has no directives;
+        # the backend holds its background calls meanwhile
         try:
-            response = self.query_ollama(prompt, MODEL)
+            with InteractiveHold():
+                response, parsed, model = self.router.run(
+                    complexity,
+                    lambda model: self.query_ollama(prompt, model),
+                    parse=self._usable_directives
+                )
         except Exception as e:
             print(f"Error querying language model: {e}")
             return "Error processing input", []
         
-        # Parse the response
+        return parsed or self.parse_directives(response)
+    
+    def _usable_directives(self, response):
+        """Parsed (thoughts, directives), or None if the response holds no directives"""
+        thoughts, directives = self.parse_directives(response)
+        return (thoughts, directives) if directives else None
+    
+    def parse_directives(self, response):
+        """
+        Split a model response into thoughts and JSON directives
+        
+        Returns:
+            (thoughts, directives): directives is [] if none could be parsed
+        """
         try:
             lines = response.split("\n")
             json_start = None
@@ -87,14 +108,6 @@ class UserInteractionModel:
             thoughts = f"Failed to parse response: {response[:100]}..."
             directives = []
         
-        # Add assistant response to conversation history
-        self.conversation_history.append({
-            "role": "assistant",
-            "content": thoughts,
-            "directives": directives,
-            "timestamp": datetime.datetime.now().isoformat()
-        })
-        
         return thoughts, directives
       
     def generate_output(self, execution_results, user_memory, full_response=None):
@@ -108,15 +121,73 @@ class UserInteractionModel:
             
         Returns:
             user_friendly_response: Response formatted for the user
-        """        # Build prompt for response generation
+        """
+        # Simple confirmations and single values need no model call
+        templated = self.response_renderer.render(full_response)
+        if templated is not None:
+            self.history.add_turn("assistant", templated)
+            return templated
+        
+        # Build prompt for response generation
         prompt = self.build_output_prompt(execution_results, user_memory, full_response)
         
+        # Phrasing is easy unless there are many results to cover
+        actions = full_response.get('actions', []) if isinstance(full_response, dict) else []
+        complexity = classify_complexity(expected_actions=len(actions), directives=actions)
+        
         # Query model for response
         try:
-            response = self.query_ollama(prompt, MODEL)
-            return response
+            with InteractiveHold():
+                response, _, model = self.router.run(
+                    complexity,
+                    lambda model: self.query_ollama(prompt, model),
+                    parse=lambda text: text if text.strip() else None
+                )
         except Exception as e:
             return f"I processed your request but encountered an error when generating a response: {e}"
+        
+        self.history.add_turn("assistant", response)
+        return response
+    
+    def plan_and_reply(self, human_input, user_memory):
+        """
+        Single-pass pipeline: one model call yields both the actions to
+        execute and a draft reply to the user
+        
+        Args:
+            human_input: Raw input from the user
+            user_memory: User-facing portion of memory
+            
+        Returns:
+            (thoughts, actions, reply): Model thoughts, list of actions and draft reply
+        """
+        prompt = self.build_single_pass_prompt(human_input, user_memory)
+        complexity = classify_complexity(human_input, history_turns=len(self.history.get_recent()))
+        self.history.add_turn("user", human_input)
+        
+        try:
+            with InteractiveHold():
+                response, plan, model = self.router.run(
+                    complexity,
+                    lambda model: self.query_ollama(prompt, model),
+                    parse=self._usable_plan
+                )
+        except Exception as e:
+            print(f"Error querying language model: {e}")
+            return "Error processing input", [], ""
+        
+        if plan is None:
+            return response, [], ""
+        
+        actions = [action for action in plan.get("actions", []) if isinstance(action, dict) and action.get("type")]
+        reply = plan.get("reply") if isinstance(plan.get("reply"), str) else ""
+        thoughts = plan.get("thoughts") if isinstance(plan.get("thoughts"), str) else ""
+        return thoughts, actions, reply.strip()
+    
+    def _usable_plan(self, response):
+        """Single-pass plan object, or None if the response holds no JSON object"""
+        plan = extract_json_object(response)
+        return plan if isinstance(plan, dict) else None
     
     def query_ollama(self, prompt, model=MODEL):
         """
@@ -144,10 +215,44 @@ class UserInteractionModel:
             data = response.read().decode("utf-8")
             conn.close()
             response_json = json.loads(data)
+            if 'error' in response_json:
+                # e.g. "model 'x' not found": lets the router move on to another model
+                raise Exception(response_json['error'])
             return response_json.get('response', 'No response from model')
         except Exception as e:
             raise Exception(f"Failed to query Ollama: {e}")
             
+    def summarize_conversation(self, previous_summary, turns):
+        """
+        Fold conversation turns into the running summary (used by the history in idle time)
+        
+        Args:
+            previous_summary: Current summary text
+            turns: Turns to add to it
+            
+        Returns:
+            summary: The updated summary
+        """
+        transcript = "\n".join(
+            f"{'User' if turn.get('role') == 'user' else 'Assistant'}: {turn.get('content', '')}" for turn in turns
+        )
+        prompt = f"""Update the running summary of a conversation between a user and their Life Assistant.
+Keep facts about the user, decisions, open requests and preferences. Drop greetings and small talk.
+Write at most {SUMMARY_WORD_LIMIT} words, as plain sentences.
+
+Current summary:
+{previous_summary or "(none)"}
+
+New conversation turns:
+{transcript}
+
+Updated summary:"""
+        # The smallest adequate model does; held like the other frontend calls, since it
+        # shares the Ollama instance with the backend's generations
+        with InteractiveHold():
+            response, _, model = self.router.run(0.0, lambda model: self.query_ollama(prompt, model))
+        return response
+    
     def build_prompt(self, human_input, user_memory):
         """
         Build a prompt for the model to process input
@@ -183,34 +288,18 @@ class UserInteractionModel:
         When users ask about personal information, always use retrieve_data with the proper path.
         """
         
-        # Format the conversation history to provide context
-        history = ""
-        if self.conversation_history:
-            for entry in self.conversation_history[-5:]:  # Include last 5 exchanges
-                if entry['role'] == 'user':
-                    history += f"User: {entry['content']}\n"
-                else:
-                    history += f"Assistant: {entry['content']}\n"
+        # Summary of older turns plus the last few turns verbatim
+        summary, history = self.history.format_for_prompt()
         
-        # Format user memory for context
-        memory_context = ""
-        if user_memory:
-            # Format tasks
-            if 'tasks' in user_memory and user_memory['tasks']:
-                memory_context += "Current Tasks:\n"
-                for task_type, tasks in user_memory['tasks'].items():
-                    if tasks:
-                        memory_context += f"- {task_type.replace('_', ' ').title()}: {', '.join(str(t) for t in tasks)}\n"
-            
-            # Format personal preferences
-            if 'personal' in user_memory and user_memory['personal']:
-                memory_context += "\nPersonal Preferences:\n"
-                for pref, value in user_memory['personal'].items():
-                    memory_context += f"- {pref}: {value}\n"
+        # Only the memory facts most relevant to this request, within a fixed token budget
+        memory_context = self.context_assembler.assemble(human_input, user_memory)
         
         # Assemble the complete prompt
         complete_prompt = f"{system_prompt}\n\n"
         
+        if summary:
+            complete_prompt += f"Earlier Conversation (summary):\n{summary}\n\n"
+        
         if history:
             complete_prompt += f"Conversation History:\n{history}\n\n"
             
@@ -221,6 +310,52 @@ class UserInteractionModel:
         
         return complete_prompt    
     
+    def build_single_pass_prompt(self, human_input, user_memory):
+        """
+        Build the prompt for the single-pass pipeline (actions and reply in one response)
+        
+        Args:
+            human_input: The raw input from the user
+            user_memory: User-facing memory
+            
+        Returns:
+            prompt: The complete prompt to send to the model
+        """
+        system_prompt = """You are a Life Assistant. Decide which actions fulfil the user's request and write your reply to the user, in one JSON object.
+
+Available actions:
+- update_memory: {"type": "update_memory", "args": {"key": "personal_info.profile.full_name", "value": "John Doe"}}
+- append_to_list: {"type": "append_to_list", "args": {"key": "social_and_relationships.contacts", "value": {"name": "John", "relationship": "friend"}}}
+- remove_from_list: {"type": "remove_from_list", "args": {"key": "health_and_wellness.medications", "value": "aspirin"}}
+- update_nested: {"type": "update_nested", "args": {"key": "finance_and_banking.accounts.0.balance", "value": "1500.00"}}
+- retrieve_data: {"type": "retrieve_data", "args": {"data_type": "memory", "section": "personal_info.profile.age"}}
+- add_task: {"type": "add_task", "args": {"task": "Task description", "priority": "high/medium/low"}}
+- complete_task: {"type": "complete_task", "args": {"task": "Task description"}}
+- create_task_sequence: {"type": "create_task_sequence", "args": {"sequence_name": "Name", "tasks": ["Step 1", "Step 2"], "description": "What it achieves"}}
+
+Memory sections: personal_info, health_and_wellness, calendar_and_events, finance_and_banking,
+social_and_relationships, work_and_projects, knowledge_and_learning, devices_and_smart_home.
+Always use full dot-notation paths.
+
+The reply is shown to the user after the actions ran. Confirm what was done in one or two friendly sentences.
+Do not state values you are retrieving: they are added to the reply automatically.
+
+Respond with only this JSON object:
+{"thoughts": "short reasoning", "actions": [...], "reply": "your reply to the user"}"""
+        
+        summary, history = self.history.format_for_prompt()
+        memory_context = self.context_assembler.assemble(human_input, user_memory)
+        
+        complete_prompt = f"{system_prompt}\n\n"
+        if summary:
+            complete_prompt += f"Earlier Conversation (summary):\n{summary}\n\n"
+        if history:
+            complete_prompt += f"Conversation History:\n{history}\n\n"
+        if memory_context:
+            complete_prompt += f"User Context:\n{memory_context}\n\n"
+        complete_prompt += f"Current Request: {human_input}\n\nJSON:"
+        return complete_prompt
+    
     def build_output_prompt(self, execution_results, user_memory, full_response=None):
         """
         Build a prompt for generating a user-friendly response
@@ -253,26 +388,10 @@ Be conversational and engaging, but stay focused on the user's original request.
 Also, if any actions updated user memory, backend memory, or similar, provide a short confirmation (e.g., 'Your birthday preferences have been updated.').
 """
 
-        # Format conversation history
-        history = ""
-        original_request = ""
-        if self.conversation_history:
-            # Get original request
-            for entry in reversed(self.conversation_history):
-                if entry['role'] == 'user':
-                    original_request = entry['content']
-                    break
-                    
-            # Include recent exchanges for context
-            for entry in self.conversation_history[-4:]:  # Last 4 exchanges
-                if entry['role'] == 'user':
-                    history += f"User: {entry['content']}\n"
-                else:
-                    if 'directives' in entry:
-                        # Just include the thoughts, not the directives
-                        history += f"Assistant: {entry['content']}\n"
-                    else:
-                        history += f"Assistant: {entry['content']}\n"
+        # Summary of older turns plus the last few turns verbatim
+        summary, history = self.history.format_for_prompt(4)
+        last_user_turn = self.history.last_user_turn()
+        original_request = last_user_turn['content'] if last_user_turn else ""
 
         # Gather confirmations for memory/backend updates
         confirmations = []
@@ -309,6 +428,9 @@ Also, if any actions updated user memory, backend memory, or similar, provide a
         # Assemble the complete prompt
         complete_prompt = f"{system_prompt}\n\n"
 
+        if summary:
+            complete_prompt += f"Earlier Conversation (summary):\n{summary}\n\n"
+
         if history:
             complete_prompt += f"Conversation Context:\n{history}\n\n"
 
@@ -327,4 +449,25 @@ Also, if any actions updated user memory, backend memory, or similar, provide a
 
         complete_prompt += "Your friendly response to the user:"
         
-        return complete_prompt
\ No newline at end of file
+        return complete_prompt
+
+
+def extract_json_object(response):
+    """
+    Extract the first JSON object from a model response (fenced or bare)
+    
+    Returns:
+        Parsed object, or None if there is no valid JSON object
+    """
+    fenced = re.search(r'```(?:json|JSON)?\s*(\{.*?\})\s*```', response, re.DOTALL)
+    candidates = [fenced.group(1)] if fenced else []
+    start = response.find('{')
+    end = response.rfind('}')
+    if start != -1 and end > start:
+        candidates.append(response[start:end + 1])
+    for candidate in candidates:
+        try:
+            return json.loads(candidate)
+        except ValueError:
+            continue
+    return None
@@ -2,6 +2,11 @@ import datetime
 import json
 import os
 
+from log_pipeline import log_event
+
+# One change log for both processes: the frontend runs some actions itself (single-pass pipeline)
+CHANGE_LOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data-backend', 'change_log.md')
+
 def read_file(path):
     try:
         with open(path, 'r') as f:
@@ -14,18 +19,20 @@ def write_file(path, content):
         f.write(content)
 
 def log_change(change_log_path, action, result):
-    # Ensure directory exists
-    import os
-    os.makedirs(os.path.dirname(change_log_path), exist_ok=True)
-    with open(change_log_path, 'a') as f:
-        f.write(f"[{datetime.datetime.now().isoformat()}] Action: {action}, Result: {result}\n")
+    timestamp = datetime.datetime.now().isoformat()
+    log_event(
+        change_log_path,
+        f"[{timestamp}] Action: {action}, Result: {result}\n",
+        {"timestamp": timestamp, "event": "change", "action": action, "result": result}
+    )
 
 def log_self_review(self_review_path, thoughts):
-    # Ensure directory exists
-    import os
-    os.makedirs(os.path.dirname(self_review_path), exist_ok=True)
-    with open(self_review_path, 'a') as f:
-        f.write(f"[{datetime.datetime.now().isoformat()}] {thoughts}\n")
+    timestamp = datetime.datetime.now().isoformat()
+    log_event(
+        self_review_path,
+        f"[{timestamp}] {thoughts}\n",
+        {"timestamp": timestamp, "event": "self_review", "thoughts": thoughts}
+    )
         
 def log_perception_action(log_path, perception_data, actions_data):
     """
@@ -36,9 +43,6 @@ def log_perception_action(log_path, perception_data, actions_data):
         perception_data: Dictionary containing what the agent perceives (plan, tasks, cron, human_input)
         actions_data: List of actions the agent takes
     """
-    # Ensure directory exists
-    os.makedirs(os.path.dirname(log_path), exist_ok=True)
-    
     # Format the perception data for logging
     perception_summary = {
         "plan": perception_data.get("plan", "")[:100] + "..." if perception_data.get("plan") else "",
@@ -48,8 +52,15 @@ def log_perception_action(log_path, perception_data, actions_data):
         "memory_keys": list(perception_data.get("memory", {}).keys())
     }
     
-    with open(log_path, 'a') as f:
-        f.write(f"\n[{datetime.datetime.now().isoformat()}] === AGENT CYCLE ===\n")
-        f.write(f"PERCEPTION:\n{json.dumps(perception_summary, indent=2)}\n\n")
-        f.write(f"ACTIONS:\n{json.dumps(actions_data, indent=2)}\n")
-        f.write("="*50 + "\n")
+    timestamp = datetime.datetime.now().isoformat()
+    text = (
+        f"\n[{timestamp}] === AGENT CYCLE ===\n"
+        f"PERCEPTION:\n{json.dumps(perception_summary, indent=2)}\n\n"
+        f"ACTIONS:\n{json.dumps(actions_data, indent=2)}\n"
+        + "="*50 + "\n"
+    )
+    log_event(
+        log_path,
+        text,
+        {"timestamp": timestamp, "event": "agent_cycle", "perception": perception_summary, "actions": actions_data}
+    )
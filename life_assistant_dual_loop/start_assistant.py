@@ -14,6 +14,14 @@ def parse_args():
     parser.add_argument("--debug", action="store_true", help="Enable debug mode")
     parser.add_argument("--backend-only", action="store_true", help="Start only the backend component")
     parser.add_argument("--frontend-only", action="store_true", help="Start only the frontend component")
+    parser.add_argument("--memory-service", action="store_true",
+                        help="Run a memory service process that owns memory for both frontend and backend")
+    parser.add_argument("--single-pass", action="store_true",
+                        help="Frontend plans actions and writes the reply in one model call, executing actions itself")
+    parser.add_argument("--concurrent", action="store_true",
+                        help="Keep accepting input while requests run; replies are shown as they complete")
+    parser.add_argument("--async-backend", action="store_true",
+                        help="Run the backend's request intake, queue and background work as concurrent asyncio tasks")
     return parser.parse_args()
 
 def ensure_directories_exist():
@@ -44,11 +52,22 @@ def start_life_assistant():
     args = parse_args()
     print("Starting Life Assistant System...")
     ensure_directories_exist()
-      # Determine how to open new terminals based on the platform
+    
+    # Optional memory service, started first so both components can connect to it
+    service_flag = ""
+    if args.memory_service:
+        print("Starting memory service...")
+        subprocess.Popen([sys.executable, os.path.join("src", "memory_service.py")])
+        service_flag = " --memory-service"
+        time.sleep(1)
+    frontend_flags = service_flag + (" --single-pass" if args.single_pass else "") + (" --concurrent" if args.concurrent else "")
+    backend_flags = service_flag + (" --async" if args.async_backend else "")
+    
+    # Determine how to open new terminals based on the platform
     if platform.system() == "Windows":
         # On Windows, use start cmd
         if not args.frontend_only:
-            backend_command = "start cmd /k python src/backend_loop.py"
+            backend_command = "start cmd /k python src/backend_loop.py" + backend_flags
             if args.debug:
                 backend_command += " --debug"
             print("Starting backend in a new window...")
@@ -68,7 +87,7 @@ def start_life_assistant():
             time.sleep(1)
             
         if not args.backend_only:
-            frontend_command = "start cmd /k python src/frontend_assistant.py"
+            frontend_command = "start cmd /k python src/frontend_assistant.py" + frontend_flags
             if args.debug:
                 frontend_command += " --debug"
             print("Starting frontend in a new window...")
@@ -87,7 +106,7 @@ def start_life_assistant():
     elif platform.system() == "Darwin":  # macOS
         # On macOS, use osascript to open a new Terminal window
         if not args.frontend_only:
-            backend_cmd = "python3 src/backend_loop.py"
+            backend_cmd = "python3 src/backend_loop.py" + backend_flags
             if args.debug:
                 backend_cmd += " --debug"
             # Escape double quotes for AppleScript
@@ -126,7 +145,7 @@ def start_life_assistant():
             subprocess.run(osascript_command, shell=True)
             time.sleep(2)  # Give it time to start
         if not args.backend_only:
-            frontend_command = "python3 src/frontend_assistant.py"
+            frontend_command = "python3 src/frontend_assistant.py" + frontend_flags
             if args.debug:
                 frontend_command += " --debug"
             # Start the frontend in the current terminal
@@ -138,7 +157,7 @@ def start_life_assistant():
         if not args.frontend_only:
             backend_started = False
             if os.system("which gnome-terminal > /dev/null 2>&1") == 0:
-                backend_command = f"gnome-terminal -- bash -c 'cd {os.getcwd()} && python3 src/backend_loop.py"
+                backend_command = f"gnome-terminal -- bash -c 'cd {os.getcwd()} && python3 src/backend_loop.py" + backend_flags
                 if args.debug:
                     backend_command += " --debug"
                 backend_command += "; exec bash'"
@@ -154,7 +173,7 @@ def start_life_assistant():
                 print("Starting internal window in a new gnome-terminal window...")
                 subprocess.run(internal_window_command, shell=True)
             elif os.system("which xterm > /dev/null 2>&1") == 0:
-                backend_command = f"xterm -T 'Life Assistant Backend' -e 'cd {os.getcwd()} && python3 src/backend_loop.py"
+                backend_command = f"xterm -T 'Life Assistant Backend' -e 'cd {os.getcwd()} && python3 src/backend_loop.py" + backend_flags
                 if args.debug:
                     backend_command += " --debug"
                 backend_command += "; exec bash'"
@@ -171,13 +190,13 @@ def start_life_assistant():
                 subprocess.run(internal_window_command, shell=True)
             else:
                 print("Could not find a suitable terminal emulator. Please start the backend manually in another terminal:")
-                print(f"  python3 src/backend_loop.py {'--debug' if args.debug else ''}")
+                print(f"  python3 src/backend_loop.py {'--debug' if args.debug else ''}{backend_flags}")
                 print("  python3 src/task_tree_window.py")
                 print("  python3 src/internal_window.py")
             if backend_started:
                 time.sleep(2)  # Give it time to start
         if not args.backend_only:
-            frontend_command = "python3 src/frontend_assistant.py"
+            frontend_command = "python3 src/frontend_assistant.py" + frontend_flags
             if args.debug:
                 frontend_command += " --debug"
             # Start the frontend in the current terminal
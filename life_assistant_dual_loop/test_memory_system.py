@@ -0,0 +1,332 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), 'src')))
+
+import json
+import time
+import datetime
+import threading
+
+import pytest
+
+import llm_scheduler
+import request_spool
+from task_store import TaskStore
+from fact_extraction import FactExtractor
+from timeseries_store import TimeSeriesStore
+from finance_rollups import FinanceRollups
+from memory_manager import MemoryManager
+from retention import RetentionEngine, search_archive
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+# --- LLM scheduler ---
+
+def make_scheduler():
+    """Scheduler whose model calls never leave the process"""
+    scheduler = llm_scheduler.LLMScheduler()
+    scheduler._request = lambda prompt, model: f"interactive: {prompt}"
+
+    def stream(prompt, model, call):
+        # A long generation: runs until it is aborted
+        while not call.aborted.wait(0.01):
+            pass
+        raise llm_scheduler.LLMCallPreempted("aborted")
+    scheduler._stream = stream
+    return scheduler
+
+
+def run_background(scheduler, outcomes):
+    try:
+        outcomes.append(scheduler.generate('p', 'm', llm_scheduler.BACKGROUND))
+    except llm_scheduler.LLMCallPreempted:
+        outcomes.append('preempted')
+
+
+def test_interactive_call_preempts_running_background_call():
+    scheduler = make_scheduler()
+    outcomes = []
+    thread = threading.Thread(target=run_background, args=(scheduler, outcomes))
+    thread.start()
+    assert wait_for(lambda: scheduler.stats()['background']['in_flight'] == 1)
+
+    assert scheduler.generate('hello', 'm') == "interactive: hello"
+    thread.join(2)
+    assert outcomes == ['preempted']
+    assert scheduler.stats()['background']['preempted'] == 1
+
+
+def test_hold_preempts_background_call_waiting_for_admission():
+    scheduler = make_scheduler()
+    scheduler.hold_background(5)
+    assert scheduler.background_held()
+    outcomes = []
+    thread = threading.Thread(target=run_background, args=(scheduler, outcomes))
+    thread.start()
+    assert wait_for(lambda: scheduler.stats()['background']['queued'] == 1)
+
+    scheduler.hold_background(5)
+    thread.join(2)
+    assert outcomes == ['preempted']
+    assert scheduler.stats()['background']['queued'] == 0
+
+
+def test_interactive_call_releases_hold():
+    scheduler = make_scheduler()
+    scheduler.hold_background(5)
+    scheduler.generate('hello', 'm')
+    assert not scheduler.background_held()
+
+
+def test_request_watcher_holds_for_spooled_request_and_interactive_hold(tmp_path):
+    spool_dir = tmp_path / 'requests'
+    spool_dir.mkdir()
+    hold_file = str(tmp_path / 'interactive_hold')
+    scheduler = make_scheduler()
+    watcher = llm_scheduler.RequestWatcher(str(tmp_path / 'backend_request.json'), scheduler, interval=0.02,
+                                           spool_dir=str(spool_dir), hold_file=hold_file).start()
+    try:
+        request_spool.submit_request({"id": "r1", "text": "hi"}, str(spool_dir))
+        assert wait_for(scheduler.background_held)
+
+        scheduler._hold_until = 0.0
+        with llm_scheduler.InteractiveHold(hold_file, heartbeat=0.05):
+            assert wait_for(scheduler.background_held)
+    finally:
+        watcher.close()
+
+
+# --- Request spool ---
+
+@pytest.fixture
+def spool(tmp_path):
+    return str(tmp_path / 'requests'), str(tmp_path / 'responses')
+
+
+def test_spool_claims_requests_in_submission_order(spool):
+    spool_dir, _ = spool
+    for request_id in ('a', 'b'):
+        request_spool.submit_request({"id": request_id}, spool_dir)
+
+    first = request_spool.next_request(spool_dir)
+    assert first == {"id": "a", "transport": request_spool.TRANSPORT_SPOOL}
+    assert sorted(name.split('-', 1)[1] for name in os.listdir(spool_dir)) == ['a.claimed', 'b.json']
+    assert request_spool.next_request(spool_dir)['id'] == 'b'
+    assert request_spool.next_request(spool_dir) is None
+
+
+def test_spool_releases_requests_claimed_by_a_stopped_backend(spool):
+    spool_dir, _ = spool
+    request_spool.submit_request({"id": "a"}, spool_dir)
+    request_spool.next_request(spool_dir)
+
+    assert request_spool.release_claimed_requests(spool_dir) == 1
+    assert request_spool.next_request(spool_dir)['id'] == 'a'
+
+
+def test_spool_cancel_of_queued_request_withdraws_it(spool):
+    spool_dir, response_dir = spool
+    request_spool.submit_request({"id": "a"}, spool_dir)
+
+    assert request_spool.cancel_request("a", spool_dir, response_dir)
+    assert request_spool.next_request(spool_dir) is None
+
+
+def test_spool_cancel_of_claimed_request_drops_its_response(spool):
+    spool_dir, response_dir = spool
+    request_spool.submit_request({"id": "a"}, spool_dir)
+    request = request_spool.next_request(spool_dir)
+
+    assert not request_spool.cancel_request("a", spool_dir, response_dir)
+    request_spool.complete_request(request, {"response": "done"}, spool_dir, response_dir)
+    assert request_spool.take_response("a", response_dir) is None
+    assert os.listdir(spool_dir) == [] and os.listdir(response_dir) == []
+
+
+def test_spool_response_is_taken_once(spool):
+    spool_dir, response_dir = spool
+    request_spool.submit_request({"id": "a"}, spool_dir)
+    request = request_spool.next_request(spool_dir)
+
+    request_spool.complete_request(request, {"response": "done"}, spool_dir, response_dir)
+    assert request_spool.take_response("a", response_dir) == {"response": "done"}
+    assert request_spool.take_response("a", response_dir) is None
+    assert os.listdir(spool_dir) == []
+
+
+# --- Task store ---
+
+@pytest.fixture
+def task_paths(tmp_path):
+    return str(tmp_path / 'tasks.db'), str(tmp_path / 'tasks.md')
+
+
+def test_task_store_add_ignores_equivalent_text(task_paths):
+    store = TaskStore(*task_paths)
+    task, created = store.add("Buy milk", 'high')
+    assert created and task['status'] == 'pending' and task['priority'] == 'high'
+
+    same, created = store.add("  buy MILK! ")
+    assert not created and same['id'] == task['id']
+    assert len(store.list()) == 1
+
+
+def test_task_store_complete_and_reopen(task_paths):
+    store = TaskStore(*task_paths)
+    task, _ = store.add("Walk the dog")
+    store.add("Water the plants")
+
+    assert store.complete("walk dog")['id'] == task['id']  # Word match, one pending candidate
+    assert store.complete(task['id']) is None               # Already completed
+    assert [entry['text'] for entry in store.list('completed')] == ["Walk the dog"]
+    assert "- [x] Walk the dog" in store.render_markdown()
+
+    assert store.reopen(task['id'])['status'] == 'pending'
+    assert store.reopen(task['id']) is None
+    store.complete(task['id'])
+    reopened, created = store.add("walk the dog")  # Adding a completed task again reopens it
+    assert not created and reopened['id'] == task['id'] and reopened['status'] == 'pending'
+
+
+def test_task_store_renders_changes_of_another_connection(task_paths):
+    writer, reader = TaskStore(*task_paths), TaskStore(*task_paths)
+    reader.render_markdown()
+
+    writer.add("Call the bank")
+    assert "Call the bank" in reader.render_markdown()
+    with open(task_paths[1]) as f:
+        assert "Call the bank" in f.read()
+
+
+# --- Fact extraction ---
+
+@pytest.fixture(scope='module')
+def extractor():
+    return FactExtractor()
+
+
+def facts(extractor, text):
+    return [(name, value) for name, _, _, value in extractor.extract(text)]
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("My name is Jane Doe.", [('name', 'Jane Doe')]),
+    ("Hi. Call me Alex", [('name', 'Alex')]),
+    ("I am 180 cm tall", [('height', '180 cm')]),
+    ("I'm 1.82 m", [('height', '1.82 m')]),
+    ("I weigh 72 kg", [('weight', '72 kg')]),
+    ("I am 34 years old", [('age', 34)]),
+    ("My email is jane@example.com", [('email', 'jane@example.com')]),
+])
+def test_fact_extraction_captures_own_facts(extractor, text, expected):
+    assert facts(extractor, text) == expected
+
+
+@pytest.mark.parametrize('text', [
+    "Call me Monday about the report",
+    "Call me tomorrow",
+    "Remind me to call me Mom",
+    "I am 1 m behind schedule",
+    "I am 3 in line",
+    "My brother's email is bob@example.com",
+    "Add a contact named Bob Smith, phone 555 123 4567",
+])
+def test_fact_extraction_ignores_lookalikes(extractor, text):
+    assert facts(extractor, text) == []
+
+
+def test_fact_extraction_records_spending(extractor):
+    [(name, transaction)] = facts(extractor, "I spent $12.50 on lunch")
+    assert name == 'amount'
+    assert transaction['amount'] == 12.5 and transaction['currency'] == 'USD'
+    assert transaction['description'] == 'lunch'
+
+
+# --- Time series and finance rollups ---
+
+def coffee(day, amount=3.5, **fields):
+    return dict({"amount": amount, "date": day, "category": "coffee", "currency": "USD"}, **fields)
+
+
+def test_timeseries_keeps_repeated_events_and_rejects_repeated_ids(tmp_path):
+    store = TimeSeriesStore('transactions', str(tmp_path / 'transactions'))
+    assert store.append(coffee("2026-10-01"))
+    assert store.append(coffee("2026-10-01"))  # The same coffee bought twice
+    assert store.append(coffee("2026-10-02", id="t1"))
+    assert not store.append(coffee("2026-10-02", id="t1"))
+
+    assert store.count() == 3
+    assert store.count("2026-10-01", "2026-10-02") == 2
+    assert store.aggregate('amount', 'sum') == 10.5
+    assert store.remove(coffee("2026-10-01"))
+    assert store.count() == 2
+
+    # Another process sees the same entries
+    assert TimeSeriesStore('transactions', str(tmp_path / 'transactions')).entries() == store.entries()
+
+
+def test_finance_rollups_follow_the_series(tmp_path):
+    store = TimeSeriesStore('transactions', str(tmp_path / 'transactions'))
+    store.append(coffee("2026-09-30", 4.0))
+    rollups = FinanceRollups(store)  # Built from the entries stored so far
+    store.append(coffee("2026-10-01"))
+    store.append(coffee("2026-10-01"))
+    store.append({"amount": 60, "date": "2026-10-15", "category": "groceries"})
+    store.append({"amount": 1000, "date": "2026-10-20", "type": "salary"})
+
+    assert rollups.totals() == {"USD": {"spent": 71.0, "income": 1000.0, "count": 5}}
+    assert rollups.totals("2026-10-01", "2026-11-01", category="Coffee") == {"USD": {"spent": 7.0, "income": 0.0, "count": 2}}
+    assert rollups.totals("2026-10-02", "2026-10-16")["USD"]["spent"] == 60.0
+
+    store.remove({"amount": 60, "date": "2026-10-15", "category": "groceries"})
+    assert rollups.totals("2026-10-01", "2026-11-01")["USD"] == {"spent": 7.0, "income": 1000.0, "count": 3}
+
+
+# --- Retention ---
+
+def test_retention_archives_expired_entries(tmp_path):
+    memory_manager = MemoryManager(str(tmp_path / 'user.json'), str(tmp_path / 'backend.json'), is_backend=True)
+    now = datetime.datetime(2026, 10, 19, 12)
+    backend = memory_manager.get_backend_memory()
+    backend['execution_history'] = [
+        {"task": "old report", "completed_at": "2026-01-05T09:00:00"},
+        {"task": "recent report", "completed_at": "2026-10-18T09:00:00"}
+    ]
+    backend['processing_queue'] = [
+        {"task": "done", "status": "completed", "completed_at": "2026-10-01T09:00:00"},
+        {"task": "waiting", "status": "pending", "added_at": "2026-01-01T00:00:00"}
+    ]
+    memory_manager.save_memory()
+    archive_dir = str(tmp_path / 'archive')
+    engine = RetentionEngine(memory_manager, archive_dir=archive_dir)
+
+    assert engine.apply(now) == {'execution_history': 1, 'processing_queue': 1}
+    with open(tmp_path / 'backend.json') as f:
+        saved = json.load(f)
+    assert [entry['task'] for entry in saved['execution_history']] == ["recent report"]
+    assert [entry['task'] for entry in saved['processing_queue']] == ["waiting"]  # Only completed entries expire
+
+    [archived] = search_archive('execution_history', 'OLD', archive_dir=archive_dir)
+    assert archived['entry'] == {"task": "old report", "completed_at": "2026-01-05T09:00:00"}
+    assert search_archive('execution_history', start="2026-02-01", archive_dir=archive_dir) == []
+    assert engine.apply(now) == {}
+
+
+def test_retention_waits_for_queue_entries_in_progress(tmp_path):
+    memory_manager = MemoryManager(str(tmp_path / 'user.json'), str(tmp_path / 'backend.json'), is_backend=True)
+    queue = memory_manager.get_backend_memory()['processing_queue'] = [
+        {"task": "done", "status": "completed", "completed_at": "2026-01-01T00:00:00"},
+        {"task": "batch", "status": "in_progress", "added_at": "2026-10-19T00:00:00"}
+    ]
+    engine = RetentionEngine(memory_manager, archive_dir=str(tmp_path / 'archive'))
+
+    assert 'processing_queue' not in engine.apply(datetime.datetime(2026, 10, 19, 12))
+    queue[1]['status'] = 'completed'
+    assert engine.apply(datetime.datetime(2026, 10, 19, 12)) == {'processing_queue': 1}